@@ -0,0 +1,49 @@
+import os
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from . import models
+
+# Ревизия каталога курсов и программ.
+# Хранится в однострочной таблице catalog_revision, общей для всех воркеров: увеличивается
+# в транзакции каждого изменения каталога (см. crud.commit_changes) и служит основой сильных
+# ETag для условных GET-запросов. Эпоха - случайное значение, выбранное при создании таблицы:
+# ETag пересозданной базы не совпадет с ETag прежней.
+
+def _new_row(revision: int):
+    return insert(models.catalog_revision).values(id=1, epoch=os.urandom(4).hex(), revision=revision)
+
+def bump_revision(db: Session | Connection) -> int:
+    """Отметить изменение каталога в текущей транзакции (до commit); вернуть новую ревизию"""
+    table = models.catalog_revision
+    statement = _new_row(1).on_conflict_do_update(
+        index_elements=[table.c.id], set_={"revision": table.c.revision + 1}
+    )
+    return db.execute(statement.returning(table.c.revision)).scalar_one()
+
+def catalog_revision(db: Session | Connection) -> tuple[str, int]:
+    """Текущая ревизия каталога: (эпоха, номер)"""
+    table = models.catalog_revision
+    row = db.execute(select(table.c.epoch, table.c.revision).where(table.c.id == 1)).first()
+    return (row.epoch, row.revision) if row is not None else ("", 0)
+
+def catalog_etag(db: Session | Connection) -> str:
+    """Сильный ETag текущей ревизии каталога"""
+    epoch, revision = catalog_revision(db)
+    return f'"{epoch}-{revision}"'
+
+def create_revision_table(conn: Connection):
+    """Создать таблицу ревизии каталога с начальной строкой"""
+    models.Base.metadata.create_all(conn, tables=[models.catalog_revision])
+    conn.execute(_new_row(0).on_conflict_do_nothing(index_elements=[models.catalog_revision.c.id]))
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Совпадает ли ETag с заголовком If-None-Match (сравнение без учета W/)"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
@@ -0,0 +1,116 @@
+import os
+
+# Настройки сервера
+
+def env_bool(name: str, default: bool) -> bool:
+    """Логический флаг из переменной окружения (1/true/yes/on)"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# Профиль подключения к БД.
+# development - как раньше: журнал отката, SQL пишется в лог;
+# production - WAL (читатели не блокируют писателя), без логирования SQL.
+# Любой параметр профиля можно переопределить переменной окружения EDU_DB_<ПАРАМЕТР>,
+# например EDU_DB_URL, EDU_DB_ECHO, EDU_DB_JOURNAL_MODE, EDU_DB_BUSY_TIMEOUT.
+DB_PROFILE = os.getenv("EDU_DB_PROFILE", "development")
+
+DB_PROFILES = {
+    "development": {
+        "url": "sqlite:///./education.db",
+        "echo": True,
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,          # отрицательное значение - размер в КиБ
+        "mmap_size": 0,
+        "busy_timeout": 5000,         # мс
+        "foreign_keys": False,
+        "pool_size": 5,
+        "max_overflow": 10,
+    },
+    "production": {
+        "url": "sqlite:///./education.db",
+        "echo": False,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,
+        "mmap_size": 268435456,
+        "busy_timeout": 5000,
+        "foreign_keys": True,
+        "pool_size": 10,
+        "max_overflow": 20,
+    },
+}
+
+def load_db_settings(profile: str | None = None) -> dict:
+    """Параметры подключения: профиль + переопределения из окружения"""
+    profile = profile or DB_PROFILE
+    if profile not in DB_PROFILES:
+        raise ValueError(f"Неизвестный профиль БД: {profile}")
+    settings = dict(DB_PROFILES[profile])
+    for name, default in settings.items():
+        env_name = f"EDU_DB_{name.upper()}"
+        if isinstance(default, bool):
+            settings[name] = env_bool(env_name, default)
+        elif os.getenv(env_name) is not None:
+            settings[name] = type(default)(os.environ[env_name])
+    return settings
+
+# Миграции схемы при старте воркера (api/migrations.py). Если выключены, воркер только
+# проверяет версию схемы и не стартует со старой базой: python -m api.migrations upgrade
+MIGRATE_ON_STARTUP = env_bool("EDU_MIGRATE_ON_STARTUP", True)
+
+# Асинхронный режим: основные эндпоинты работают через AsyncSession и aiosqlite
+ASYNC_DB = env_bool("EDU_ASYNC_DB", False)
+
+# Стратегия загрузки курсов программы для каждого эндпоинта:
+# "selectin" - один дополнительный запрос IN (...) на всю страницу,
+# "joined" - LEFT JOIN в основном запросе,
+# "select" - ленивая загрузка (N+1 запросов, только для отладки)
+RELATIONSHIP_LOADING = {
+    "read_program": "joined",
+    "get_programs_with_course": "selectin",
+}
+
+# ETag для GET-запросов каталога. Ревизия каталога хранится в базе (таблица catalog_revision)
+# и общая для всех воркеров
+ETAG_ENABLED = env_bool("EDU_ETAG", True)
+
+# Метрики запросов (заголовки X-Query-Count и Server-Timing, эндпоинт /metrics)
+METRICS_ENABLED = env_bool("EDU_METRICS", True)
+
+# Проверка каждого ответа быстрого пути списков по схеме (api/responses.py) - для отладки и bench.responses
+VALIDATE_RESPONSES = env_bool("EDU_VALIDATE_RESPONSES", False)
+
+# Журнал медленных SQL-запросов (api/slow_queries.py); порог 0 отключает журнал
+SLOW_QUERY_MS = float(os.getenv("EDU_SLOW_QUERY_MS", "100"))
+SLOW_QUERY_SAMPLE_RATE = float(os.getenv("EDU_SLOW_QUERY_SAMPLE_RATE", "1.0"))  # доля записываемых
+SLOW_QUERY_EXPLAIN = env_bool("EDU_SLOW_QUERY_EXPLAIN", False)                  # EXPLAIN QUERY PLAN
+SLOW_QUERY_LOG = os.getenv("EDU_SLOW_QUERY_LOG", "slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+
+# Массовый импорт курсов (POST /courses/bulk)
+BULK_CHUNK_SIZE = 500           # записей в одном executemany
+BULK_TRANSACTION_SIZE = 5000    # записей между commit
+BULK_MAX_ERRORS = 1000          # сколько ошибок по строкам возвращать в ответе
+
+# Потоковый экспорт (GET /courses/export, /programs/export)
+EXPORT_BATCH_SIZE = 1000        # строк, читаемых из курсора и отправляемых за раз
+
+# Похожие курсы (api/similarity.py): векторный индекс в памяти процесса
+SIMILAR_TEXT_DIMENSIONS = int(os.getenv("EDU_SIMILAR_DIMENSIONS", "256"))  # размерность хешированного TF-IDF
+SIMILAR_MAX_K = 50                # наибольшее k в запросах похожих курсов
+SIMILAR_REBUILD_FRACTION = 0.2    # доля измененных курсов, после которой IDF пересчитывается с нуля
+
+# Пересечения программ (api/overlaps.py): битовый индекс состава программ в памяти процесса
+OVERLAP_MAX_K = 100               # наибольшее k в GET /programs/{id}/overlaps
+OVERLAP_REPORT_MAX_PAIRS = 10000  # наибольший limit отчета GET /programs/overlaps
+
+# Подбор программы (api/program_builder.py): бюджет больше этого числа часов отклоняется с 422
+GENERATE_MAX_HOURS = 10000
+
+# Почти одинаковые курсы (api/duplicates.py): MinHash-сигнатуры и корзины LSH в базе
+DUPLICATE_THRESHOLD = float(os.getenv("EDU_DUPLICATE_THRESHOLD", "0.8"))  # оценка сходства шинглов текста
+DUPLICATE_MAX_PAIRS = 10000       # наибольший limit в GET /courses/duplicates
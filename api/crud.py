@@ -1,7 +1,102 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import logging
+from itertools import groupby
+from typing import Iterator
+from sqlalchemy.orm import Session, selectinload, joinedload, lazyload
+from sqlalchemy import String, and_, tuple_, insert, select, literal, delete, exists
 from . import models
 from . import schemas
+from . import stats
+from . import prerequisites
+from . import program_builder
+from . import similarity
+from . import overlaps
+from . import duplicates
+from .cache import bump_revision
+from .config import DUPLICATE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+# Стратегии загрузки связей "курсы <-> программы"
+LOAD_STRATEGIES = {
+    "select": lazyload,
+    "selectin": selectinload,
+    "joined": joinedload,
+}
+
+# Колонки, доступные для частичного представления (параметр fields списков)
+COURSE_FIELDS = [
+    "id", "title", "description", "total_hours",
+    "lecture_hours", "practice_hours", "difficulty", "has_online"
+]
+
+PROGRAM_FIELDS = ["id", "name", "description", "total_duration_weeks"]
+
+def _columns(model, names: list[str]) -> list:
+    return [getattr(model, name) for name in names]
+
+def _rows(query, columns: list[str]) -> list[dict]:
+    """Строки запроса словарями колонка -> значение, без ORM-объектов"""
+    return [dict(zip(columns, row)) for row in query]
+
+def _selected_columns(fields: list[str], order_by: str, extra: list[str] = ()) -> list[str]:
+    """Колонки запроса частичного списка: id, запрошенные поля, ключ сортировки и extra без повторов"""
+    return list(dict.fromkeys(["id", *fields, order_by, *extra]))
+
+def _load_option(relationship, strategy: str):
+    """Опция загрузки связи по имени стратегии"""
+    try:
+        return LOAD_STRATEGIES[strategy](relationship)
+    except KeyError:
+        raise ValueError(f"Неизвестная стратегия загрузки: {strategy}")
+
+# Ключи сортировки для курсорной пагинации
+COURSE_ORDER_COLUMNS = {
+    "id": models.DBCourse.id,
+    "title": models.DBCourse.title,
+    "total_hours": models.DBCourse.total_hours,
+    "difficulty": models.DBCourse.difficulty,
+    "has_online": models.DBCourse.has_online,
+}
+
+PROGRAM_ORDER_COLUMNS = {
+    "id": models.DBProgram.id,
+    "name": models.DBProgram.name,
+    "total_duration_weeks": models.DBProgram.total_duration_weeks,
+}
+
+def _unindexed(column):
+    """Выражение с тем же порядком, что и колонка, для которого SQLite не использует ее индекс"""
+    return column.concat("") if isinstance(column.type, String) else column + 0
+
+def _paginate(query, id_column, order_column, skip: int, limit: int, after: tuple | None,
+              filtered: frozenset[str] = frozenset()):
+    """Упорядочить запрос по (ключ, id) и взять страницу после позиции after либо по смещению skip.
+    filtered - имена колонок, по которым отфильтрован список. Если ключ сортировки не среди них,
+    сортировка идет по выражению (id + 0, title || '' и т. п.): иначе SQLite предпочитает обход
+    всего индекса ключа (или таблицы в порядке rowid) индексу фильтра."""
+    if after is not None:
+        value, last_id = after
+        if order_column is id_column:
+            query = query.filter(id_column > last_id)
+        else:
+            position = tuple_(literal(value, order_column.type), literal(last_id, id_column.type))
+            query = query.filter(tuple_(order_column, id_column) > position)
+    key = _unindexed(order_column) if filtered and order_column.key not in filtered else order_column
+    query = query.order_by(key) if order_column is id_column else query.order_by(key, id_column)
+    if after is None and skip:
+        query = query.offset(skip)
+    return query.limit(limit)
+
+def commit_changes(db: Session):
+    """Увеличить ревизию каталога (для ETag и индексов в памяти) и зафиксировать изменения одной транзакцией"""
+    revision = bump_revision(db)
+    db.commit()
+    similarity.index.advance(revision)
+    overlaps.index.advance(revision)
+    if db.info.pop("courses_bulk_inserted", False):
+        similarity.index.invalidate()
+    for program_id, added, removed in db.info.pop("membership_changes", []):
+        overlaps.index.apply(program_id, added, removed)
 
 # Методы Course
 
@@ -9,12 +104,67 @@ def get_course(db: Session, course_id: int) -> models.DBCourse | None:
     """Получить курс по ID из базы данных"""
     return db.query(models.DBCourse).filter(models.DBCourse.id == course_id).first()
 
-def get_courses(db: Session, skip: int = 0, limit: int = 100) -> list[models.DBCourse]:
-    """Получить список курсов с пагинацией"""
-    return db.query(models.DBCourse).offset(skip).limit(limit).all()
+def _prefix_range(column, prefix: str):
+    """Условие "начинается с prefix" в виде диапазона, который использует B-tree индекс"""
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(column >= prefix, column < upper)
+
+def courses_query(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    order_by: str = "id",
+    after: tuple | None = None,
+    difficulty: schemas.DifficultyLevel | None = None,
+    has_online: bool | None = None,
+    min_hours: int | None = None,
+    max_hours: int | None = None,
+    title_prefix: str | None = None,
+    columns: list[str] | None = None
+):
+    """Запрос страницы курсов с фильтрами; каждый фильтр обслуживается индексом DBCourse.
+    columns - выбрать только эти колонки (строки вместо ORM-объектов)"""
+    query = db.query(*_columns(models.DBCourse, columns)) if columns else db.query(models.DBCourse)
+    filtered = frozenset(
+        name for name, value in (
+            ("difficulty", difficulty), ("has_online", has_online), ("total_hours", min_hours),
+            ("total_hours", max_hours), ("title", title_prefix or None),
+        ) if value is not None
+    )
+    if difficulty is not None:
+        query = query.filter(models.DBCourse.difficulty == difficulty)
+    if has_online is not None:
+        query = query.filter(models.DBCourse.has_online == has_online)
+    if min_hours is not None:
+        query = query.filter(models.DBCourse.total_hours >= min_hours)
+    if max_hours is not None:
+        query = query.filter(models.DBCourse.total_hours <= max_hours)
+    if title_prefix:
+        query = query.filter(_prefix_range(models.DBCourse.title, title_prefix))
+    return _paginate(query, models.DBCourse.id, COURSE_ORDER_COLUMNS[order_by], skip, limit, after, filtered)
+
+def get_courses(db: Session, **kwargs) -> list[models.DBCourse]:
+    """Получить список курсов с фильтрами и пагинацией
+    (по смещению или после позиции after = (значение ключа, id)); параметры как у courses_query"""
+    return courses_query(db, **kwargs).all()
+
+def get_course_rows(db: Session, fields: list[str], order_by: str = "id", **kwargs) -> list[dict]:
+    """Страница курсов только с колонками fields (и id с ключом сортировки - для курсора);
+    остальные параметры как у courses_query"""
+    columns = _selected_columns(fields, order_by)
+    return _rows(courses_query(db, order_by=order_by, columns=columns, **kwargs), columns)
 
 def create_course(db: Session, course: schemas.CourseCreate) -> models.DBCourse:
-    """Создать новый курс в базе данных"""
+    """Создать новый курс в базе данных.
+    Перед вставкой ищутся почти одинаковые курсы (по корзинам LSH, api/duplicates.py); курс
+    создается в любом случае, найденные возвращаются в possible_duplicates и пишутся в лог"""
+    signature = duplicates.signature(course.title, course.description)
+    possible = duplicates.find_similar(db, signature, DUPLICATE_THRESHOLD)
+    if possible:
+        logger.warning(
+            "Курс %r похож на существующие: %s", course.title,
+            ", ".join(f"{course_id} ({score})" for course_id, score in possible)
+        )
     db_course = models.DBCourse(
         title=course.title,
         description=course.description,
@@ -25,45 +175,316 @@ def create_course(db: Session, course: schemas.CourseCreate) -> models.DBCourse:
         has_online=course.has_online
     )
     db.add(db_course)
-    db.commit()
+    db.flush()
+    duplicates.store_signatures(db, [db_course.id], signature[None, :])
+    commit_changes(db)
     db.refresh(db_course)
+    similarity.index.upsert(db_course)
+    db_course.possible_duplicates = _duplicate_rows(db, possible)
     return db_course
 
+def bulk_insert_courses(db: Session, courses: list[schemas.CourseCreate]) -> int:
+    """Вставить пачку курсов одним executemany без commit (вызывающий фиксирует через commit_changes)"""
+    if not courses:
+        return 0
+    # RETURNING без требования порядка строк: SQLAlchemy вставляет пачками, а сигнатуры
+    # считаются по возвращенному тексту
+    inserted = db.execute(
+        insert(models.DBCourse).returning(models.DBCourse.id, models.DBCourse.title, models.DBCourse.description),
+        [course.dict() for course in courses]
+    ).all()
+    texts = [(title, description) for _, title, description in inserted]
+    duplicates.store_signatures(db, [course_id for course_id, _, _ in inserted], duplicates.signatures(texts))
+    db.info["courses_bulk_inserted"] = True   # индекс похожих курсов перестроится после commit
+    return len(courses)
+
+# Поля курса, от которых зависят агрегаты программ
+STATS_COURSE_FIELDS = ["total_hours", "lecture_hours", "practice_hours", "difficulty", "has_online"]
+
 def update_course(db: Session, course_id: int, course_update: schemas.CourseCreate) -> models.DBCourse | None:
     """Обновить данные курса"""
     db_course = get_course(db, course_id)
     if db_course:
-        for field, value in course_update.dict().items():
+        old = {column: getattr(db_course, column) for column in STATS_COURSE_FIELDS}
+        text_changed = (db_course.title, db_course.description) != (course_update.title, course_update.description)
+        new = course_update.dict()
+        for field, value in new.items():
             setattr(db_course, field, value)
-        db.commit()
+        stats.apply_course_change(db, course_id, old, new)
+        if text_changed:
+            duplicates.replace_signature(db, course_id, course_update.title, course_update.description)
+        commit_changes(db)
         db.refresh(db_course)
+        similarity.index.upsert(db_course)
     return db_course
 
 def delete_course(db: Session, course_id: int) -> bool:
-    """Удалить курс из базы данных и всех программ"""
-    db_course = get_course(db, course_id)
-    if db_course:
-        programs_with_course = db.query(models.DBProgram).filter(
-            models.DBProgram.courses.any(id=course_id)
-        ).all()
-        
-        for program in programs_with_course:
-            program.courses.remove(db_course)
-        
-        db.delete(db_course)
-        db.commit()
-        return True
-    return False
+    """Удалить курс из базы данных и всех программ (два DELETE без загрузки программ)"""
+    columns = [getattr(models.DBCourse, name) for name in STATS_COURSE_FIELDS]
+    old = db.execute(select(*columns).where(models.DBCourse.id == course_id)).first()
+    if old is None:
+        return False
+    stats.apply_course_change(db, course_id, old._asdict(), None)
+    prerequisites.remove_course(db, course_id)
+    duplicates.remove_course(db, course_id)
+    db.execute(delete(models.program_courses).where(models.program_courses.c.course_id == course_id))
+    deleted = db.execute(delete(models.DBCourse).where(models.DBCourse.id == course_id)).rowcount
+    if not deleted:
+        db.rollback()
+        return False
+    commit_changes(db)
+    similarity.index.remove(course_id)
+    overlaps.index.remove_course(course_id)
+    return True
+
+# Почти одинаковые курсы (MinHash и LSH - api/duplicates.py)
+
+def _course_titles(db: Session, course_ids: set[int]) -> dict[int, str]:
+    titles = {}
+    for chunk in _chunks(sorted(course_ids)):
+        query = select(models.DBCourse.id, models.DBCourse.title).where(models.DBCourse.id.in_(chunk))
+        titles.update(db.execute(query).all())
+    return titles
+
+def _duplicate_rows(db: Session, scored: list[tuple[int, float]]) -> list[dict]:
+    """ID, названия и сходство курсов в порядке scored"""
+    titles = _course_titles(db, {course_id for course_id, _ in scored})
+    return [
+        {"id": course_id, "title": titles[course_id], "similarity": score}
+        for course_id, score in scored if course_id in titles
+    ]
+
+def get_duplicate_courses(db: Session, min_similarity: float = DUPLICATE_THRESHOLD, limit: int = 100) -> list[dict]:
+    """Пары почти одинаковых курсов по убыванию сходства (сравниваются только курсы из общих корзин LSH)"""
+    pairs = duplicates.duplicate_pairs(db, min_similarity, limit)
+    titles = _course_titles(db, {course_id for pair in pairs for course_id in pair[:2]})
+    return [
+        {
+            "course_id": course_id,
+            "title": titles[course_id],
+            "duplicate_id": duplicate_id,
+            "duplicate_title": titles[duplicate_id],
+            "similarity": score,
+        }
+        for course_id, duplicate_id, score in pairs
+        if course_id in titles and duplicate_id in titles
+    ]
+
+# Похожие курсы (векторный индекс - api/similarity.py)
+
+def _scored_course_rows(db: Session, scored: list[tuple[int, float]]) -> list[dict]:
+    """Строки курсов в порядке scored с полем similarity"""
+    found = {}
+    for chunk in _chunks([course_id for course_id, _ in scored]):
+        query = select(*_columns(models.DBCourse, COURSE_FIELDS)).where(models.DBCourse.id.in_(chunk))
+        found.update((row["id"], row) for row in _rows(db.execute(query), COURSE_FIELDS))
+    return [
+        {**found[course_id], "similarity": score} for course_id, score in scored if course_id in found
+    ]
+
+def get_similar_courses(db: Session, course_id: int, k: int = 10) -> list[dict] | None:
+    """k курсов, ближайших к курсу по тексту и параметрам. None, если курса нет"""
+    if not _existing_course_ids(db, {course_id}):
+        return None
+    return _scored_course_rows(db, similarity.index.similar(db, [course_id], k))
+
+def get_suggested_courses(db: Session, program_id: int, k: int = 10) -> list[dict] | None:
+    """k курсов вне программы, ближайших к ее курсам. None, если программы нет"""
+    if not program_exists(db, program_id):
+        return None
+    members = sorted(_member_course_ids(db, program_id))
+    return _scored_course_rows(db, similarity.index.similar(db, members, k))
+
+# Пререквизиты курсов (граф и замыкание - api/prerequisites.py)
+
+def add_course_prerequisite(db: Session, course_id: int, prerequisite_id: int) -> bool:
+    """Добавить пререквизит курса. False, если курса или пререквизита нет либо связь уже есть;
+    prerequisites.PrerequisiteCycleError, если связь создает цикл"""
+    found = _existing_course_ids(db, {course_id, prerequisite_id})
+    if found != {course_id, prerequisite_id}:
+        return False
+    if not prerequisites.add_edge(db, course_id, prerequisite_id):
+        return False
+    commit_changes(db)
+    return True
+
+def remove_course_prerequisite(db: Session, course_id: int, prerequisite_id: int) -> bool:
+    """Удалить пререквизит курса. False, если такой связи нет"""
+    if not prerequisites.remove_edge(db, course_id, prerequisite_id):
+        return False
+    commit_changes(db)
+    return True
+
+def get_course_prerequisites(db: Session, course_id: int, transitive: bool = True) -> list[models.DBCourse]:
+    """Пререквизиты курса: все (по замыканию) или только прямые, по возрастанию ID"""
+    if transitive:
+        closure = models.course_prerequisite_closure
+        ids = select(closure.c.ancestor_id).where(closure.c.descendant_id == course_id)
+    else:
+        edges = models.course_prerequisites
+        ids = select(edges.c.prerequisite_id).where(edges.c.course_id == course_id)
+    return db.query(models.DBCourse).filter(models.DBCourse.id.in_(ids)).order_by(models.DBCourse.id).all()
+
+def get_courses_unlocked_by(db: Session, course_id: int, transitive: bool = True) -> list[models.DBCourse]:
+    """Курсы, которые требуют курс: все (по замыканию) или только напрямую, по возрастанию ID"""
+    if transitive:
+        closure = models.course_prerequisite_closure
+        ids = select(closure.c.descendant_id).where(closure.c.ancestor_id == course_id)
+    else:
+        edges = models.course_prerequisites
+        ids = select(edges.c.course_id).where(edges.c.prerequisite_id == course_id)
+    return db.query(models.DBCourse).filter(models.DBCourse.id.in_(ids)).order_by(models.DBCourse.id).all()
+
+def check_program_prerequisites(db: Session, program_id: int) -> dict | None:
+    """Проверить, что программа содержит все пререквизиты своих курсов. None, если программы нет"""
+    if not program_exists(db, program_id):
+        return None
+    missing = prerequisites.unmet_prerequisites(db, program_id)
+    return {
+        "complete": not missing,
+        "missing_course_ids": sorted({course_id for ids in missing.values() for course_id in ids}),
+        "courses": [
+            {"course_id": course_id, "missing_prerequisite_ids": ids}
+            for course_id, ids in missing.items()
+        ],
+    }
 
 # Методы Program
 
-def get_program(db: Session, program_id: int) -> models.DBProgram | None:
+def get_program(db: Session, program_id: int, load: str = "select") -> models.DBProgram | None:
     """Получить программу по ID с курсами"""
-    return db.query(models.DBProgram).filter(models.DBProgram.id == program_id).first()
+    return db.query(models.DBProgram).options(
+        _load_option(models.DBProgram.courses, load)
+    ).filter(models.DBProgram.id == program_id).first()
 
-def get_programs(db: Session, skip: int = 0, limit: int = 100) -> list[models.DBProgram]:
-    """Получить список программ с пагинацией"""
-    return db.query(models.DBProgram).offset(skip).limit(limit).all()
+def get_program_stats(db: Session, program_id: int) -> dict | None:
+    """Получить сохраненные агрегаты программы без загрузки курсов"""
+    db_program = db.get(models.DBProgram, program_id)
+    return stats.program_stats(db_program) if db_program else None
+
+def programs_query(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    load: str = "selectin",
+    order_by: str = "id",
+    after: tuple | None = None,
+    min_weeks: int | None = None,
+    max_weeks: int | None = None,
+    columns: list[str] | None = None
+):
+    """Запрос страницы программ с фильтром по продолжительности.
+    columns - выбрать только эти колонки (строки без курсов вместо ORM-объектов)"""
+    if columns:
+        query = db.query(*_columns(models.DBProgram, columns))
+    else:
+        query = db.query(models.DBProgram).options(
+            _load_option(models.DBProgram.courses, load)
+        )
+    filtered = frozenset(
+        "total_duration_weeks" for value in (min_weeks, max_weeks) if value is not None
+    )
+    if min_weeks is not None:
+        query = query.filter(models.DBProgram.total_duration_weeks >= min_weeks)
+    if max_weeks is not None:
+        query = query.filter(models.DBProgram.total_duration_weeks <= max_weeks)
+    return _paginate(query, models.DBProgram.id, PROGRAM_ORDER_COLUMNS[order_by], skip, limit, after, filtered)
+
+def get_programs(db: Session, **kwargs) -> list[models.DBProgram]:
+    """Получить список программ с фильтрами и пагинацией; параметры как у programs_query"""
+    return programs_query(db, **kwargs).all()
+
+def get_program_rows(
+    db: Session,
+    fields: list[str],
+    expand: str = "courses",
+    include_stats: bool = False,
+    order_by: str = "id",
+    **kwargs
+) -> list[dict]:
+    """Страница программ только с колонками fields (и id с ключом сортировки - для курсора).
+    expand: "courses" - полные курсы, "course_ids" - только ID курсов, "none" - без состава;
+    состав всей страницы читается одним запросом по program_courses.
+    include_stats - добавить колонки агрегатов. Остальные параметры как у programs_query"""
+    columns = _selected_columns(fields, order_by, stats.STAT_COLUMNS if include_stats else [])
+    programs = _rows(programs_query(db, order_by=order_by, columns=columns, **kwargs), columns)
+    if expand != "none" and programs:
+        members = _program_members(db, [program["id"] for program in programs], full=expand == "courses")
+        for program in programs:
+            program[expand] = members.get(program["id"], [])
+    return programs
+
+def _program_members(db: Session, program_ids: list[int], full: bool) -> dict[int, list]:
+    """Состав программ: ID курсов или курсы целиком (full), по возрастанию ID курса"""
+    link = models.program_courses
+    if full:
+        query = select(link.c.program_id, *_columns(models.DBCourse, COURSE_FIELDS)).join(
+            models.DBCourse, models.DBCourse.id == link.c.course_id
+        )
+    else:
+        query = select(link.c.program_id, link.c.course_id)
+    members = {}
+    for chunk in _chunks(sorted(program_ids)):
+        rows = db.execute(
+            query.where(link.c.program_id.in_(chunk)).order_by(link.c.program_id, link.c.course_id)
+        )
+        for row in rows:
+            course = dict(zip(COURSE_FIELDS, row[1:])) if full else row[1]
+            members.setdefault(row[0], []).append(course)
+    return members
+
+# Состав программ: изменения выполняются множественными INSERT/DELETE по program_courses
+
+IN_CHUNK_SIZE = 500
+
+def _chunks(ids: list[int], size: int = IN_CHUNK_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def program_exists(db: Session, program_id: int) -> bool:
+    """Есть ли программа с таким ID (без загрузки строки и курсов)"""
+    return db.query(exists().where(models.DBProgram.id == program_id)).scalar()
+
+def _existing_course_ids(db: Session, course_ids: set[int]) -> set[int]:
+    found = set()
+    for chunk in _chunks(sorted(course_ids)):
+        found.update(db.scalars(select(models.DBCourse.id).where(models.DBCourse.id.in_(chunk))))
+    return found
+
+def _member_course_ids(db: Session, program_id: int, course_ids: set[int] | None = None) -> set[int]:
+    """ID курсов программы (все или только из course_ids)"""
+    link = models.program_courses
+    query = select(link.c.course_id).where(link.c.program_id == program_id)
+    if course_ids is None:
+        return set(db.scalars(query))
+    found = set()
+    for chunk in _chunks(sorted(course_ids)):
+        found.update(db.scalars(query.where(link.c.course_id.in_(chunk))))
+    return found
+
+def _apply_membership(db: Session, program_id: int, add: set[int], remove: set[int]) -> dict:
+    """Добавить и удалить курсы программы без commit, обновив ее агрегаты. Возвращает итог по каждому ID"""
+    link = models.program_courses
+    existing = _existing_course_ids(db, add) if add else set()
+    members = _member_course_ids(db, program_id, add | remove) if add or remove else set()
+    to_add = sorted(existing - members)
+    to_remove = sorted(remove & members)
+    if to_add:
+        db.execute(insert(link), [{"program_id": program_id, "course_id": course_id} for course_id in to_add])
+    for chunk in _chunks(to_remove):
+        db.execute(delete(link).where(link.c.program_id == program_id, link.c.course_id.in_(chunk)))
+    stats.add_courses_to_stats(db, program_id, to_add, 1)
+    stats.add_courses_to_stats(db, program_id, to_remove, -1)
+    if to_add or to_remove:
+        # Битовый индекс состава обновляется в commit_changes, после фиксации
+        db.info.setdefault("membership_changes", []).append((program_id, to_add, to_remove))
+    return {
+        "added": to_add,
+        "removed": to_remove,
+        "missing": sorted(add - existing),
+        "already_present": sorted(existing & members),
+        "not_in_program": sorted(remove - members),
+    }
 
 def create_program(db: Session, program: schemas.ProgramCreate) -> models.DBProgram:
     """Создать новую образовательную программу"""
@@ -73,19 +494,22 @@ def create_program(db: Session, program: schemas.ProgramCreate) -> models.DBProg
         total_duration_weeks=program.total_duration_weeks
     )
     db.add(db_program)
-    db.commit()
-    db.refresh(db_program)
+    db.flush()
     
     if program.course_ids:
-        courses = db.query(models.DBCourse).filter(
-            models.DBCourse.id.in_(program.course_ids)
-        ).all()
-        db_program.courses.extend(courses)
-        db.commit()
-        db.refresh(db_program)
+        _apply_membership(db, db_program.id, set(program.course_ids), set())
     
+    commit_changes(db)
+    db.refresh(db_program)
     return db_program
 
+def generate_program(db: Session, request: schemas.ProgramGenerateRequest, save: bool = False) -> dict:
+    """Подобрать курсы программы под бюджет часов (api/program_builder.py); save - сохранить программу"""
+    result = program_builder.generate(db, request)
+    if save:
+        result["program_id"] = create_program(db, result["program"]).id
+    return result
+
 def update_program(db: Session, program_id: int, program_update: schemas.ProgramCreate) -> models.DBProgram | None:
     """Обновить данные программы"""
     db_program = get_program(db, program_id)
@@ -94,19 +518,16 @@ def update_program(db: Session, program_id: int, program_update: schemas.Program
             setattr(db_program, field, value)
         
         if program_update.course_ids is not None:
-            current_course_ids = {c.id for c in db_program.courses}
+            current_course_ids = _member_course_ids(db, program_id)
             new_course_ids = set(program_update.course_ids)
-            courses_to_add = db.query(models.DBCourse).filter(
-                models.DBCourse.id.in_(new_course_ids - current_course_ids)
-            ).all()
-            
-            courses_to_remove = [c for c in db_program.courses if c.id in (current_course_ids - new_course_ids)]
-            
-            db_program.courses.extend(courses_to_add)
-            for course in courses_to_remove:
-                db_program.courses.remove(course)
+            _apply_membership(
+                db, program_id,
+                add=new_course_ids - current_course_ids,
+                remove=current_course_ids - new_course_ids
+            )
+            db.expire(db_program, ["courses"])
         
-        db.commit()
+        commit_changes(db)
         db.refresh(db_program)
     return db_program
 
@@ -115,54 +536,132 @@ def delete_program(db: Session, program_id: int) -> bool:
     db_program = get_program(db, program_id)
     if db_program:
         db.delete(db_program)
-        db.commit()
+        commit_changes(db)
+        overlaps.index.remove_program(program_id)
         return True
     return False
 
+def update_program_courses(db: Session, program_id: int, add: list[int], remove: list[int]) -> dict | None:
+    """Добавить и удалить несколько курсов программы одной транзакцией.
+    Возвращает итог по ID курсов или None, если программы нет."""
+    if not program_exists(db, program_id):
+        return None
+    result = _apply_membership(db, program_id, set(add), set(remove))
+    if result["added"] or result["removed"]:
+        commit_changes(db)
+    return result
+
 def add_course_to_program(db: Session, program_id: int, course_id: int) -> bool:
     """Добавить курс в программу"""
-    db_program = get_program(db, program_id)
-    db_course = get_course(db, course_id)
-    
-    if not db_program or not db_course:
-        return False
-    
-    if db_course not in db_program.courses:
-        db_program.courses.append(db_course)
-        db.commit()
-        return True
-    return False
+    result = update_program_courses(db, program_id, add=[course_id], remove=[])
+    return result is not None and bool(result["added"])
 
 def remove_course_from_program(db: Session, program_id: int, course_id: int) -> bool:
     """Удалить курс из программы"""
-    db_program = get_program(db, program_id)
-    db_course = get_course(db, course_id)
-    
-    if not db_program or not db_course:
-        return False
-    
-    if db_course in db_program.courses:
-        db_program.courses.remove(db_course)
-        db.commit()
-        return True
-    return False
+    result = update_program_courses(db, program_id, add=[], remove=[course_id])
+    return result is not None and bool(result["removed"])
+
+# Пересечения программ (битовый индекс состава - api/overlaps.py)
+
+def _program_names(db: Session, program_ids: set[int]) -> dict[int, str]:
+    names = {}
+    for chunk in _chunks(sorted(program_ids)):
+        query = select(models.DBProgram.id, models.DBProgram.name).where(models.DBProgram.id.in_(chunk))
+        names.update(db.execute(query).all())
+    return names
+
+def get_program_overlaps(db: Session, program_id: int, k: int = 10, by: str = "jaccard") -> list[dict] | None:
+    """k программ с наибольшим пересечением состава с программой. None, если программы нет"""
+    if not program_exists(db, program_id):
+        return None
+    found = overlaps.index.overlaps(db, program_id, k, by)
+    names = _program_names(db, {item["program_id"] for item in found})
+    return [{**item, "name": names[item["program_id"]]} for item in found if item["program_id"] in names]
+
+def get_overlap_report(
+    db: Session, min_jaccard: float = 0.0, min_containment: float = 0.0, limit: int = 100, by: str = "jaccard"
+) -> list[dict]:
+    """Пары программ с общими курсами не ниже порогов, лучшие limit по метрике by"""
+    found = overlaps.index.pairs(db, min_jaccard, min_containment, limit, by)
+    names = _program_names(db, {item[key] for item in found for key in ("program_id", "other_program_id")})
+    return [
+        {**item, "program_name": names[item["program_id"]], "other_program_name": names[item["other_program_id"]]}
+        for item in found
+        if item["program_id"] in names and item["other_program_id"] in names
+    ]
 
 # Другие методы
-def get_programs_with_course(db: Session, course_id: int) -> list[models.DBProgram]:
+def get_programs_with_course(db: Session, course_id: int, load: str = "selectin") -> list[models.DBProgram]:
     """Получить все программы, содержащие указанный курс"""
-    return db.query(models.DBProgram).filter(
+    return db.query(models.DBProgram).options(
+        _load_option(models.DBProgram.courses, load)
+    ).filter(
         models.DBProgram.courses.any(id=course_id)
     ).all()
 
-def get_courses_not_in_program(db: Session, program_id: int) -> list[models.DBCourse]:
-    """Получить курсы, не входящие в указанную программу"""
-    program = get_program(db, program_id)
-    if not program:
-        return []
-    
-    current_course_ids = [c.id for c in program.courses]
-    if current_course_ids:
-        return db.query(models.DBCourse).filter(
-            models.DBCourse.id.notin_(current_course_ids)
-        ).all()
-    return db.query(models.DBCourse).all()
\ No newline at end of file
+def get_courses_not_in_program(
+    db: Session,
+    program_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple | None = None
+) -> list[models.DBCourse]:
+    """Получить курсы, не входящие в указанную программу (анти-join NOT EXISTS по program_courses).
+    Существование программы не проверяется."""
+    return _not_in_program_query(db, program_id, skip, limit, after).all()
+
+def get_course_rows_not_in_program(db: Session, program_id: int, **kwargs) -> list[dict]:
+    """Курсы, не входящие в программу, словарями колонок COURSE_FIELDS; параметры как у get_courses_not_in_program"""
+    return _rows(_not_in_program_query(db, program_id, columns=COURSE_FIELDS, **kwargs), COURSE_FIELDS)
+
+def _not_in_program_query(
+    db: Session,
+    program_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: tuple | None = None,
+    columns: list[str] | None = None
+):
+    link = models.program_courses
+    in_program = exists().where(
+        link.c.program_id == program_id,
+        link.c.course_id == models.DBCourse.id
+    )
+    query = db.query(*_columns(models.DBCourse, columns)) if columns else db.query(models.DBCourse)
+    return _paginate(query.filter(~in_program), models.DBCourse.id, models.DBCourse.id, skip, limit, after)
+
+# Потоковый экспорт
+
+COURSE_EXPORT_COLUMNS = COURSE_FIELDS
+
+PROGRAM_EXPORT_COLUMNS = ["id", "name", "description", "total_duration_weeks", "course_ids"]
+
+def iter_courses_for_export(db: Session, batch_size: int = 1000) -> Iterator[dict]:
+    """Читать все курсы курсором порциями по batch_size строк, не загружая ORM-объекты"""
+    columns = [getattr(models.DBCourse, name) for name in COURSE_EXPORT_COLUMNS]
+    result = db.execute(
+        select(*columns).order_by(models.DBCourse.id).execution_options(yield_per=batch_size)
+    )
+    for row in result:
+        yield row._asdict()
+
+def iter_programs_for_export(db: Session, batch_size: int = 1000) -> Iterator[dict]:
+    """Читать все программы со списками ID курсов одним упорядоченным LEFT JOIN"""
+    program = models.DBProgram
+    link = models.program_courses
+    result = db.execute(
+        select(program.id, program.name, program.description, program.total_duration_weeks, link.c.course_id)
+        .outerjoin(link, link.c.program_id == program.id)
+        .order_by(program.id, link.c.course_id)
+        .execution_options(yield_per=batch_size)
+    )
+    for _, rows in groupby(result, key=lambda row: row.id):
+        rows = list(rows)
+        first = rows[0]
+        yield {
+            "id": first.id,
+            "name": first.name,
+            "description": first.description,
+            "total_duration_weeks": first.total_duration_weeks,
+            "course_ids": [row.course_id for row in rows if row.course_id is not None],
+        }
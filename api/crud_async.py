@@ -0,0 +1,108 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud
+from . import models
+from . import schemas
+
+# Асинхронные варианты методов crud.
+# Запросы выполняются через AsyncSession.run_sync: логика остается в crud,
+# а ввод-вывод идет через асинхронный драйвер и не занимает пул потоков.
+# Связи, нужные для сериализации, загружаются внутри run_sync -
+# вне его ленивая загрузка в асинхронном режиме невозможна.
+
+def _with_courses(program: models.DBProgram | None) -> models.DBProgram | None:
+    if program is not None:
+        program.courses
+    return program
+
+def _all_with_courses(programs: list[models.DBProgram]) -> list[models.DBProgram]:
+    for program in programs:
+        program.courses
+    return programs
+
+# Методы Course
+
+async def get_course(db: AsyncSession, course_id: int) -> models.DBCourse | None:
+    """Получить курс по ID из базы данных"""
+    return await db.run_sync(crud.get_course, course_id)
+
+async def get_courses(db: AsyncSession, **kwargs) -> list[models.DBCourse]:
+    """Получить список курсов с пагинацией (параметры как у crud.get_courses)"""
+    return await db.run_sync(crud.get_courses, **kwargs)
+
+async def get_course_rows(db: AsyncSession, fields: list[str], **kwargs) -> list[dict]:
+    """Страница курсов только с колонками fields (параметры как у crud.get_course_rows)"""
+    return await db.run_sync(crud.get_course_rows, fields, **kwargs)
+
+async def create_course(db: AsyncSession, course: schemas.CourseCreate) -> models.DBCourse:
+    """Создать новый курс в базе данных"""
+    return await db.run_sync(crud.create_course, course)
+
+async def update_course(db: AsyncSession, course_id: int, course_update: schemas.CourseCreate) -> models.DBCourse | None:
+    """Обновить данные курса"""
+    return await db.run_sync(crud.update_course, course_id, course_update)
+
+async def delete_course(db: AsyncSession, course_id: int) -> bool:
+    """Удалить курс из базы данных и всех программ"""
+    return await db.run_sync(crud.delete_course, course_id)
+
+# Методы Program
+
+async def get_program(db: AsyncSession, program_id: int, load: str = "selectin") -> models.DBProgram | None:
+    """Получить программу по ID с курсами"""
+    return await db.run_sync(lambda session: _with_courses(crud.get_program(session, program_id, load)))
+
+async def program_exists(db: AsyncSession, program_id: int) -> bool:
+    """Есть ли программа с таким ID (без загрузки строки и курсов)"""
+    return await db.run_sync(crud.program_exists, program_id)
+
+async def get_program_stats(db: AsyncSession, program_id: int) -> dict | None:
+    """Получить сохраненные агрегаты программы"""
+    return await db.run_sync(crud.get_program_stats, program_id)
+
+async def get_programs(db: AsyncSession, **kwargs) -> list[models.DBProgram]:
+    """Получить список программ с пагинацией (параметры как у crud.get_programs)"""
+    return await db.run_sync(lambda session: _all_with_courses(crud.get_programs(session, **kwargs)))
+
+async def get_program_rows(db: AsyncSession, fields: list[str], **kwargs) -> list[dict]:
+    """Страница программ только с колонками fields (параметры как у crud.get_program_rows)"""
+    return await db.run_sync(crud.get_program_rows, fields, **kwargs)
+
+async def create_program(db: AsyncSession, program: schemas.ProgramCreate) -> models.DBProgram:
+    """Создать новую образовательную программу"""
+    return await db.run_sync(lambda session: _with_courses(crud.create_program(session, program)))
+
+async def update_program(db: AsyncSession, program_id: int, program_update: schemas.ProgramCreate) -> models.DBProgram | None:
+    """Обновить данные программы"""
+    return await db.run_sync(lambda session: _with_courses(crud.update_program(session, program_id, program_update)))
+
+async def delete_program(db: AsyncSession, program_id: int) -> bool:
+    """Удалить программу"""
+    return await db.run_sync(crud.delete_program, program_id)
+
+async def update_program_courses(db: AsyncSession, program_id: int, add: list[int], remove: list[int]) -> dict | None:
+    """Добавить и удалить несколько курсов программы одной транзакцией"""
+    return await db.run_sync(crud.update_program_courses, program_id, add, remove)
+
+async def add_course_to_program(db: AsyncSession, program_id: int, course_id: int) -> bool:
+    """Добавить курс в программу"""
+    return await db.run_sync(crud.add_course_to_program, program_id, course_id)
+
+async def remove_course_from_program(db: AsyncSession, program_id: int, course_id: int) -> bool:
+    """Удалить курс из программы"""
+    return await db.run_sync(crud.remove_course_from_program, program_id, course_id)
+
+# Другие методы
+
+async def get_programs_with_course(db: AsyncSession, course_id: int, load: str = "selectin") -> list[models.DBProgram]:
+    """Получить все программы, содержащие указанный курс"""
+    return await db.run_sync(
+        lambda session: _all_with_courses(crud.get_programs_with_course(session, course_id, load))
+    )
+
+async def get_courses_not_in_program(db: AsyncSession, program_id: int, **kwargs) -> list[models.DBCourse]:
+    """Получить курсы, не входящие в указанную программу (параметры как у crud.get_courses_not_in_program)"""
+    return await db.run_sync(crud.get_courses_not_in_program, program_id, **kwargs)
+
+async def get_course_rows_not_in_program(db: AsyncSession, program_id: int, **kwargs) -> list[dict]:
+    """Курсы, не входящие в программу, словарями колонок (параметры как у crud.get_course_rows_not_in_program)"""
+    return await db.run_sync(crud.get_course_rows_not_in_program, program_id, **kwargs)
@@ -1,14 +1,78 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from .config import load_db_settings
 
-# SQLite подключение
-SQLALCHEMY_DATABASE_URL = "sqlite:///./education.db"
+# Параметры подключения (см. DB_PROFILES в config.py)
+DB_SETTINGS = load_db_settings()
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False},echo=True  
-)
+SQLALCHEMY_DATABASE_URL = DB_SETTINGS["url"]
+SQLALCHEMY_ASYNC_DATABASE_URL = SQLALCHEMY_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+SQLITE_PRAGMAS = ("journal_mode", "synchronous", "cache_size", "mmap_size", "busy_timeout", "foreign_keys")
+
+def apply_sqlite_pragmas(dbapi_connection, settings: dict):
+    """Выставить PRAGMA профиля на новом соединении SQLite"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for name in SQLITE_PRAGMAS:
+            value = settings[name]
+            if isinstance(value, bool):
+                value = "ON" if value else "OFF"
+            cursor.execute(f"PRAGMA {name} = {value}")
+    finally:
+        cursor.close()
+
+def engine_options(settings: dict) -> dict:
+    """Аргументы create_engine/create_async_engine для профиля"""
+    url = settings["url"]
+    options = {"echo": settings["echo"]}
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False}
+    if ":memory:" not in url:
+        options["pool_size"] = settings["pool_size"]
+        options["max_overflow"] = settings["max_overflow"]
+    return options
+
+def configure_engine(target, settings: dict):
+    """Подключить установку PRAGMA к движку (для AsyncEngine передается его sync_engine)"""
+    if settings["url"].startswith("sqlite"):
+        @event.listens_for(target, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            apply_sqlite_pragmas(dbapi_connection, settings)
+
+def create_db_engine(settings: dict):
+    """Создать синхронный движок с параметрами профиля"""
+    db_engine = create_engine(settings["url"], **engine_options(settings))
+    configure_engine(db_engine, settings)
+    return db_engine
+
+engine = create_db_engine(DB_SETTINGS)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+# Асинхронное подключение создается при первом обращении,
+# чтобы aiosqlite требовался только в режиме ASYNC_DB
+_async_engine = None
+_async_session_factory = None
+
+def get_async_engine():
+    """Асинхронный движок (SQLAlchemy AsyncEngine + aiosqlite)"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        _async_engine = create_async_engine(SQLALCHEMY_ASYNC_DATABASE_URL, **engine_options(DB_SETTINGS))
+        configure_engine(_async_engine.sync_engine, DB_SETTINGS)
+    return _async_engine
+
+def get_async_session_factory():
+    """Фабрика AsyncSession; объекты не истекают после commit, чтобы их можно было сериализовать"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(), autocommit=False, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
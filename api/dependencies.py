@@ -0,0 +1,104 @@
+from fastapi import Depends, HTTPException, Query, Request, Response
+from typing import Optional
+from sqlalchemy.orm import Session
+from . import crud, schemas
+from .cache import catalog_etag, etag_matches
+from .config import ETAG_ENABLED
+from .database import SessionLocal, get_async_session_factory
+from .pagination import encode_cursor, decode_cursor
+
+# Dependency для получения сессии базы данных
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency для асинхронной сессии (режим ASYNC_DB)
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
+
+# Условные GET: ответ 304 по ETag ревизии каталога - одно чтение строки catalog_revision
+def check_etag(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Ответить 304 Not Modified, если у клиента актуальная ревизия каталога; иначе выставить ETag"""
+    if not ETAG_ENABLED:
+        return
+    etag = catalog_etag(db)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("If-None-Match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+# Фильтры списков (передаются в crud.get_courses / crud.get_programs)
+def course_filters(
+    difficulty: Optional[schemas.DifficultyLevel] = None,
+    has_online: Optional[bool] = None,
+    min_hours: Optional[int] = Query(None, ge=0),
+    max_hours: Optional[int] = Query(None, ge=0),
+    title_prefix: Optional[str] = Query(None, min_length=1)
+) -> dict:
+    """Фильтры списка курсов из параметров запроса"""
+    filters = dict(
+        difficulty=difficulty, has_online=has_online,
+        min_hours=min_hours, max_hours=max_hours, title_prefix=title_prefix
+    )
+    return {name: value for name, value in filters.items() if value is not None}
+
+def program_filters(
+    min_weeks: Optional[int] = Query(None, ge=0),
+    max_weeks: Optional[int] = Query(None, ge=0)
+) -> dict:
+    """Фильтры списка программ из параметров запроса"""
+    filters = dict(min_weeks=min_weeks, max_weeks=max_weeks)
+    return {name: value for name, value in filters.items() if value is not None}
+
+# Частичные представления списков: параметр fields - поля через запятую
+def _parse_fields(fields: Optional[str], allowed: list[str]) -> list[str] | None:
+    """Проверить список полей; id включается всегда. None - поля не указаны (полное представление)"""
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Неизвестные поля: {', '.join(unknown)}. Доступны: {', '.join(allowed)}"
+        )
+    return list(dict.fromkeys(["id", *names]))
+
+def course_fields(
+    fields: Optional[str] = Query(None, description="Поля курса через запятую (id возвращается всегда)")
+) -> list[str] | None:
+    """Поля частичного представления курсов"""
+    return _parse_fields(fields, crud.COURSE_FIELDS)
+
+def program_fields(
+    fields: Optional[str] = Query(None, description="Поля программы через запятую (id возвращается всегда)")
+) -> list[str] | None:
+    """Поля частичного представления программ"""
+    return _parse_fields(fields, crud.PROGRAM_FIELDS)
+
+# Курсорная пагинация списков
+def resolve_cursor(cursor: Optional[str], order_by: str) -> tuple | None:
+    """Проверить курсор и вернуть позицию (значение ключа, id) для crud"""
+    if cursor is None:
+        return None
+    try:
+        cursor_order, value, last_id = decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cursor_order != order_by:
+        raise HTTPException(status_code=400, detail="Курсор не соответствует параметру order_by")
+    return value, last_id
+
+def set_next_cursor(response: Response, items: list, limit: int, order_by: str):
+    """Если страница заполнена, отдать курсор следующей страницы в заголовке X-Next-Cursor"""
+    if limit > 0 and len(items) == limit:
+        last = items[-1]
+        if isinstance(last, dict):
+            value, last_id = last[order_by], last["id"]
+        else:
+            value, last_id = getattr(last, order_by), last.id
+        response.headers["X-Next-Cursor"] = encode_cursor(order_by, value, last_id)
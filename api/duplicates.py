@@ -0,0 +1,221 @@
+"""Почти одинаковые курсы: MinHash-сигнатуры текста и корзины LSH.
+
+Название и описание курса приводятся к нижнему регистру без знаков препинания
+и разбиваются на шинглы - подстроки по SHINGLE_SIZE символов. Сигнатура MinHash -
+минимумы PERMUTATIONS хеш-функций по шинглам; доля совпадающих позиций двух сигнатур
+оценивает коэффициент Жаккара их множеств шинглов.
+
+Сигнатура делится на BANDS полос по ROWS позиций; хеш полосы с ее номером - ключ корзины
+в таблице course_lsh_buckets. Курсы со сходством s попадают хотя бы в одну общую корзину
+с вероятностью 1 - (1 - s^ROWS)^BANDS: 0,998 при s = 0,8 и 0,27 при s = 0,5. Поэтому
+кандидаты в дубликаты ищутся выборкой по индексу корзин, а не сравнением со всеми курсами,
+и только их сигнатуры сравниваются с порогом.
+
+Сигнатуры и корзины хранятся в базе и изменяются в транзакции изменения курса (crud).
+Пересчитать их для всей базы:
+
+    python -m api.duplicates rebuild
+"""
+import hashlib
+import re
+import sys
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from . import models
+
+SHINGLE_SIZE = 5
+BANDS = 20
+ROWS = 6
+PERMUTATIONS = BANDS * ROWS
+REBUILD_BATCH = 1000
+
+def _constants(name: str, count: int) -> np.ndarray:
+    """Постоянные 64-битные коэффициенты хеш-функций: не зависят от версии NumPy, поэтому
+    сохраненные сигнатуры остаются сравнимыми"""
+    return np.array([
+        int.from_bytes(hashlib.blake2b(f"{name}{i}".encode(), digest_size=8).digest(), "little") | 1
+        for i in range(count)
+    ], dtype=np.uint64)
+
+# Хеш-функции сигнатуры - multiply-shift: старшие 32 бита (a * x + b) mod 2^64
+_A = _constants("a", PERMUTATIONS)
+_B = _constants("b", PERMUTATIONS)
+_SHINGLE_POWERS = _constants("shingle", SHINGLE_SIZE)
+_BAND_POWERS = _constants("band", ROWS)
+_BAND_SALTS = _constants("salt", BANDS)
+_SHIFT = np.uint64(32)
+_EMPTY = 0xFFFFFFFF
+
+_word = re.compile(r"\w+")
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """Перемешивание бит uint64 (финализатор MurmurHash3)"""
+    values = values ^ (values >> np.uint64(33))
+    values = values * np.uint64(0xFF51AFD7ED558CCD)
+    return values ^ (values >> np.uint64(33))
+
+def normalize(title: str | None, description: str | None) -> str:
+    """Текст курса в нижнем регистре, слова через один пробел"""
+    return " ".join(_word.findall(f"{title or ''} {description or ''}".lower()))
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """32-битные хеши различных шинглов текста (короткий текст - один шингл)"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if not len(codes):
+        return np.zeros(0, dtype=np.uint64)
+    windows = sliding_window_view(codes, min(SHINGLE_SIZE, len(codes)))
+    hashes = windows @ _SHINGLE_POWERS[:windows.shape[1]]
+    return np.unique(_mix(hashes) >> _SHIFT)
+
+def signature(title: str | None, description: str | None) -> np.ndarray:
+    """MinHash-сигнатура курса: PERMUTATIONS значений uint32"""
+    return signatures([(title, description)])[0]
+
+def signatures(texts: list[tuple[str | None, str | None]]) -> np.ndarray:
+    """Сигнатуры нескольких курсов, матрица len(texts) x PERMUTATIONS.
+    Хеши шинглов всех курсов обрабатываются одним массивом: для каждой хеш-функции
+    минимумы по курсам считает np.minimum.reduceat"""
+    hashes = [shingle_hashes(normalize(title, description)) for title, description in texts]
+    lengths = np.array([len(item) for item in hashes], dtype=np.int64)
+    result = np.full((len(texts), PERMUTATIONS), _EMPTY, dtype=np.uint32)
+    filled = lengths > 0
+    if not filled.any():
+        return result
+    values = np.concatenate(hashes)
+    starts = (np.cumsum(lengths) - lengths)[filled]
+    for i in range(PERMUTATIONS):
+        result[filled, i] = np.minimum.reduceat((_A[i] * values + _B[i]) >> _SHIFT, starts)
+    return result
+
+def band_keys(signatures: np.ndarray) -> np.ndarray:
+    """Ключи корзин LSH: матрица курсы x BANDS значений int64"""
+    bands = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+    return _mix(bands @ _BAND_POWERS + _BAND_SALTS).view(np.int64)
+
+def similarity(signature: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Оценка коэффициента Жаккара: доля совпадающих позиций сигнатур"""
+    return (others == signature).mean(axis=-1)
+
+# Хранение (без commit: вызывающий фиксирует транзакцию)
+
+def store_signatures(db: Session | Connection, course_ids: list[int], course_signatures: np.ndarray):
+    """Записать сигнатуры курсов и их ключи корзин"""
+    if not len(course_ids):
+        return
+    keys = band_keys(course_signatures).tolist()
+    db.execute(insert(models.course_minhash), [
+        {"course_id": course_id, "signature": row.tobytes()}
+        for course_id, row in zip(course_ids, course_signatures)
+    ])
+    # Корзин в BANDS раз больше, чем курсов: executemany драйвера без обработки параметров SQLAlchemy.
+    # OR IGNORE - на случай совпадения ключей двух полос одного курса
+    connection = db.connection() if isinstance(db, Session) else db
+    connection.exec_driver_sql(
+        "INSERT OR IGNORE INTO course_lsh_buckets (bucket, course_id) VALUES (?, ?)",
+        sorted((key, course_id) for course_id, row in zip(course_ids, keys) for key in row)
+    )
+
+def remove_course(db: Session | Connection, course_id: int):
+    """Удалить сигнатуру и корзины курса"""
+    db.execute(delete(models.course_lsh_buckets).where(models.course_lsh_buckets.c.course_id == course_id))
+    db.execute(delete(models.course_minhash).where(models.course_minhash.c.course_id == course_id))
+
+def replace_signature(db: Session | Connection, course_id: int, title: str | None, description: str | None):
+    """Пересчитать сигнатуру курса после изменения текста"""
+    remove_course(db, course_id)
+    store_signatures(db, [course_id], signature(title, description)[None, :])
+
+def _load_signatures(db: Session | Connection, course_ids: list[int]) -> tuple[list[int], np.ndarray]:
+    """ID курсов с сохраненной сигнатурой и их сигнатуры"""
+    table = models.course_minhash
+    found, rows = [], []
+    for start in range(0, len(course_ids), 500):
+        chunk = course_ids[start:start + 500]
+        for course_id, data in db.execute(select(table.c.course_id, table.c.signature).where(table.c.course_id.in_(chunk))):
+            found.append(course_id)
+            rows.append(np.frombuffer(data, dtype=np.uint32))
+    return found, np.array(rows, dtype=np.uint32).reshape(len(rows), PERMUTATIONS)
+
+# Поиск
+
+def find_similar(db: Session | Connection, course_signature: np.ndarray, threshold: float,
+                 exclude: int | None = None) -> list[tuple[int, float]]:
+    """Курсы, сигнатура которых совпадает с данной не меньше чем на threshold:
+    [(ID, сходство)] по убыванию сходства. Сравниваются только курсы из общих корзин"""
+    link = models.course_lsh_buckets
+    keys = band_keys(course_signature[None, :])[0].tolist()
+    candidates = set(db.execute(select(link.c.course_id).where(link.c.bucket.in_(keys)).distinct()).scalars())
+    candidates.discard(exclude)
+    course_ids, others = _load_signatures(db, sorted(candidates))
+    scores = similarity(course_signature, others)
+    found = [(course_id, round(float(score), 4)) for course_id, score in zip(course_ids, scores) if score >= threshold]
+    return sorted(found, key=lambda item: (-item[1], item[0]))
+
+def duplicate_pairs(db: Session | Connection, threshold: float, limit: int) -> list[tuple[int, int, float]]:
+    """Пары курсов со сходством не ниже threshold: [(ID, ID дубликата, сходство)], ID < ID дубликата.
+    Пары берутся только из корзин, где больше одного курса"""
+    link = models.course_lsh_buckets
+    shared = select(link.c.bucket).group_by(link.c.bucket).having(func.count() > 1)
+    rows = db.execute(
+        select(link.c.bucket, link.c.course_id).where(link.c.bucket.in_(shared)).order_by(link.c.bucket, link.c.course_id)
+    ).all()
+    pairs = set()
+    start = 0
+    for end in range(1, len(rows) + 1):
+        if end == len(rows) or rows[end][0] != rows[start][0]:
+            members = [course_id for _, course_id in rows[start:end]]
+            pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+            start = end
+    if not pairs:
+        return []
+    course_ids, matrix = _load_signatures(db, sorted({course_id for pair in pairs for course_id in pair}))
+    position = {course_id: row for row, course_id in enumerate(course_ids)}
+    pairs = sorted(pair for pair in pairs if pair[0] in position and pair[1] in position)
+    if not pairs:
+        return []
+    first = np.array([position[a] for a, _ in pairs])
+    second = np.array([position[b] for _, b in pairs])
+    scores = (matrix[first] == matrix[second]).mean(axis=1)
+    found = [(a, b, round(float(score), 4)) for (a, b), score in zip(pairs, scores) if score >= threshold]
+    found.sort(key=lambda item: (-item[2], item[0], item[1]))
+    return found[:limit]
+
+# Пересчет
+
+def rebuild_signatures(db: Session | Connection):
+    """Пересчитать сигнатуры и корзины всех курсов"""
+    course = models.DBCourse
+    db.execute(delete(models.course_lsh_buckets))
+    db.execute(delete(models.course_minhash))
+    last = 0
+    while True:
+        rows = db.execute(
+            select(course.id, course.title, course.description)
+            .where(course.id > last).order_by(course.id).limit(REBUILD_BATCH)
+        ).all()
+        if not rows:
+            break
+        store_signatures(db, [row.id for row in rows], signatures([(row.title, row.description) for row in rows]))
+        last = rows[-1].id
+
+def create_duplicate_tables(conn: Connection):
+    """Создать таблицы сигнатур и корзин в транзакции conn; если они пусты, заполнить по существующим курсам"""
+    models.Base.metadata.create_all(conn, tables=[models.course_minhash, models.course_lsh_buckets])
+    if conn.execute(select(models.course_minhash.c.course_id).limit(1)).first() is None:
+        rebuild_signatures(conn)
+
+if __name__ == "__main__":
+    from .cache import bump_revision
+    from .database import engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("Использование: python -m api.duplicates rebuild")
+    engine.echo = False
+    with engine.begin() as conn:
+        rebuild_signatures(conn)
+        bump_revision(conn)
+        count = conn.execute(select(func.count()).select_from(models.course_minhash)).scalar()
+    print(f"Сигнатуры пересчитаны: {count} курсов")
@@ -0,0 +1,176 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from .database import engine
+
+# Счетчик SQL-запросов
+
+class QueryCounter:
+    """Количество и суммарное время SQL-запросов, выполненных в текущем контексте"""
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+_current_counter: ContextVar[QueryCounter | None] = ContextVar("query_counter", default=None)
+
+# ASGI scope текущего HTTP-запроса (маршрут для журнала медленных запросов)
+current_scope: ContextVar[dict | None] = ContextVar("current_scope", default=None)
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.count += 1
+        context._query_started = time.perf_counter()
+
+def _time_query(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    started = getattr(context, "_query_started", None)
+    if counter is not None and started is not None:
+        counter.seconds += time.perf_counter() - started
+
+def instrument_engine(target):
+    """Подключить счетчик запросов к движку (для AsyncEngine передается его sync_engine)"""
+    if not event.contains(target, "before_cursor_execute", _count_query):
+        event.listen(target, "before_cursor_execute", _count_query)
+        event.listen(target, "after_cursor_execute", _time_query)
+
+instrument_engine(engine)
+
+@contextmanager
+def count_queries():
+    """Считать SQL-запросы внутри блока with"""
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
+
+# Метрики в формате Prometheus
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин"""
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+class MetricsRegistry:
+    """Метрики HTTP-запросов по маршрутам. Обновляется только из цикла событий, блокировки не нужны"""
+    def __init__(self):
+        self.requests: dict[tuple, int] = {}
+        self.latency: dict[tuple, Histogram] = {}
+        self.response_size: dict[tuple, Histogram] = {}
+        self.queries: dict[tuple, Histogram] = {}
+        self.query_seconds: dict[tuple, float] = {}
+        self.in_flight = 0
+
+    def record(self, method: str, route: str, status: int, seconds: float, size: int, counter: QueryCounter):
+        key = (method, route)
+        status_key = (method, route, str(status))
+        self.requests[status_key] = self.requests.get(status_key, 0) + 1
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.response_size[key] = Histogram(SIZE_BUCKETS)
+            self.queries[key] = Histogram(QUERY_BUCKETS)
+            self.query_seconds[key] = 0.0
+        self.latency[key].observe(seconds)
+        self.response_size[key].observe(size)
+        self.queries[key].observe(counter.count)
+        self.query_seconds[key] += counter.seconds
+
+    def render(self) -> str:
+        """Текстовый формат экспозиции Prometheus"""
+        lines = []
+
+        def labels(key: tuple, names=("method", "route", "status")) -> str:
+            return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, key))
+
+        def histogram(name: str, help_text: str, values: dict):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} histogram"])
+            for key, hist in sorted(values.items()):
+                cumulative = 0
+                for bound, count in zip((*hist.buckets, "+Inf"), hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels(key)},le="{bound}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels(key)}}} {hist.total}")
+                lines.append(f"{name}_count{{{labels(key)}}} {cumulative}")
+
+        lines.extend(["# HELP http_requests_total Число HTTP-запросов", "# TYPE http_requests_total counter"])
+        for key, count in sorted(self.requests.items()):
+            lines.append(f"http_requests_total{{{labels(key)}}} {count}")
+        histogram("http_request_duration_seconds", "Время обработки запроса", self.latency)
+        histogram("http_response_size_bytes", "Размер тела ответа", self.response_size)
+        histogram("db_queries_per_request", "Число SQL-запросов на HTTP-запрос", self.queries)
+        lines.extend([
+            "# HELP db_query_duration_seconds_total Суммарное время SQL-запросов",
+            "# TYPE db_query_duration_seconds_total counter",
+        ])
+        for key, seconds in sorted(self.query_seconds.items()):
+            lines.append(f"db_query_duration_seconds_total{{{labels(key)}}} {seconds}")
+        lines.extend([
+            "# HELP http_requests_in_flight Запросы в обработке",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ])
+        return "\n".join(lines) + "\n"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+REGISTRY = MetricsRegistry()
+
+class MetricsMiddleware:
+    """Измеряет каждый HTTP-запрос: время, число и время SQL-запросов, размер ответа.
+    Возвращает X-Query-Count и Server-Timing, накапливает метрики в реестре для /metrics"""
+    def __init__(self, app, registry: MetricsRegistry = REGISTRY):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        registry = self.registry
+        started = time.perf_counter()
+        status = 500
+        size = 0
+        registry.in_flight += 1
+        scope_token = current_scope.set(scope)
+        with count_queries() as counter:
+            async def send_with_metrics(message):
+                nonlocal status, size
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    headers = MutableHeaders(scope=message)
+                    headers["X-Query-Count"] = str(counter.count)
+                    headers["Server-Timing"] = (
+                        f'db;dur={counter.seconds * 1000:.2f};desc="{counter.count} queries", '
+                        f"app;dur={(time.perf_counter() - started) * 1000:.2f}"
+                    )
+                elif message["type"] == "http.response.body":
+                    size += len(message.get("body", b""))
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_metrics)
+            finally:
+                current_scope.reset(scope_token)
+                registry.in_flight -= 1
+                route = scope.get("route")
+                registry.record(
+                    scope["method"], getattr(route, "path", "<unmatched>"), status,
+                    time.perf_counter() - started, size, counter
+                )
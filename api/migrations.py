@@ -0,0 +1,132 @@
+"""Версионированные миграции схемы БД.
+
+Версия схемы хранится в PRAGMA user_version. При старте сервера (lifespan в api/server.py)
+читается только она; если версия актуальна, больше ничего не выполняется.
+Недостающие миграции применяются по порядку, каждая - в транзакции BEGIN IMMEDIATE,
+которая повышает версию. Воркеры uvicorn, стартующие одновременно, ждут эту блокировку
+и, получив ее, видят новую версию - миграция выполняется один раз.
+Индексы миграции строятся до ее транзакции, каждый в своей короткой транзакции
+(CREATE INDEX IF NOT EXISTS), чтобы запись в базу не блокировалась на время всех индексов.
+Шаги идемпотентны, поэтому базы, созданные до появления миграций (версия 0), тоже обновляются.
+
+    python -m api.migrations status
+    python -m api.migrations upgrade
+"""
+import sys
+from contextlib import contextmanager
+from typing import Callable, NamedTuple
+from sqlalchemy import Index
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateIndex
+from . import cache, duplicates, models, search, stats
+
+MIGRATION_BUSY_TIMEOUT = 600000   # мс ожидания блокировки, пока миграцию выполняет другой процесс
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection], None] | None = None
+    indexes: tuple[Index, ...] = ()
+
+CATALOG_TABLES = [models.DBCourse.__table__, models.DBProgram.__table__, models.program_courses]
+
+def _table_indexes(*tables) -> tuple[Index, ...]:
+    return tuple(sorted((index for table in tables for index in table.indexes), key=lambda index: index.name))
+
+def _create_catalog_tables(conn: Connection):
+    models.Base.metadata.create_all(conn, tables=CATALOG_TABLES)
+
+def _create_prerequisite_tables(conn: Connection):
+    models.Base.metadata.create_all(
+        conn, tables=[models.course_prerequisites, models.course_prerequisite_closure]
+    )
+
+MIGRATIONS = [
+    Migration(1, "Таблицы курсов, программ и их состава", apply=_create_catalog_tables),
+    Migration(2, "Индексы фильтров и сортировки", indexes=_table_indexes(*CATALOG_TABLES)),
+    Migration(3, "Полнотекстовый индекс курсов (FTS5)", apply=search.create_search_index),
+    Migration(4, "Агрегаты программ", apply=stats.add_stats_columns),
+    Migration(5, "Граф пререквизитов курсов и его замыкание", apply=_create_prerequisite_tables),
+    Migration(6, "MinHash-сигнатуры и корзины LSH для поиска дубликатов курсов", apply=duplicates.create_duplicate_tables),
+    Migration(7, "Ревизия каталога для ETag, общая для воркеров", apply=cache.create_revision_table),
+    Migration(8, "Индексы сортировки курсов по сложности и онлайн-формату", indexes=tuple(
+        index for index in _table_indexes(models.DBCourse.__table__)
+        if index.name in ("ix_courses_difficulty", "ix_courses_has_online")
+    )),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+@contextmanager
+def _locked(engine: Engine):
+    """Соединение в транзакции BEGIN IMMEDIATE: одна пишущая транзакция на базу"""
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT")
+        busy_timeout = conn.exec_driver_sql("PRAGMA busy_timeout").scalar()
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {MIGRATION_BUSY_TIMEOUT}")
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {busy_timeout}")
+
+def _create_index(engine: Engine, index: Index):
+    with engine.begin() as conn:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+def migrate(engine: Engine, target: int = LATEST_VERSION) -> list[Migration]:
+    """Применить миграции до версии target; вернуть выполненные этим вызовом"""
+    with engine.connect() as conn:
+        current = schema_version(conn)
+    if current >= target:
+        return []
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current or migration.version > target:
+            continue
+        for index in migration.indexes:
+            _create_index(engine, index)
+        with _locked(engine) as conn:
+            current = schema_version(conn)
+            if current >= migration.version:
+                continue
+            if migration.apply is not None:
+                migration.apply(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {migration.version}")
+            current = migration.version
+        applied.append(migration)
+    return applied
+
+def check_schema(engine: Engine):
+    """RuntimeError, если схема базы старее кода (миграции при старте отключены)"""
+    with engine.connect() as conn:
+        current = schema_version(conn)
+    if current < LATEST_VERSION:
+        raise RuntimeError(
+            f"Схема БД версии {current}, требуется {LATEST_VERSION}: выполните python -m api.migrations upgrade"
+        )
+
+if __name__ == "__main__":
+    from .database import engine
+
+    args = sys.argv[1:]
+    if args not in (["status"], ["upgrade"]):
+        sys.exit("Использование: python -m api.migrations status|upgrade")
+    engine.echo = False
+    if args[0] == "upgrade":
+        for migration in migrate(engine):
+            print(f"{migration.version}: {migration.description}")
+    with engine.connect() as conn:
+        current = schema_version(conn)
+    for migration in MIGRATIONS:
+        mark = "x" if migration.version <= current else " "
+        print(f"[{mark}] {migration.version}: {migration.description}")
+    print(f"Версия схемы: {current} из {LATEST_VERSION}")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Enum, Table, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, Enum, LargeBinary, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 from enum import Enum as PyEnum
@@ -22,13 +22,34 @@ class DBCourse(Base):
 
     programs = relationship("DBProgram", secondary="program_courses", back_populates="courses")
 
+    # Индексы для фильтров и сортировки списка курсов (см. crud.courses_query)
+    __table_args__ = (
+        Index("ix_courses_difficulty_online_hours", "difficulty", "has_online", "total_hours"),
+        Index("ix_courses_online_hours", "has_online", "total_hours"),
+        Index("ix_courses_total_hours", "total_hours"),
+        # Сортировка по (difficulty, id) и (has_online, id): индекс SQLite заканчивается rowid
+        Index("ix_courses_difficulty", "difficulty"),
+        Index("ix_courses_has_online", "has_online"),
+    )
+
 class DBProgram(Base):
     __tablename__ = "programs"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     description = Column(String)
-    total_duration_weeks = Column(Integer)
+    total_duration_weeks = Column(Integer, index=True)
+
+    # Агрегаты по курсам программы, обновляются приращениями (см. api/stats.py)
+    course_count = Column(Integer, nullable=False, default=0, server_default="0")
+    total_hours = Column(Integer, nullable=False, default=0, server_default="0")
+    lecture_hours = Column(Integer, nullable=False, default=0, server_default="0")
+    practice_hours = Column(Integer, nullable=False, default=0, server_default="0")
+    online_course_count = Column(Integer, nullable=False, default=0, server_default="0")
+    beginner_count = Column(Integer, nullable=False, default=0, server_default="0")
+    intermediate_count = Column(Integer, nullable=False, default=0, server_default="0")
+    advanced_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     courses = relationship("DBCourse", secondary="program_courses", back_populates="programs")
 
 program_courses = Table(
@@ -36,4 +57,49 @@ program_courses = Table(
     Base.metadata,
     Column("program_id", Integer, ForeignKey("programs.id"), primary_key=True),
     Column("course_id", Integer, ForeignKey("courses.id"), primary_key=True)
-)
\ No newline at end of file
+)
+# Пререквизиты курсов: ребро course_id -> prerequisite_id ("курс требует пререквизит").
+# Граф ациклический; course_prerequisite_closure - его транзитивное замыкание
+# (ancestor_id - все пререквизиты descendant_id), поддерживается приращениями (см. api/prerequisites.py)
+course_prerequisites = Table(
+    "course_prerequisites",
+    Base.metadata,
+    Column("course_id", Integer, ForeignKey("courses.id"), primary_key=True),
+    Column("prerequisite_id", Integer, ForeignKey("courses.id"), primary_key=True),
+    Index("ix_course_prerequisites_prerequisite", "prerequisite_id", "course_id"),
+)
+
+course_prerequisite_closure = Table(
+    "course_prerequisite_closure",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey("courses.id"), primary_key=True),
+    Column("descendant_id", Integer, ForeignKey("courses.id"), primary_key=True),
+    Index("ix_course_prerequisite_closure_descendant", "descendant_id", "ancestor_id"),
+)
+
+# Поиск почти одинаковых курсов (см. api/duplicates.py): MinHash-сигнатура текста курса
+# и ключи корзин LSH - по одному на полосу сигнатуры; курсы с общим ключом - кандидаты в дубликаты
+course_minhash = Table(
+    "course_minhash",
+    Base.metadata,
+    Column("course_id", Integer, ForeignKey("courses.id"), primary_key=True),
+    Column("signature", LargeBinary, nullable=False),
+)
+
+course_lsh_buckets = Table(
+    "course_lsh_buckets",
+    Base.metadata,
+    Column("bucket", BigInteger, primary_key=True),
+    Column("course_id", Integer, ForeignKey("courses.id"), primary_key=True),
+    Index("ix_course_lsh_buckets_course", "course_id"),
+    sqlite_with_rowid=False,
+)
+
+# Ревизия каталога (см. api/cache.py): одна строка, общая для всех воркеров
+catalog_revision = Table(
+    "catalog_revision",
+    Base.metadata,
+    Column("id", Integer, primary_key=True),
+    Column("epoch", String, nullable=False),
+    Column("revision", Integer, nullable=False),
+)
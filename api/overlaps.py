@@ -0,0 +1,277 @@
+"""Пересечения программ по составу курсов: битовый индекс program_courses в памяти процесса.
+
+Строка индекса - состав программы: курсу с ID n соответствует бит n % 64 слова n // 64
+строки из слов uint64. Число общих курсов двух программ - число единиц в AND их строк
+(np.bitwise_count); для одной программы AND считается сразу со всеми строками, но только
+по ненулевым словам ее строки.
+
+Отчет по всем парам не перебирает все пары строк: пары с общими курсами получаются из столбцов
+индекса (программ каждого курса), а число общих курсов считается bincount блоками программ,
+поэтому время зависит от числа пар с общими курсами, а не от квадрата числа программ.
+
+Индекс строится при первом запросе; crud передает ему изменения состава после commit
+(см. crud.commit_changes). Индекс помнит ревизию каталога (api/cache.py), по которой построен,
+и перестраивается при следующем запросе, если ее изменил другой воркер или скрипт.
+"""
+import argparse
+import threading
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from . import models
+from .cache import catalog_revision
+
+REPORT_BLOCK_CELLS = 1 << 22   # ячеек матрицы общих курсов (программы блока x все программы) за раз
+
+def _bits(course_ids) -> tuple[np.ndarray, np.ndarray]:
+    """Номера слов и маски бит курсов"""
+    course_ids = np.asarray(course_ids, dtype=np.int64)
+    return course_ids >> 6, np.left_shift(np.uint64(1), (course_ids & 63).astype(np.uint64))
+
+def _ranked(metric: np.ndarray, shared: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    """Порядок по убыванию метрики, затем числа общих курсов, затем по ID"""
+    return np.lexsort((ids, -shared, -metric))
+
+class ProgramMembershipIndex:
+    """Битовые строки состава программ и подсчет общих курсов"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._stale = False
+        self._revision = ("", 0)                     # ревизия каталога, которой соответствует индекс
+        self._words = np.zeros((0, 1), dtype=np.uint64)
+        self._ids = np.zeros(0, dtype=np.int64)     # ID программы строки, 0 - свободная строка
+        self._sizes = np.zeros(0, dtype=np.int64)   # число курсов программы
+        self._rows: dict[int, int] = {}
+        self._free: list[int] = []
+
+    def build(self, db: Session):
+        """Построить индекс по всей таблице program_courses"""
+        # Ревизия читается до состава: изменение между ними даст лишнее перестроение, а не пропуск
+        revision = catalog_revision(db)
+        link = models.program_courses
+        pairs = db.execute(select(link.c.program_id, link.c.course_id)).all()
+        program_ids, course_ids = (np.array(column, dtype=np.int64) for column in (zip(*pairs) if pairs else ([], [])))
+        ids, rows = np.unique(program_ids, return_inverse=True)
+        width = int(course_ids.max()) // 64 + 1 if len(course_ids) else 1
+        words = np.zeros((len(ids), width), dtype=np.uint64)
+        positions, masks = _bits(course_ids)
+        np.bitwise_or.at(words, (rows, positions), masks)
+        with self._lock:
+            self._words = words
+            self._ids = ids
+            self._sizes = np.bincount(rows, minlength=len(ids)).astype(np.int64)
+            self._rows = {program_id: row for row, program_id in enumerate(ids.tolist())}
+            self._free = []
+            self._revision = revision
+            self._built = True
+            self._stale = False
+
+    def ensure(self, db: Session):
+        """Построить индекс, если он еще не построен, устарел или каталог изменен другим процессом"""
+        revision = catalog_revision(db)
+        with self._lock:
+            if not self._built or self._stale or revision != self._revision:
+                self.build(db)
+
+    # Изменения (вызываются из crud после commit)
+
+    def advance(self, revision: int):
+        """Учесть commit этого процесса, поднявший ревизию каталога до revision"""
+        with self._lock:
+            epoch, current = self._revision
+            if current == revision - 1:
+                self._revision = (epoch, revision)
+
+    def apply(self, program_id: int, added: list[int], removed: list[int]):
+        """Добавить и убрать курсы программы"""
+        with self._lock:
+            if not self._built:
+                return
+            row = self._rows.get(program_id)
+            if row is None:
+                if not added:
+                    return
+                row = self._free.pop() if self._free else self._append_row()
+                self._rows[program_id] = row
+                self._ids[row] = program_id
+            if added:
+                self._reserve_course(max(added))
+                positions, masks = _bits(added)
+                np.bitwise_or.at(self._words[row], positions, masks)
+            if removed:
+                positions, masks = _bits(removed)
+                inside = positions < self._words.shape[1]
+                np.bitwise_and.at(self._words[row], positions[inside], ~masks[inside])
+            self._sizes[row] = int(np.bitwise_count(self._words[row]).sum())
+
+    def remove_program(self, program_id: int):
+        """Убрать программу из индекса"""
+        with self._lock:
+            row = self._rows.pop(program_id, None)
+            if row is None:
+                return
+            self._words[row] = 0
+            self._ids[row] = 0
+            self._sizes[row] = 0
+            self._free.append(row)
+
+    def remove_course(self, course_id: int):
+        """Убрать курс из всех программ"""
+        with self._lock:
+            position, mask = _bits([course_id])
+            if not self._built or position[0] >= self._words.shape[1]:
+                return
+            column = self._words[:, position[0]]
+            self._sizes[(column & mask[0]) != 0] -= 1
+            self._words[:, position[0]] = column & ~mask[0]
+
+    def invalidate(self):
+        """Построить индекс заново при следующем запросе"""
+        with self._lock:
+            self._stale = True
+
+    def _append_row(self) -> int:
+        row = len(self._rows) + len(self._free)
+        if row == len(self._ids):
+            capacity = max(16, len(self._ids) * 2)
+            words = np.zeros((capacity, self._words.shape[1]), dtype=np.uint64)
+            words[:row] = self._words
+            ids, sizes = np.zeros(capacity, dtype=np.int64), np.zeros(capacity, dtype=np.int64)
+            ids[:row], sizes[:row] = self._ids, self._sizes
+            self._words, self._ids, self._sizes = words, ids, sizes
+        return row
+
+    def _reserve_course(self, course_id: int):
+        """Расширить строки, чтобы в них помещался бит курса"""
+        width = self._words.shape[1]
+        if course_id // 64 < width:
+            return
+        words = np.zeros((len(self._words), max(course_id // 64 + 1, width * 2)), dtype=np.uint64)
+        words[:, :width] = self._words
+        self._words = words
+
+    def _used(self) -> int:
+        return len(self._rows) + len(self._free)
+
+    # Запросы
+
+    def overlaps(self, db: Session, program_id: int, k: int, by: str = "jaccard") -> list[dict]:
+        """k программ с наибольшим пересечением с программой по метрике by (jaccard или containment)"""
+        self.ensure(db)
+        with self._lock:
+            row = self._rows.get(program_id)
+            if row is None:
+                return []
+            query = self._words[row]
+            nonzero = np.flatnonzero(query)
+            used = self._used()
+            shared = np.bitwise_count(self._words[:used, nonzero] & query[nonzero]).sum(axis=1, dtype=np.int64)
+            shared[row] = 0
+            candidates = np.flatnonzero(shared)
+            ids, sizes = self._ids[candidates], self._sizes[candidates]
+            size = self._sizes[row]
+        shared = shared[candidates]
+        jaccard = shared / (size + sizes - shared)
+        containment = shared / np.minimum(size, sizes)
+        top = _ranked(jaccard if by == "jaccard" else containment, shared, ids)[:k]
+        return [
+            {
+                "program_id": int(ids[i]),
+                "course_count": int(sizes[i]),
+                "shared_courses": int(shared[i]),
+                "jaccard": round(float(jaccard[i]), 4),
+                "containment": round(float(containment[i]), 4),
+            }
+            for i in top
+        ]
+
+    def _memberships(self, used: int) -> tuple[np.ndarray, np.ndarray]:
+        """Строки и ID курсов всех единичных бит индекса"""
+        rows, positions = np.nonzero(self._words[:used])
+        values = np.ascontiguousarray(self._words[rows, positions], dtype="<u8")
+        bits = np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+        entries, bit = np.nonzero(bits)
+        return rows[entries], positions[entries] * 64 + bit
+
+    def pairs(self, db: Session, min_jaccard: float = 0.0, min_containment: float = 0.0,
+              limit: int = 100, by: str = "jaccard") -> list[dict]:
+        """Пары программ с общими курсами, не ниже порогов, лучшие limit по метрике by"""
+        self.ensure(db)
+        with self._lock:
+            used = self._used()
+            rows, courses = self._memberships(used)
+            ids, sizes = self._ids[:used].copy(), self._sizes[:used].copy()
+
+        # Записи сгруппированы по курсу, внутри группы - по строке; у каждой записи есть
+        # following записей той же группы после нее - это ее пары с большими номерами строк
+        order = np.lexsort((rows, courses))
+        rows, courses = rows[order], courses[order]
+        starts = np.flatnonzero(np.r_[True, courses[1:] != courses[:-1]]) if len(courses) else np.zeros(0, np.int64)
+        lengths = np.diff(np.r_[starts, len(courses)])
+        following = np.repeat(starts + lengths, lengths) - np.arange(len(courses)) - 1
+
+        block = max(1, REPORT_BLOCK_CELLS // max(used, 1))
+        found = []
+        for start in range(0, used, block):
+            stop = min(start + block, used)
+            entries = np.flatnonzero((rows >= start) & (rows < stop) & (following > 0))
+            counts = following[entries]
+            if not counts.sum():
+                continue
+            first = np.repeat(rows[entries], counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            second = rows[np.repeat(entries + 1, counts) + offsets]
+            shared = np.bincount((first - start) * used + second, minlength=(stop - start) * used)
+            cells = np.flatnonzero(shared)
+            first, second, shared = cells // used + start, cells % used, shared[cells]
+            jaccard = shared / (sizes[first] + sizes[second] - shared)
+            containment = shared / np.minimum(sizes[first], sizes[second])
+            keep = (jaccard >= min_jaccard) & (containment >= min_containment)
+            found.append((first[keep], second[keep], shared[keep], jaccard[keep], containment[keep]))
+        if not found:
+            return []
+        first, second, shared, jaccard, containment = (np.concatenate(parts) for parts in zip(*found))
+        first, second = ids[first], ids[second]
+        first, second = np.minimum(first, second), np.maximum(first, second)   # строки могут идти не по ID
+        top = np.lexsort((second, first, -shared, -(jaccard if by == "jaccard" else containment)))[:limit]
+        return [
+            {
+                "program_id": int(first[i]),
+                "other_program_id": int(second[i]),
+                "shared_courses": int(shared[i]),
+                "jaccard": round(float(jaccard[i]), 4),
+                "containment": round(float(containment[i]), 4),
+            }
+            for i in top
+        ]
+
+    def size(self) -> int:
+        return len(self._rows)
+
+index = ProgramMembershipIndex()
+
+if __name__ == "__main__":
+    from .database import engine
+
+    parser = argparse.ArgumentParser(
+        prog="python -m api.overlaps", description="Отчет о пересечениях всех пар программ"
+    )
+    parser.add_argument("command", choices=["report"])
+    parser.add_argument("--min-jaccard", type=float, default=0.5)
+    parser.add_argument("--min-containment", type=float, default=0.0)
+    parser.add_argument("--by", choices=["jaccard", "containment"], default="jaccard")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+    engine.echo = False
+    with Session(engine) as db:
+        found = index.pairs(db, args.min_jaccard, args.min_containment, args.limit, args.by)
+        names = dict(db.execute(select(models.DBProgram.id, models.DBProgram.name)).all())
+    print("program_id\tother_program_id\tshared_courses\tjaccard\tcontainment\tprogram\tother_program")
+    for pair in found:
+        print(
+            f"{pair['program_id']}\t{pair['other_program_id']}\t{pair['shared_courses']}\t"
+            f"{pair['jaccard']}\t{pair['containment']}\t"
+            f"{names.get(pair['program_id'], '')}\t{names.get(pair['other_program_id'], '')}"
+        )
@@ -0,0 +1,21 @@
+import base64
+import json
+
+# Курсорная (keyset) пагинация: курсор хранит ключ сортировки,
+# значение этого ключа и id последней записи страницы
+
+def encode_cursor(order_by: str, value, last_id: int) -> str:
+    """Упаковать позицию последней записи в непрозрачный курсор"""
+    payload = json.dumps([order_by, value, last_id], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple[str, object, int]:
+    """Распаковать курсор; ValueError, если курсор поврежден"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_by, value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Некорректный курсор")
+    if not isinstance(order_by, str) or not isinstance(last_id, int):
+        raise ValueError("Некорректный курсор")
+    return order_by, value, last_id
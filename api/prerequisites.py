@@ -0,0 +1,199 @@
+"""Граф пререквизитов курсов и его транзитивное замыкание.
+
+Ребра хранятся в course_prerequisites, замыкание - в course_prerequisite_closure:
+строка (ancestor_id, descendant_id) означает, что ancestor_id - прямой или косвенный
+пререквизит descendant_id. "Все пререквизиты X" и "все, что открывает X" - одна выборка
+по индексу замыкания, без рекурсивного обхода.
+
+Замыкание обновляется приращениями в тех же транзакциях, что и ребра (см. crud):
+добавление ребра p -> c вставляет пары (предки p и p) x (c и потомки c);
+удаление ребра или курса удаляет затронутые пары и пересчитывает предков
+затронутых курсов в топологическом порядке. Ребро, замыкающее цикл, отклоняется.
+Проверка замыкания с пересчетом с нуля:
+
+    python -m api.prerequisites check [--fix]
+"""
+import sys
+from sqlalchemy import delete, exists, insert, literal, select, true, union, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from . import models
+
+IN_CHUNK_SIZE = 500
+
+edges = models.course_prerequisites
+closure = models.course_prerequisite_closure
+
+class PrerequisiteCycleError(ValueError):
+    """Ребро создает цикл в графе пререквизитов"""
+
+def _chunks(ids: list[int], size: int = IN_CHUNK_SIZE):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def _insert_closure(rows_query):
+    return insert(closure).prefix_with("OR IGNORE").from_select(["ancestor_id", "descendant_id"], rows_query)
+
+def ancestor_ids(db: Session, course_id: int) -> set[int]:
+    """Все пререквизиты курса (по замыканию)"""
+    return set(db.scalars(select(closure.c.ancestor_id).where(closure.c.descendant_id == course_id)))
+
+def descendant_ids(db: Session, course_id: int) -> set[int]:
+    """Все курсы, которые требуют курс (по замыканию)"""
+    return set(db.scalars(select(closure.c.descendant_id).where(closure.c.ancestor_id == course_id)))
+
+def creates_cycle(db: Session, course_id: int, prerequisite_id: int) -> bool:
+    """Замкнет ли ребро course_id -> prerequisite_id цикл: курс уже (косвенно) нужен пререквизиту"""
+    if course_id == prerequisite_id:
+        return True
+    return db.query(exists().where(
+        closure.c.ancestor_id == course_id, closure.c.descendant_id == prerequisite_id
+    )).scalar()
+
+def add_edge(db: Session, course_id: int, prerequisite_id: int) -> bool:
+    """Добавить ребро и пары замыкания без commit. False, если ребро уже есть;
+    PrerequisiteCycleError, если ребро замыкает цикл"""
+    if db.query(exists().where(edges.c.course_id == course_id, edges.c.prerequisite_id == prerequisite_id)).scalar():
+        return False
+    if creates_cycle(db, course_id, prerequisite_id):
+        raise PrerequisiteCycleError(
+            f"Курс {prerequisite_id} зависит от курса {course_id}: ребро создает цикл"
+        )
+    db.execute(insert(edges).values(course_id=course_id, prerequisite_id=prerequisite_id))
+    ancestors = union_all(
+        select(literal(prerequisite_id).label("id")),
+        select(closure.c.ancestor_id).where(closure.c.descendant_id == prerequisite_id),
+    ).subquery()
+    descendants = union_all(
+        select(literal(course_id).label("id")),
+        select(closure.c.descendant_id).where(closure.c.ancestor_id == course_id),
+    ).subquery()
+    db.execute(_insert_closure(select(ancestors.c.id, descendants.c.id).join(descendants, true())))
+    return True
+
+def remove_edge(db: Session, course_id: int, prerequisite_id: int) -> bool:
+    """Удалить ребро и пересчитать замыкание без commit. False, если ребра нет"""
+    deleted = db.execute(
+        delete(edges).where(edges.c.course_id == course_id, edges.c.prerequisite_id == prerequisite_id)
+    ).rowcount
+    if not deleted:
+        return False
+    affected = descendant_ids(db, course_id) | {course_id}
+    sources = select(closure.c.ancestor_id).where(closure.c.descendant_id == prerequisite_id)
+    _forget_paths(db, affected, select(literal(prerequisite_id)).union_all(sources))
+    _rebuild_ancestors(db, affected)
+    return True
+
+def remove_course(db: Session, course_id: int):
+    """Удалить ребра курса и пересчитать замыкание для курсов, которые от него зависели (без commit)"""
+    affected = descendant_ids(db, course_id)
+    if affected:
+        sources = select(closure.c.ancestor_id).where(closure.c.descendant_id == course_id)
+        _forget_paths(db, affected, sources)
+    db.execute(delete(closure).where((closure.c.ancestor_id == course_id) | (closure.c.descendant_id == course_id)))
+    db.execute(delete(edges).where((edges.c.course_id == course_id) | (edges.c.prerequisite_id == course_id)))
+    _rebuild_ancestors(db, affected)
+
+def _forget_paths(db: Session, descendants: set[int], ancestors_query):
+    """Удалить пары (предок из ancestors_query, потомок из descendants) - их могла давать удаленная связь"""
+    for chunk in _chunks(sorted(descendants)):
+        db.execute(delete(closure).where(
+            closure.c.descendant_id.in_(chunk), closure.c.ancestor_id.in_(ancestors_query)
+        ))
+
+def _topological_order(db: Session, course_ids: set[int]) -> list[int]:
+    """Курсы в порядке "пререквизиты раньше" по ребрам между ними (алгоритм Кана)"""
+    requires = {course_id: set() for course_id in course_ids}
+    unlocks = {course_id: [] for course_id in course_ids}
+    for chunk in _chunks(sorted(course_ids)):
+        for course_id, prerequisite_id in db.execute(
+            select(edges.c.course_id, edges.c.prerequisite_id).where(edges.c.course_id.in_(chunk))
+        ):
+            if prerequisite_id in requires:
+                requires[course_id].add(prerequisite_id)
+                unlocks[prerequisite_id].append(course_id)
+    ready = [course_id for course_id, prerequisites in requires.items() if not prerequisites]
+    order = []
+    while ready:
+        course_id = ready.pop()
+        order.append(course_id)
+        for dependent in unlocks[course_id]:
+            requires[dependent].discard(course_id)
+            if not requires[dependent]:
+                ready.append(dependent)
+    return order
+
+def _rebuild_ancestors(db: Session, course_ids: set[int]):
+    """Вывести предков каждого курса из его прямых пререквизитов и их предков.
+    Курсы обрабатываются в топологическом порядке, поэтому предки пререквизитов уже верны"""
+    for course_id in _topological_order(db, course_ids):
+        direct = select(edges.c.prerequisite_id.label("id")).where(edges.c.course_id == course_id)
+        inherited = (
+            select(closure.c.ancestor_id)
+            .join(edges, closure.c.descendant_id == edges.c.prerequisite_id)
+            .where(edges.c.course_id == course_id)
+        )
+        found = union(direct, inherited).subquery()
+        db.execute(_insert_closure(select(found.c.id, literal(course_id))))
+
+def unmet_prerequisites(db: Session, program_id: int) -> dict[int, list[int]]:
+    """Курс программы -> его (прямые и косвенные) пререквизиты, которых нет в программе"""
+    link = models.program_courses
+    member = link.alias("member")
+    in_program = exists().where(member.c.program_id == program_id, member.c.course_id == closure.c.ancestor_id)
+    rows = db.execute(
+        select(closure.c.descendant_id, closure.c.ancestor_id)
+        .join(link, link.c.course_id == closure.c.descendant_id)
+        .where(link.c.program_id == program_id, ~in_program)
+        .order_by(closure.c.descendant_id, closure.c.ancestor_id)
+    )
+    missing = {}
+    for course_id, prerequisite_id in rows:
+        missing.setdefault(course_id, []).append(prerequisite_id)
+    return missing
+
+# Пересчет с нуля: рекурсивный обход всех ребер
+
+def _full_closure_query():
+    walk = select(
+        edges.c.prerequisite_id.label("ancestor_id"), edges.c.course_id.label("descendant_id")
+    ).cte("walk", recursive=True)
+    walk = walk.union(
+        select(walk.c.ancestor_id, edges.c.course_id).join(edges, edges.c.prerequisite_id == walk.c.descendant_id)
+    )
+    return select(walk.c.ancestor_id, walk.c.descendant_id)
+
+def check_closure(db: Session) -> dict:
+    """Сравнить сохраненное замыкание с пересчитанным: лишние и недостающие пары"""
+    stored = set(map(tuple, db.execute(select(closure.c.ancestor_id, closure.c.descendant_id))))
+    actual = set(map(tuple, db.execute(_full_closure_query())))
+    return {"extra": sorted(stored - actual), "missing": sorted(actual - stored)}
+
+def rebuild_closure(db: Session | Connection):
+    """Пересчитать замыкание с нуля (без commit)"""
+    db.execute(delete(closure))
+    db.execute(insert(closure).from_select(["ancestor_id", "descendant_id"], _full_closure_query()))
+
+if __name__ == "__main__":
+    from .cache import bump_revision
+    from .database import engine
+
+    args = sys.argv[1:]
+    if not args or args[0] != "check" or args[1:] not in ([], ["--fix"]):
+        sys.exit("Использование: python -m api.prerequisites check [--fix]")
+    engine.echo = False
+    with Session(engine) as db:
+        diff = check_closure(db)
+        for ancestor_id, descendant_id in diff["extra"][:20]:
+            print(f"Лишняя пара: {ancestor_id} -> {descendant_id}")
+        for ancestor_id, descendant_id in diff["missing"][:20]:
+            print(f"Нет пары: {ancestor_id} -> {descendant_id}")
+        broken = bool(diff["extra"] or diff["missing"])
+        if broken and "--fix" in args:
+            rebuild_closure(db)
+            bump_revision(db)
+            db.commit()
+            print("Замыкание пересчитано")
+        elif not broken:
+            print("Замыкание пререквизитов согласовано")
+    sys.exit(1 if broken and "--fix" not in args else 0)
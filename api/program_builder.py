@@ -0,0 +1,187 @@
+"""Автоматический подбор курсов программы под бюджет часов.
+
+Задача - ограниченный рюкзак: выбрать курсы так, чтобы сумма часов была максимальной,
+но не больше бюджета; часы каждого уровня сложности - не больше его доли бюджета;
+доля часов онлайн-курсов - не меньше min_online_share.
+
+Курсы с одинаковыми (сложность, часы, онлайн) взаимозаменяемы, поэтому решение
+ищется по классам таких курсов, а не по отдельным курсам: каталог в 50 тыс. курсов
+дает несколько сотен классов. Класс из n курсов раскладывается на предметы по 1, 2, 4, ...
+курсов (двоичное разбиение), и для каждого уровня сложности динамика по точной сумме
+часов считает наибольший "запас по онлайну" (часы онлайн-курсов минус min_online_share
+от всех часов). Каждый шаг динамики - векторная операция NumPy над массивом длины
+бюджета. Затем уровни объединяются (max-plus свертка) и выбирается наибольшая сумма часов
+с неотрицательным запасом. Решение точное; без требования к онлайну при равных часах
+предпочитаются онлайн-курсы. Из каждого класса берутся курсы с наименьшими ID.
+"""
+from typing import NamedTuple
+import numpy as np
+from sqlalchemy import Integer, case, cast, select
+from sqlalchemy.orm import Session
+from . import models, schemas
+
+DIFFICULTIES = [level.value for level in models.DifficultyLevel]
+
+class CourseArrays(NamedTuple):
+    """Атрибуты курсов-кандидатов столбцами"""
+    ids: np.ndarray          # int64
+    hours: np.ndarray        # int64
+    difficulty: np.ndarray   # int8, индекс в DIFFICULTIES
+    online: np.ndarray       # bool
+
+def course_arrays(db: Session, online_only: bool = False) -> CourseArrays:
+    """Прочитать ID, часы, сложность и онлайн-доступность курсов в массивы NumPy.
+    Сложность кодируется в SQL, чтобы не строить Enum для каждой строки"""
+    course = models.DBCourse
+    code = case(
+        *[(course.difficulty == level, index) for index, level in enumerate(models.DifficultyLevel)], else_=-1
+    )
+    query = select(course.id, course.total_hours, code, cast(course.has_online, Integer)).where(course.total_hours > 0)
+    if online_only:
+        query = query.where(course.has_online.is_(True))
+    rows = db.execute(query.order_by(course.id)).all()
+    columns = [np.array(column, dtype=np.int64) for column in zip(*rows)] or [np.array([], dtype=np.int64)] * 4
+    ids, hours, difficulty, online = columns
+    return CourseArrays(ids, hours, difficulty.astype(np.int8), online.astype(bool))
+
+class _Level(NamedTuple):
+    """Динамика одного уровня сложности"""
+    best: np.ndarray         # наибольший запас по онлайну для точной суммы часов (-inf - недостижима)
+    taken: np.ndarray        # taken[i, h] - предмет i взят на пути к сумме h
+    weights: np.ndarray      # часы предметов
+    classes: np.ndarray      # класс каждого предмета
+    counts: np.ndarray       # курсов класса в предмете
+
+def _split_counts(counts: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Двоичное разбиение: класс из n курсов -> предметы по 1, 2, 4, ... и остаток"""
+    classes, parts = [], []
+    for index, count in enumerate(counts.tolist()):
+        part = 1
+        while count > 0:
+            take = min(part, count)
+            classes.append(index)
+            parts.append(take)
+            count -= take
+            part *= 2
+    return np.array(classes, dtype=np.int64), np.array(parts, dtype=np.int64)
+
+def _solve_level(hours: np.ndarray, online: np.ndarray, counts: np.ndarray,
+                 capacity: int, min_online_share: float) -> _Level:
+    """Ограниченный рюкзак по точной сумме часов для классов одного уровня"""
+    usable = np.minimum(counts, capacity // hours)
+    classes, parts = _split_counts(usable)
+    weights = hours[classes] * parts
+    values = weights * (online[classes] - min_online_share)
+    best = np.full(capacity + 1, -np.inf)
+    best[0] = 0.0
+    taken = np.zeros((len(weights), capacity + 1), dtype=bool)
+    for item, (weight, value) in enumerate(zip(weights.tolist(), values.tolist())):
+        candidate = best[:-weight] + value
+        better = candidate > best[weight:] + 1e-9
+        taken[item, weight:] = better
+        best[weight:] = np.where(better, candidate, best[weight:])
+    return _Level(best, taken, weights, classes, parts)
+
+def _class_counts(level: _Level, total: int, class_count: int) -> np.ndarray:
+    """Сколько курсов каждого класса дает сумма часов total (обратный проход динамики)"""
+    chosen = np.zeros(class_count, dtype=np.int64)
+    for item in range(len(level.weights) - 1, -1, -1):
+        if total > 0 and level.taken[item, total]:
+            chosen[level.classes[item]] += level.counts[item]
+            total -= level.weights[item]
+    return chosen
+
+def _merge(left: np.ndarray, right: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Max-plus свертка: лучший запас для суммы часов двух уровней и доля левого уровня"""
+    size = len(left) + len(right) - 1
+    merged = np.full(size, -np.inf)
+    split = np.zeros(size, dtype=np.int64)
+    for hours in np.flatnonzero(left > -np.inf).tolist():
+        candidate = left[hours] + right
+        target = merged[hours:hours + len(right)]
+        better = candidate > target + 1e-9
+        target[better] = candidate[better]
+        split[hours:hours + len(right)][better] = hours
+    return merged, split
+
+def select_courses(arrays: CourseArrays, budget: int, difficulty_shares: dict[int, float] | None = None,
+                   min_online_share: float = 0.0) -> np.ndarray:
+    """Индексы выбранных курсов в arrays.
+
+    difficulty_shares - код сложности -> наибольшая доля бюджета часов (None - без ограничений,
+    уровни без доли не выбираются)."""
+    if not len(arrays.ids) or budget <= 0:
+        return np.array([], dtype=np.int64)
+    if difficulty_shares is None:
+        groups = {-1: arrays.difficulty >= 0}
+        capacities = {-1: budget}
+    else:
+        groups = {code: arrays.difficulty == code for code in difficulty_shares}
+        capacities = {code: int(budget * share) for code, share in difficulty_shares.items()}
+
+    levels = []
+    for code, mask in groups.items():
+        capacity = capacities[code]
+        if capacity <= 0 or not mask.any():
+            continue
+        members = np.flatnonzero(mask & (arrays.hours <= capacity))
+        if not len(members):
+            continue
+        # Классы взаимозаменяемых курсов; внутри класса - по возрастанию ID
+        keys = arrays.hours[members] * 2 + arrays.online[members]
+        order = np.lexsort((arrays.ids[members], keys))
+        members = members[order]
+        class_keys, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        level = _solve_level(class_keys // 2, class_keys % 2, counts, capacity, min_online_share)
+        levels.append((level, members, starts, len(class_keys)))
+    if not levels:
+        return np.array([], dtype=np.int64)
+
+    # Объединение уровней и выбор наибольшей суммы часов с неотрицательным запасом
+    combined, splits = levels[0][0].best, []
+    for level, *_ in levels[1:]:
+        combined, split = _merge(combined, level.best)
+        splits.append(split)
+    feasible = np.flatnonzero(combined[:budget + 1] >= -1e-9)
+    total = int(feasible[-1]) if len(feasible) else 0
+
+    totals = [0] * len(levels)
+    for index in range(len(levels) - 1, 0, -1):
+        left = int(splits[index - 1][total])
+        totals[index] = total - left
+        total = left
+    totals[0] = total
+
+    selected = []
+    for (level, members, starts, class_count), level_total in zip(levels, totals):
+        for class_index, count in enumerate(_class_counts(level, level_total, class_count).tolist()):
+            if count:
+                selected.append(members[starts[class_index]:starts[class_index] + count])
+    return np.sort(np.concatenate(selected)) if selected else np.array([], dtype=np.int64)
+
+def generate(db: Session, request: schemas.ProgramGenerateRequest) -> dict:
+    """Подобрать курсы программы; результат - поля schemas.ProgramGenerated без program_id"""
+    arrays = course_arrays(db, online_only=request.min_online_share >= 1)
+    budget = request.hours_budget()
+    shares = None
+    if request.difficulty_mix is not None:
+        shares = {
+            DIFFICULTIES.index(level.value): share for level, share in request.difficulty_mix.items()
+        }
+    chosen = select_courses(arrays, budget, shares, request.min_online_share)
+
+    hours = arrays.hours[chosen]
+    by_difficulty = np.bincount(arrays.difficulty[chosen], weights=hours, minlength=len(DIFFICULTIES))
+    return {
+        "program": schemas.ProgramCreate(
+            name=request.name,
+            description=request.description,
+            total_duration_weeks=request.total_duration_weeks,
+            course_ids=arrays.ids[chosen].tolist(),
+        ),
+        "hours_budget": budget,
+        "total_hours": int(hours.sum()),
+        "online_hours": int(hours[arrays.online[chosen]].sum()),
+        "hours_by_difficulty": {level: int(value) for level, value in zip(DIFFICULTIES, by_difficulty)},
+        "candidate_count": len(arrays.ids),
+    }
@@ -0,0 +1,99 @@
+from functools import lru_cache
+from operator import itemgetter
+from fastapi import Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, TypeAdapter, ValidationError, create_model
+from . import crud, schemas, stats
+from .config import VALIDATE_RESPONSES
+
+try:
+    import orjson
+except ImportError:  # orjson необязателен: без него используется стандартный json
+    orjson = None
+
+# Быстрый путь ответов списков.
+# Строки читаются из БД кортежами нужных колонок (crud.get_course_rows, crud.get_program_rows)
+# и отдаются без построения моделей Pydantic и повторной проверки по response_model.
+# Типы колонок совпадают со схемой (значение вне DifficultyLevel не читается из БД - LookupError
+# SQLAlchemy), но колонки допускают NULL: строки с NULL в обязательном поле проверяются по схеме
+# и, как с response_model, дают ResponseValidationError (500). С EDU_VALIDATE_RESPONSES=1 по схеме
+# проверяется каждый ответ - так bench.responses доказывает, что быстрый путь не расходится со схемой.
+# Параметр fields сужает представление (частичный ответ), без него ответ полный.
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ, сериализуемый через orjson, если он установлен"""
+
+    def render(self, content) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+def _required(model: type[BaseModel]) -> frozenset[str]:
+    return frozenset(name for name, field in model.model_fields.items() if field.is_required())
+
+COURSE_REQUIRED = _required(schemas.Course)
+PROGRAM_REQUIRED = _required(schemas.Program)
+
+@lru_cache(maxsize=256)
+def _items_adapter(model: type[BaseModel], names: tuple[str, ...]) -> TypeAdapter:
+    """Схема списка из полей names модели; поля вне схемы - ошибка"""
+    fields = {name: (model.model_fields[name].annotation, ...) for name in names if name in model.model_fields}
+    item = create_model(f"{model.__name__}Item", __config__=ConfigDict(extra="forbid"), **fields)
+    return TypeAdapter(list[item])
+
+def _has_null(items, names) -> bool:
+    """Есть ли None среди полей names элементов"""
+    if not names:
+        return False
+    values = itemgetter(*names)
+    if len(names) == 1:
+        return any(values(item) is None for item in items)
+    return any(None in values(item) for item in items)
+
+def check_items(model: type[BaseModel], items: list[dict], required: frozenset[str], force: bool = False) -> list[dict]:
+    """Проверить элементы ответа по схеме model (частичный ответ - по своим полям).
+    Без EDU_VALIDATE_RESPONSES и force проверка выполняется, только если в обязательном поле NULL"""
+    if not items:
+        return items
+    names = tuple(items[0])
+    if VALIDATE_RESPONSES or force or _has_null(items, tuple(required.intersection(names))):
+        try:
+            _items_adapter(model, names).validate_python(items)
+        except ValidationError as exc:
+            raise ResponseValidationError(exc.errors(include_url=False), body=items)
+    return items
+
+def course_items(rows: list[dict], fields: list[str] | None) -> list[dict]:
+    """Курсы ответа: только поля fields или все (None) - строки уже содержат ровно их"""
+    if fields is not None:
+        rows = [{name: row[name] for name in fields} for row in rows]
+    return check_items(schemas.Course, rows, COURSE_REQUIRED)
+
+def program_items(
+    rows: list[dict],
+    fields: list[str] | None,
+    expand: str,
+    include_stats: bool
+) -> list[dict]:
+    """Программы ответа: поля fields (None - все поля и stats, как в schemas.Program),
+    состав по expand и агрегаты при include_stats"""
+    names = fields or crud.PROGRAM_FIELDS
+    items = []
+    for row in rows:
+        item = {name: row[name] for name in names}
+        if expand != "none":
+            item[expand] = row[expand]
+        if include_stats:
+            item["stats"] = stats.stats_from_columns(row)
+        elif fields is None:
+            item["stats"] = None
+        items.append(item)
+    nested_null = expand == "courses" and _has_null(
+        (course for item in items for course in item["courses"]), tuple(COURSE_REQUIRED)
+    )
+    return check_items(schemas.Program, items, PROGRAM_REQUIRED, force=nested_null)
+
+def rows_response(response: Response, content: list[dict]) -> FastJSONResponse:
+    """Ответ со списком и заголовками, выставленными зависимостями (ETag, X-Next-Cursor)"""
+    return FastJSONResponse(content, headers=dict(response.headers))
@@ -0,0 +1,246 @@
+from fastapi import APIRouter, FastAPI, HTTPException, Depends, Response, status
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from . import schemas, crud, crud_async
+from .config import RELATIONSHIP_LOADING
+from .database import get_async_engine
+from .dependencies import (
+    get_async_db, check_etag, resolve_cursor, set_next_cursor,
+    course_filters, program_filters, course_fields, program_fields
+)
+from .instrumentation import instrument_engine
+from .responses import course_items, program_items, rows_response
+
+# Асинхронные обработчики основных эндпоинтов (режим ASYNC_DB).
+# Пути, параметры и модели ответов совпадают с синхронными из server.py;
+# описания для OpenAPI переносятся с заменяемых обработчиков.
+
+router = APIRouter()
+
+# ====================== КУРСЫ ======================
+@router.post("/courses/",
+             response_model=schemas.CourseCreated,
+             status_code=status.HTTP_201_CREATED,
+             summary="Создать новый курс",
+             tags=["Курсы"])
+async def create_course(course: schemas.CourseCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_course(db, course=course)
+
+@router.get("/courses/",
+            response_model=List[schemas.Course],
+            summary="Получить список всех курсов",
+            tags=["Курсы"],
+            dependencies=[Depends(check_etag)])
+async def read_courses(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    order_by: schemas.CourseOrder = schemas.CourseOrder.ID,
+    cursor: Optional[str] = None,
+    filters: dict = Depends(course_filters),
+    fields: Optional[list[str]] = Depends(course_fields),
+    db: AsyncSession = Depends(get_async_db)
+):
+    after = resolve_cursor(cursor, order_by.value)
+    rows = await crud_async.get_course_rows(
+        db, fields or crud.COURSE_FIELDS, skip=skip, limit=limit, order_by=order_by.value, after=after, **filters
+    )
+    set_next_cursor(response, rows, limit, order_by.value)
+    return rows_response(response, course_items(rows, fields))
+
+@router.get("/courses/{course_id}",
+            response_model=schemas.Course,
+            summary="Получить курс по ID",
+            tags=["Курсы"],
+            dependencies=[Depends(check_etag)])
+async def read_course(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_course = await crud_async.get_course(db, course_id=course_id)
+    if db_course is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return db_course
+
+@router.put("/courses/{course_id}",
+            response_model=schemas.Course,
+            summary="Обновить данные курса",
+            tags=["Курсы"])
+async def update_course(course_id: int, course: schemas.CourseCreate, db: AsyncSession = Depends(get_async_db)):
+    db_course = await crud_async.update_course(db, course_id=course_id, course_update=course)
+    if db_course is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return db_course
+
+@router.delete("/courses/{course_id}",
+               status_code=status.HTTP_204_NO_CONTENT,
+               summary="Удалить курс",
+               tags=["Курсы"])
+async def delete_course(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.delete_course(db, course_id=course_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return {"ok": True}
+
+@router.get("/courses/{course_id}/programs",
+            response_model=List[schemas.Program],
+            summary="Получить программы, содержащие курс",
+            tags=["Курсы"],
+            dependencies=[Depends(check_etag)])
+async def get_programs_with_course(course_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_course = await crud_async.get_course(db, course_id=course_id)
+    if db_course is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return await crud_async.get_programs_with_course(
+        db, course_id=course_id, load=RELATIONSHIP_LOADING["get_programs_with_course"]
+    )
+
+# ====================== ПРОГРАММЫ ======================
+@router.post("/programs/",
+             response_model=schemas.Program,
+             status_code=status.HTTP_201_CREATED,
+             summary="Создать новую программу",
+             tags=["Программы"])
+async def create_program(program: schemas.ProgramCreate, db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.create_program(db, program=program)
+
+@router.get("/programs/",
+            response_model=List[schemas.Program],
+            summary="Получить список всех программ",
+            tags=["Программы"],
+            dependencies=[Depends(check_etag)])
+async def read_programs(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    order_by: schemas.ProgramOrder = schemas.ProgramOrder.ID,
+    cursor: Optional[str] = None,
+    include_stats: bool = False,
+    expand: schemas.ProgramExpand = schemas.ProgramExpand.COURSES,
+    filters: dict = Depends(program_filters),
+    fields: Optional[list[str]] = Depends(program_fields),
+    db: AsyncSession = Depends(get_async_db)
+):
+    after = resolve_cursor(cursor, order_by.value)
+    rows = await crud_async.get_program_rows(
+        db, fields or crud.PROGRAM_FIELDS, expand=expand.value, include_stats=include_stats,
+        skip=skip, limit=limit, order_by=order_by.value, after=after, **filters
+    )
+    set_next_cursor(response, rows, limit, order_by.value)
+    return rows_response(response, program_items(rows, fields, expand.value, include_stats))
+
+@router.get("/programs/{program_id}",
+            response_model=schemas.Program,
+            summary="Получить программу по ID",
+            tags=["Программы"],
+            dependencies=[Depends(check_etag)])
+async def read_program(program_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_program = await crud_async.get_program(db, program_id=program_id, load=RELATIONSHIP_LOADING["read_program"])
+    if db_program is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return db_program
+
+@router.get("/programs/{program_id}/stats",
+            response_model=schemas.ProgramStats,
+            summary="Получить агрегаты программы",
+            tags=["Программы"],
+            dependencies=[Depends(check_etag)])
+async def read_program_stats(program_id: int, db: AsyncSession = Depends(get_async_db)):
+    program_stats = await crud_async.get_program_stats(db, program_id=program_id)
+    if program_stats is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return program_stats
+
+@router.put("/programs/{program_id}",
+            response_model=schemas.Program,
+            summary="Обновить данные программы",
+            tags=["Программы"])
+async def update_program(program_id: int, program: schemas.ProgramCreate, db: AsyncSession = Depends(get_async_db)):
+    db_program = await crud_async.update_program(db, program_id=program_id, program_update=program)
+    if db_program is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return db_program
+
+@router.delete("/programs/{program_id}",
+               status_code=status.HTTP_204_NO_CONTENT,
+               summary="Удалить программу",
+               tags=["Программы"])
+async def delete_program(program_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.delete_program(db, program_id=program_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return {"ok": True}
+
+@router.patch("/programs/{program_id}/courses",
+              response_model=schemas.ProgramCoursesResult,
+              summary="Изменить состав программы",
+              tags=["Программы"])
+async def update_program_courses(
+    program_id: int,
+    changes: schemas.ProgramCoursesUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await crud_async.update_program_courses(db, program_id, changes.add, changes.remove)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return result
+
+@router.post("/programs/{program_id}/courses/{course_id}",
+             status_code=status.HTTP_200_OK,
+             summary="Добавить курс в программу",
+             tags=["Программы"])
+async def add_course_to_program(program_id: int, course_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.add_course_to_program(db, program_id=program_id, course_id=course_id)
+    if not success:
+        raise HTTPException(
+            status_code=404,
+            detail="Программа или курс не найдены, либо курс уже в программе"
+        )
+    return {"message": "Курс успешно добавлен в программу"}
+
+@router.delete("/programs/{program_id}/courses/{course_id}",
+               status_code=status.HTTP_200_OK,
+               summary="Удалить курс из программы",
+               tags=["Программы"])
+async def remove_course_from_program(program_id: int, course_id: int, db: AsyncSession = Depends(get_async_db)):
+    success = await crud_async.remove_course_from_program(db, program_id=program_id, course_id=course_id)
+    if not success:
+        raise HTTPException(
+            status_code=404,
+            detail="Программа или курс не найдены, либо курс отсутствует в программе"
+        )
+    return {"message": "Курс успешно удален из программы"}
+
+@router.get("/programs/{program_id}/available-courses",
+            response_model=List[schemas.Course],
+            summary="Получить курсы, не входящие в программу",
+            tags=["Программы"],
+            dependencies=[Depends(check_etag)])
+async def get_available_courses(
+    program_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    if not await crud_async.program_exists(db, program_id):
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    after = resolve_cursor(cursor, "id")
+    rows = await crud_async.get_course_rows_not_in_program(
+        db, program_id, skip=skip, limit=limit, after=after
+    )
+    set_next_cursor(response, rows, limit, "id")
+    return rows_response(response, course_items(rows, None))
+
+def use_async_routes(app: FastAPI):
+    """Заменить синхронные обработчики приложения асинхронными с теми же путями и методами"""
+    instrument_engine(get_async_engine().sync_engine)
+    replacements = {(route.path, frozenset(route.methods)): route for route in router.routes}
+    for index, route in enumerate(app.router.routes):
+        if not isinstance(route, APIRoute):
+            continue
+        replacement = replacements.pop((route.path, frozenset(route.methods)), None)
+        if replacement is not None:
+            replacement.description = route.description
+            app.router.routes[index] = replacement
+    if replacements:
+        raise RuntimeError(f"Нет синхронных обработчиков для {sorted(path for path, _ in replacements)}")
@@ -1,12 +1,38 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
 from enum import Enum
+from .config import GENERATE_MAX_HOURS
 
 class DifficultyLevel(str, Enum):
     BEGINNER = "начальный"
     INTERMEDIATE = "средний"
     ADVANCED = "продвинутый"
 
+class CourseOrder(str, Enum):
+    ID = "id"
+    TITLE = "title"
+    TOTAL_HOURS = "total_hours"
+    DIFFICULTY = "difficulty"
+    HAS_ONLINE = "has_online"
+
+class ProgramOrder(str, Enum):
+    ID = "id"
+    NAME = "name"
+    TOTAL_DURATION_WEEKS = "total_duration_weeks"
+
+class ProgramExpand(str, Enum):
+    COURSES = "courses"
+    COURSE_IDS = "course_ids"
+    NONE = "none"
+
+class OverlapMetric(str, Enum):
+    JACCARD = "jaccard"
+    CONTAINMENT = "containment"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
 class CourseBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -25,6 +51,38 @@ class Course(CourseBase):
     class Config:
         from_attributes = True  
 
+class CourseSearchHit(Course):
+    title_highlight: str
+    description_snippet: Optional[str] = None
+    rank: float
+
+class SimilarCourse(Course):
+    similarity: float
+
+class DuplicateCandidate(BaseModel):
+    id: int
+    title: str
+    similarity: float
+
+class CourseCreated(Course):
+    possible_duplicates: List[DuplicateCandidate] = []
+
+class CourseDuplicatePair(BaseModel):
+    course_id: int
+    title: str
+    duplicate_id: int
+    duplicate_title: str
+    similarity: float
+
+class BulkRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+class BulkImportResult(BaseModel):
+    created: int
+    failed: int
+    errors: List[BulkRowError] = []
+
 class ProgramBase(BaseModel):
     name: str
     description: Optional[str] = None
@@ -33,9 +91,109 @@ class ProgramBase(BaseModel):
 class ProgramCreate(ProgramBase):
     course_ids: List[int] = []
 
+class ProgramCoursesUpdate(BaseModel):
+    add: List[int] = []
+    remove: List[int] = []
+
+    @model_validator(mode="after")
+    def check_disjoint(self):
+        both = set(self.add) & set(self.remove)
+        if both:
+            raise ValueError(f"ID курсов одновременно в add и remove: {sorted(both)}")
+        return self
+
+class ProgramCoursesResult(BaseModel):
+    added: List[int]
+    removed: List[int]
+    missing: List[int]
+    already_present: List[int]
+    not_in_program: List[int]
+
+class ProgramGenerateRequest(ProgramBase):
+    max_total_hours: Optional[int] = None
+    max_hours_per_week: Optional[int] = None
+    difficulty_mix: Optional[Dict[DifficultyLevel, float]] = None
+    min_online_share: float = 0.0
+
+    @model_validator(mode="after")
+    def check_limits(self):
+        if self.total_duration_weeks <= 0:
+            raise ValueError("total_duration_weeks должно быть больше 0")
+        if self.max_total_hours is None and self.max_hours_per_week is None:
+            raise ValueError("Укажите max_total_hours и/или max_hours_per_week")
+        for limit in (self.max_total_hours, self.max_hours_per_week):
+            if limit is not None and limit <= 0:
+                raise ValueError("Бюджет часов должен быть больше 0")
+        if self.hours_budget() > GENERATE_MAX_HOURS:
+            raise ValueError(f"Бюджет часов не должен превышать {GENERATE_MAX_HOURS}")
+        if self.difficulty_mix is not None:
+            if any(share < 0 for share in self.difficulty_mix.values()):
+                raise ValueError("Доли difficulty_mix не могут быть отрицательными")
+            if sum(self.difficulty_mix.values()) > 1 + 1e-9:
+                raise ValueError("Сумма долей difficulty_mix не должна превышать 1")
+        if not 0 <= self.min_online_share <= 1:
+            raise ValueError("min_online_share должна быть от 0 до 1")
+        return self
+
+    def hours_budget(self) -> int:
+        """Меньшее из max_total_hours и max_hours_per_week * total_duration_weeks"""
+        limits = []
+        if self.max_total_hours is not None:
+            limits.append(self.max_total_hours)
+        if self.max_hours_per_week is not None:
+            limits.append(self.max_hours_per_week * self.total_duration_weeks)
+        return min(limits)
+
+class ProgramGenerated(BaseModel):
+    program: ProgramCreate
+    program_id: Optional[int] = None
+    hours_budget: int
+    total_hours: int
+    online_hours: int
+    hours_by_difficulty: Dict[DifficultyLevel, int]
+    candidate_count: int
+
+class CourseMissingPrerequisites(BaseModel):
+    course_id: int
+    missing_prerequisite_ids: List[int]
+
+class ProgramPrerequisiteCheck(BaseModel):
+    complete: bool
+    missing_course_ids: List[int]
+    courses: List[CourseMissingPrerequisites]
+
+class ProgramStats(BaseModel):
+    course_count: int
+    total_hours: int
+    lecture_hours: int
+    practice_hours: int
+    online_course_count: int
+    online_share: float
+    difficulty: Dict[DifficultyLevel, int]
+
+class ProgramOverlap(BaseModel):
+    program_id: int
+    name: str
+    course_count: int
+    shared_courses: int
+    jaccard: float
+    containment: float
+
+class ProgramOverlapPair(BaseModel):
+    program_id: int
+    program_name: str
+    other_program_id: int
+    other_program_name: str
+    shared_courses: int
+    jaccard: float
+    containment: float
+
 class Program(ProgramBase):
     id: int
     courses: List[Course] = []
+    # Только в списке программ с expand=course_ids (api/responses.py); модели ответа его не выводят
+    course_ids: Optional[List[int]] = Field(default=None, exclude=True)
+    stats: Optional[ProgramStats] = None
     
     class Config:
         from_attributes = True  
\ No newline at end of file
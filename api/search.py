@@ -0,0 +1,107 @@
+"""Полнотекстовый поиск курсов (SQLite FTS5).
+
+Индекс courses_fts - external content таблица над courses(title, description).
+Синхронизацию обеспечивают триггеры, поэтому индекс обновляется при любой записи
+в courses, включая массовые вставки. Для существующих баз:
+
+    python -m api.search rebuild
+"""
+import re
+import sys
+from sqlalchemy import column, func, literal_column, select, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from . import models
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_TOKENS = 16
+TITLE_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS courses_fts USING fts5(
+        title, description,
+        content='courses', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_insert AFTER INSERT ON courses BEGIN
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_delete AFTER DELETE ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS courses_fts_update AFTER UPDATE OF title, description ON courses BEGIN
+        INSERT INTO courses_fts(courses_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO courses_fts(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END""",
+]
+
+courses_fts = table("courses_fts", column("rowid"), column("title"), column("description"))
+_fts = literal_column("courses_fts")
+
+def create_search_index(conn: Connection):
+    """Создать FTS-таблицу и триггеры в транзакции conn; если таблица новая, проиндексировать существующие курсы"""
+    exists = conn.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'courses_fts'")
+    ).first()
+    for statement in FTS_DDL:
+        conn.exec_driver_sql(statement)
+    if not exists:
+        conn.exec_driver_sql("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+
+def ensure_search_index(engine: Engine):
+    """Создать FTS-таблицу и триггеры отдельной транзакцией (см. create_search_index)"""
+    with engine.begin() as conn:
+        create_search_index(conn)
+
+def rebuild_search_index(engine: Engine):
+    """Перестроить индекс по текущему содержимому courses и оптимизировать его"""
+    ensure_search_index(engine)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO courses_fts(courses_fts) VALUES ('rebuild')")
+        conn.exec_driver_sql("INSERT INTO courses_fts(courses_fts) VALUES ('optimize')")
+
+def match_expression(query: str) -> str | None:
+    """Преобразовать пользовательский запрос в выражение MATCH: все слова, с поиском по префиксу.
+    Синтаксис FTS5 во вводе не интерпретируется."""
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search_courses(db: Session, query: str, skip: int = 0, limit: int = 20) -> list[tuple]:
+    """Найти курсы по названию и описанию, отсортировав по bm25.
+    Возвращает кортежи (курс, название с подсветкой, фрагмент описания, ранг)."""
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    rank = func.bm25(_fts, TITLE_WEIGHT, DESCRIPTION_WEIGHT).label("rank")
+    statement = (
+        select(
+            models.DBCourse,
+            func.highlight(_fts, 0, HIGHLIGHT_START, HIGHLIGHT_END).label("title_highlight"),
+            func.snippet(_fts, 1, HIGHLIGHT_START, HIGHLIGHT_END, "…", SNIPPET_TOKENS).label("description_snippet"),
+            rank,
+        )
+        .join(courses_fts, courses_fts.c.rowid == models.DBCourse.id)
+        .where(_fts.op("MATCH")(expression))
+        .order_by(rank)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [tuple(row) for row in db.execute(statement)]
+
+if __name__ == "__main__":
+    from .database import engine
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("Использование: python -m api.search rebuild")
+    from .migrations import migrate
+
+    engine.echo = False
+    migrate(engine)
+    rebuild_search_index(engine)
+    print("Поисковый индекс перестроен")
@@ -1,18 +1,46 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from typing import List
-from . import models, schemas, crud
-from .database import SessionLocal, engine
+from typing import List, Optional
+from . import schemas, crud, search, migrations, similarity
+from .prerequisites import PrerequisiteCycleError
+from .responses import course_items, program_items, rows_response
+from .config import ASYNC_DB, METRICS_ENABLED, MIGRATE_ON_STARTUP, RELATIONSHIP_LOADING, BULK_CHUNK_SIZE, BULK_TRANSACTION_SIZE, BULK_MAX_ERRORS, EXPORT_BATCH_SIZE, SIMILAR_MAX_K, OVERLAP_MAX_K, OVERLAP_REPORT_MAX_PAIRS, DUPLICATE_THRESHOLD, DUPLICATE_MAX_PAIRS
+from .database import SessionLocal, engine, get_async_engine
+from .dependencies import (
+    get_db, check_etag, resolve_cursor, set_next_cursor,
+    course_filters, program_filters, course_fields, program_fields
+)
+from .instrumentation import MetricsMiddleware, REGISTRY
+from .slow_queries import enable_slow_query_log, close_slow_query_log
+from .streaming import iter_records, StreamFormatError, iter_ndjson, iter_csv
+from contextlib import asynccontextmanager
 from datetime import timedelta
 
-# Создаем таблицы в базе данных
-models.Base.metadata.create_all(bind=engine)
+# Схема БД проверяется и обновляется при старте воркера, а не при импорте модуля.
+# Если версия схемы актуальна, это одно чтение PRAGMA user_version (см. api/migrations.py)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MIGRATE_ON_STARTUP:
+        await run_in_threadpool(migrations.migrate, engine)
+    else:
+        await run_in_threadpool(migrations.check_schema, engine)
+    # Журнал медленных SQL-запросов: файл открывается при старте, а не при импорте модуля
+    engines = [engine, *([get_async_engine().sync_engine] if ASYNC_DB else [])]
+    slow_log = enable_slow_query_log(*engines)
+    # Индекс похожих курсов строится в фоне (api/similarity.py)
+    similarity.warm_up(SessionLocal)
+    yield
+    close_slow_query_log(slow_log, *engines)
 
 app = FastAPI(
     title="Интеллектуальный модуль образовательных программ",
     description="API для управления курсами и образовательными программами",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Настройки CORS
@@ -21,19 +49,40 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Query-Count", "X-Next-Cursor", "ETag", "Server-Timing"],
 )
 
-# Dependency для получения сессии базы данных
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Метрики каждого запроса: заголовки X-Query-Count и Server-Timing, эндпоинт /metrics
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+# Потоковый экспорт: своя сессия живет, пока отправляется ответ
+def export_response(iter_rows, columns: list[str], fmt: schemas.ExportFormat, filename: str) -> StreamingResponse:
+    """Ответ, который читает строки курсором и пишет их в NDJSON/CSV по мере отправки"""
+    def body():
+        db = SessionLocal()
+        try:
+            rows = iter_rows(db, batch_size=EXPORT_BATCH_SIZE)
+            if fmt == schemas.ExportFormat.CSV:
+                yield from iter_csv(rows, columns, EXPORT_BATCH_SIZE)
+            else:
+                yield from iter_ndjson(rows, EXPORT_BATCH_SIZE)
+        finally:
+            db.close()
+
+    if fmt == schemas.ExportFormat.CSV:
+        media_type, extension = "text/csv; charset=utf-8", "csv"
+    else:
+        media_type, extension = "application/x-ndjson", "ndjson"
+    return StreamingResponse(
+        body(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'}
+    )
 
 # ====================== КУРСЫ ======================
 @app.post("/courses/", 
-          response_model=schemas.Course,
+          response_model=schemas.CourseCreated,
           status_code=status.HTTP_201_CREATED,
           summary="Создать новый курс",
           tags=["Курсы"])
@@ -48,26 +97,179 @@ def create_course(course: schemas.CourseCreate, db: Session = Depends(get_db)):
     - **practice_hours**: Количество практических часов
     - **difficulty**: Уровень сложности (начальный/средний/продвинутый)
     - **has_online**: Доступна ли онлайн-версия
+    
+    Курс создается, даже если похож на существующие; такие курсы перечисляются
+    в possible_duplicates (сходство текста не ниже порога EDU_DUPLICATE_THRESHOLD).
     """
     return crud.create_course(db=db, course=course)
 
+@app.post("/courses/bulk",
+          response_model=schemas.BulkImportResult,
+          summary="Массовый импорт курсов",
+          tags=["Курсы"])
+async def bulk_create_courses(
+    request: Request,
+    transaction_size: int = Query(BULK_TRANSACTION_SIZE, ge=1),
+    db: Session = Depends(get_db)
+):
+    """
+    Импортирует курсы из потока NDJSON (одна запись на строку) или JSON-массива.
+    
+    Записи проверяются по схеме создания курса и вставляются пачками;
+    commit выполняется каждые transaction_size записей. Некорректные
+    записи пропускаются и возвращаются в списке ошибок с номерами строк.
+    
+    - **transaction_size**: Количество записей в одной транзакции
+    """
+    result = schemas.BulkImportResult(created=0, failed=0)
+    chunk: list[schemas.CourseCreate] = []
+    uncommitted = 0
+    last_row = 0
+
+    def reject(row: int, errors: list[str]):
+        result.failed += 1
+        if len(result.errors) < BULK_MAX_ERRORS:
+            result.errors.append(schemas.BulkRowError(row=row, errors=errors))
+
+    async def flush():
+        nonlocal uncommitted
+        inserted = await run_in_threadpool(crud.bulk_insert_courses, db, chunk)
+        chunk.clear()
+        uncommitted += inserted
+        if uncommitted >= transaction_size:
+            await run_in_threadpool(crud.commit_changes, db)
+            result.created += uncommitted
+            uncommitted = 0
+
+    try:
+        async for row, value, error in iter_records(request.stream()):
+            last_row = row
+            if error is not None:
+                reject(row, [error])
+                continue
+            if not isinstance(value, dict):
+                reject(row, ["Запись должна быть JSON-объектом"])
+                continue
+            try:
+                chunk.append(schemas.CourseCreate(**value))
+            except ValidationError as e:
+                reject(row, [
+                    f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+                ])
+                continue
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                await flush()
+    except StreamFormatError as e:
+        reject(last_row + 1, [str(e)])
+
+    await flush()
+    await run_in_threadpool(crud.commit_changes, db)
+    result.created += uncommitted
+    return result
+
 @app.get("/courses/", 
          response_model=List[schemas.Course],
          summary="Получить список всех курсов",
-         tags=["Курсы"])
-def read_courses(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
+def read_courses(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    order_by: schemas.CourseOrder = schemas.CourseOrder.ID,
+    cursor: Optional[str] = None,
+    filters: dict = Depends(course_filters),
+    fields: Optional[list[str]] = Depends(course_fields),
+    db: Session = Depends(get_db)
+):
     """
     Возвращает список всех курсов с пагинацией.
     
-    - **skip**: Сколько записей пропустить
+    - **skip**: Сколько записей пропустить (игнорируется при указании cursor)
     - **limit**: Максимальное количество возвращаемых записей
+    - **order_by**: Ключ сортировки (id/title/total_hours/difficulty/has_online)
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    - **difficulty**, **has_online**: Фильтры по сложности и онлайн-версии
+    - **min_hours** / **max_hours**: Диапазон общего количества часов
+    - **title_prefix**: Начало названия (с учетом регистра)
+    - **fields**: Вернуть только эти поля, например `fields=title,total_hours` (id возвращается всегда)
+    """
+    after = resolve_cursor(cursor, order_by.value)
+    rows = crud.get_course_rows(
+        db, fields or crud.COURSE_FIELDS, skip=skip, limit=limit, order_by=order_by.value, after=after, **filters
+    )
+    set_next_cursor(response, rows, limit, order_by.value)
+    return rows_response(response, course_items(rows, fields))
+
+@app.get("/courses/export",
+         summary="Экспорт всех курсов",
+         response_class=StreamingResponse,
+         tags=["Курсы"])
+def export_courses(format: schemas.ExportFormat = schemas.ExportFormat.NDJSON):
     """
-    return crud.get_courses(db, skip=skip, limit=limit)
+    Потоково выгружает все курсы в формате NDJSON или CSV.
+    
+    - **format**: Формат выгрузки (ndjson/csv)
+    """
+    return export_response(crud.iter_courses_for_export, crud.COURSE_EXPORT_COLUMNS, format, "courses")
+
+@app.get("/courses/search",
+         response_model=List[schemas.CourseSearchHit],
+         summary="Полнотекстовый поиск курсов",
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
+def search_courses(
+    q: str = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Ищет курсы по названию и описанию (все слова запроса, по префиксу).
+    Результаты упорядочены по релевантности (bm25, совпадения в названии весомее);
+    совпадения выделены тегами <mark>.
+    
+    - **q**: Поисковый запрос
+    - **skip**: Сколько результатов пропустить
+    - **limit**: Максимальное количество результатов
+    """
+    hits = search.search_courses(db, q, skip=skip, limit=limit)
+    return [
+        schemas.CourseSearchHit(
+            **schemas.Course.model_validate(course).dict(),
+            title_highlight=title_highlight,
+            description_snippet=description_snippet,
+            rank=rank,
+        )
+        for course, title_highlight, description_snippet, rank in hits
+    ]
+
+@app.get("/courses/duplicates",
+         response_model=List[schemas.CourseDuplicatePair],
+         summary="Найти почти одинаковые курсы",
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
+def read_duplicate_courses(
+    min_similarity: float = Query(DUPLICATE_THRESHOLD, ge=0.5, le=1),
+    limit: int = Query(100, ge=1, le=DUPLICATE_MAX_PAIRS),
+    db: Session = Depends(get_db)
+):
+    """
+    Возвращает пары курсов с почти одинаковыми названием и описанием по убыванию
+    сходства (оценка коэффициента Жаккара шинглов текста по MinHash-сигнатурам).
+    Сравниваются только курсы из общих корзин LSH; пары со сходством ниже 0,5
+    находятся ненадежно, поэтому меньший порог не принимается.
+    
+    - **min_similarity**: Наименьшее сходство
+    - **limit**: Количество пар
+    """
+    return crud.get_duplicate_courses(db, min_similarity=min_similarity, limit=limit)
 
 @app.get("/courses/{course_id}", 
          response_model=schemas.Course,
          summary="Получить курс по ID",
-         tags=["Курсы"])
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
 def read_course(course_id: int, db: Session = Depends(get_db)):
     """
     Возвращает полную информацию о курсе по его ID.
@@ -117,7 +319,8 @@ def delete_course(course_id: int, db: Session = Depends(get_db)):
 @app.get("/courses/{course_id}/programs",
          response_model=List[schemas.Program],
          summary="Получить программы, содержащие курс",
-         tags=["Курсы"])
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
 def get_programs_with_course(course_id: int, db: Session = Depends(get_db)):
     """
     Возвращает список всех программ, которые содержат указанный курс.
@@ -127,7 +330,103 @@ def get_programs_with_course(course_id: int, db: Session = Depends(get_db)):
     db_course = crud.get_course(db, course_id=course_id)
     if db_course is None:
         raise HTTPException(status_code=404, detail="Курс не найден")
-    return crud.get_programs_with_course(db, course_id=course_id)
+    return crud.get_programs_with_course(
+        db, course_id=course_id, load=RELATIONSHIP_LOADING["get_programs_with_course"]
+    )
+
+@app.post("/courses/{course_id}/prerequisites/{prerequisite_id}",
+          status_code=status.HTTP_200_OK,
+          summary="Добавить пререквизит курса",
+          tags=["Курсы"])
+def add_course_prerequisite(course_id: int, prerequisite_id: int, db: Session = Depends(get_db)):
+    """
+    Делает курс prerequisite_id обязательным для изучения перед курсом course_id.
+    Связь, создающая цикл зависимостей, отклоняется (409).
+    
+    - **course_id**: ID курса
+    - **prerequisite_id**: ID курса-пререквизита
+    """
+    try:
+        success = crud.add_course_prerequisite(db, course_id=course_id, prerequisite_id=prerequisite_id)
+    except PrerequisiteCycleError as e:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+    if not success:
+        raise HTTPException(
+            status_code=404,
+            detail="Курс или пререквизит не найдены, либо пререквизит уже добавлен"
+        )
+    return {"message": "Пререквизит успешно добавлен"}
+
+@app.delete("/courses/{course_id}/prerequisites/{prerequisite_id}",
+            status_code=status.HTTP_200_OK,
+            summary="Удалить пререквизит курса",
+            tags=["Курсы"])
+def remove_course_prerequisite(course_id: int, prerequisite_id: int, db: Session = Depends(get_db)):
+    """
+    Удаляет связь "курс требует пререквизит".
+    
+    - **course_id**: ID курса
+    - **prerequisite_id**: ID курса-пререквизита
+    """
+    success = crud.remove_course_prerequisite(db, course_id=course_id, prerequisite_id=prerequisite_id)
+    if not success:
+        raise HTTPException(status_code=404, detail="Курс не требует этого пререквизита")
+    return {"message": "Пререквизит успешно удален"}
+
+@app.get("/courses/{course_id}/prerequisites",
+         response_model=List[schemas.Course],
+         summary="Получить пререквизиты курса",
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
+def get_course_prerequisites(course_id: int, transitive: bool = True, db: Session = Depends(get_db)):
+    """
+    Возвращает курсы, которые нужно пройти перед указанным курсом.
+    
+    - **course_id**: ID курса
+    - **transitive**: Все пререквизиты, включая косвенные (по умолчанию), или только прямые
+    """
+    if crud.get_course(db, course_id=course_id) is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return crud.get_course_prerequisites(db, course_id=course_id, transitive=transitive)
+
+@app.get("/courses/{course_id}/unlocks",
+         response_model=List[schemas.Course],
+         summary="Получить курсы, открываемые курсом",
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
+def get_courses_unlocked_by(course_id: int, transitive: bool = True, db: Session = Depends(get_db)):
+    """
+    Возвращает курсы, для которых указанный курс является пререквизитом.
+    
+    - **course_id**: ID курса
+    - **transitive**: Все зависящие курсы, включая косвенно (по умолчанию), или только напрямую
+    """
+    if crud.get_course(db, course_id=course_id) is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return crud.get_courses_unlocked_by(db, course_id=course_id, transitive=transitive)
+
+@app.get("/courses/{course_id}/similar",
+         response_model=List[schemas.SimilarCourse],
+         summary="Получить похожие курсы",
+         tags=["Курсы"],
+         dependencies=[Depends(check_etag)])
+def get_similar_courses(
+    course_id: int,
+    k: int = Query(10, ge=1, le=SIMILAR_MAX_K),
+    db: Session = Depends(get_db)
+):
+    """
+    Возвращает k курсов, ближайших к указанному по названию, описанию, часам,
+    сложности и онлайн-доступности, по убыванию близости (similarity - косинус от -1 до 1).
+    
+    - **course_id**: ID курса
+    - **k**: Количество курсов
+    """
+    courses = crud.get_similar_courses(db, course_id=course_id, k=k)
+    if courses is None:
+        raise HTTPException(status_code=404, detail="Курс не найден")
+    return courses
 
 # ====================== ПРОГРАММЫ ======================
 @app.post("/programs/", 
@@ -146,34 +445,159 @@ def create_program(program: schemas.ProgramCreate, db: Session = Depends(get_db)
     """
     return crud.create_program(db=db, program=program)
 
-@app.get("/programs/", 
+@app.post("/programs/generate",
+          response_model=schemas.ProgramGenerated,
+          summary="Подобрать курсы программы под бюджет часов",
+          tags=["Программы"])
+def generate_program(
+    request: schemas.ProgramGenerateRequest,
+    response: Response,
+    save: bool = False,
+    db: Session = Depends(get_db)
+):
+    """
+    Подбирает курсы, которые наиболее полно заполняют бюджет часов программы.
+
+    - **name**, **description**, **total_duration_weeks**: Данные будущей программы
+    - **max_total_hours**: Наибольшая сумма часов курсов
+    - **max_hours_per_week**: Наибольшая нагрузка в неделю (бюджет - нагрузка * недели)
+    - **difficulty_mix**: Наибольшая доля часов каждого уровня сложности, например `{"начальный": 0.5, "средний": 0.5}`; уровни без доли не выбираются
+    - **min_online_share**: Наименьшая доля часов онлайн-курсов (1 - только онлайн-курсы)
+    - **save**: Сохранить программу (ответ 201 с program_id); без него поле program можно передать в POST /programs/
+    """
+    result = crud.generate_program(db, request=request, save=save)
+    if save:
+        response.status_code = status.HTTP_201_CREATED
+    return result
+
+@app.get("/programs/",
          response_model=List[schemas.Program],
          summary="Получить список всех программ",
-         tags=["Программы"])
-def read_programs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
+def read_programs(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    order_by: schemas.ProgramOrder = schemas.ProgramOrder.ID,
+    cursor: Optional[str] = None,
+    include_stats: bool = False,
+    expand: schemas.ProgramExpand = schemas.ProgramExpand.COURSES,
+    filters: dict = Depends(program_filters),
+    fields: Optional[list[str]] = Depends(program_fields),
+    db: Session = Depends(get_db)
+):
     """
     Возвращает список всех образовательных программ с пагинацией.
     
-    - **skip**: Сколько записей пропустить
+    - **skip**: Сколько записей пропустить (игнорируется при указании cursor)
     - **limit**: Максимальное количество возвращаемых записей
+    - **order_by**: Ключ сортировки (id/name/total_duration_weeks)
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
+    - **include_stats**: Добавить в ответ агрегаты программ (поле stats)
+    - **expand**: Состав программы: courses - курсы целиком, course_ids - только ID курсов, none - без состава
+    - **min_weeks** / **max_weeks**: Диапазон продолжительности в неделях
+    - **fields**: Вернуть только эти поля программы, например `fields=name` (id возвращается всегда)
     """
-    return crud.get_programs(db, skip=skip, limit=limit)
+    after = resolve_cursor(cursor, order_by.value)
+    rows = crud.get_program_rows(
+        db, fields or crud.PROGRAM_FIELDS, expand=expand.value, include_stats=include_stats,
+        skip=skip, limit=limit, order_by=order_by.value, after=after, **filters
+    )
+    set_next_cursor(response, rows, limit, order_by.value)
+    return rows_response(response, program_items(rows, fields, expand.value, include_stats))
+
+@app.get("/programs/export",
+         summary="Экспорт всех программ",
+         response_class=StreamingResponse,
+         tags=["Программы"])
+def export_programs(format: schemas.ExportFormat = schemas.ExportFormat.NDJSON):
+    """
+    Потоково выгружает все программы в формате NDJSON или CSV.
+    Состав программы передается списком ID курсов (в CSV - через ';').
+    
+    - **format**: Формат выгрузки (ndjson/csv)
+    """
+    return export_response(crud.iter_programs_for_export, crud.PROGRAM_EXPORT_COLUMNS, format, "programs")
+
+@app.get("/programs/overlaps",
+         response_model=List[schemas.ProgramOverlapPair],
+         summary="Отчет о пересечениях программ",
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
+def read_overlap_report(
+    min_jaccard: float = Query(0.5, ge=0, le=1),
+    min_containment: float = Query(0.0, ge=0, le=1),
+    by: schemas.OverlapMetric = schemas.OverlapMetric.JACCARD,
+    limit: int = Query(100, ge=1, le=OVERLAP_REPORT_MAX_PAIRS),
+    db: Session = Depends(get_db)
+):
+    """
+    Возвращает пары программ с общими курсами, у которых коэффициент Жаккара и доля
+    вложенности не ниже порогов, по убыванию выбранной метрики.
+    containment - доля курсов меньшей из двух программ, входящих в другую.
+    
+    - **min_jaccard**: Наименьший коэффициент Жаккара
+    - **min_containment**: Наименьшая доля вложенности
+    - **by**: Метрика сортировки (jaccard/containment)
+    - **limit**: Количество пар
+    """
+    return crud.get_overlap_report(
+        db, min_jaccard=min_jaccard, min_containment=min_containment, limit=limit, by=by.value
+    )
 
 @app.get("/programs/{program_id}", 
          response_model=schemas.Program,
          summary="Получить программу по ID",
-         tags=["Программы"])
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
 def read_program(program_id: int, db: Session = Depends(get_db)):
     """
     Возвращает полную информацию о программе по ее ID, включая список курсов.
     
     - **program_id**: ID программы
     """
-    db_program = crud.get_program(db, program_id=program_id)
+    db_program = crud.get_program(db, program_id=program_id, load=RELATIONSHIP_LOADING["read_program"])
     if db_program is None:
         raise HTTPException(status_code=404, detail="Программа не найдена")
     return db_program
 
+@app.get("/programs/{program_id}/stats",
+         response_model=schemas.ProgramStats,
+         summary="Получить агрегаты программы",
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
+def read_program_stats(program_id: int, db: Session = Depends(get_db)):
+    """
+    Возвращает сохраненные агрегаты программы: число курсов, суммы часов,
+    долю онлайн-курсов и распределение курсов по сложности.
+    
+    - **program_id**: ID программы
+    """
+    program_stats = crud.get_program_stats(db, program_id=program_id)
+    if program_stats is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return program_stats
+
+@app.get("/programs/{program_id}/prerequisite-check",
+         response_model=schemas.ProgramPrerequisiteCheck,
+         summary="Проверить полноту пререквизитов программы",
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
+def check_program_prerequisites(program_id: int, db: Session = Depends(get_db)):
+    """
+    Проверяет, что все пререквизиты курсов программы (включая косвенные) входят в программу.
+    
+    - **program_id**: ID программы
+    
+    В ответе: complete - программа полна; missing_course_ids - курсы, которые нужно добавить;
+    courses - курсы программы с недостающими пререквизитами.
+    """
+    result = crud.check_program_prerequisites(db, program_id=program_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return result
+
 @app.put("/programs/{program_id}", 
          response_model=schemas.Program,
          summary="Обновить данные программы",
@@ -209,6 +633,30 @@ def delete_program(program_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Программа не найдена")
     return {"ok": True}
 
+@app.patch("/programs/{program_id}/courses",
+           response_model=schemas.ProgramCoursesResult,
+           summary="Изменить состав программы",
+           tags=["Программы"])
+def update_program_courses(
+    program_id: int,
+    changes: schemas.ProgramCoursesUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Добавляет и удаляет несколько курсов программы одной транзакцией.
+    
+    - **program_id**: ID программы
+    - **add**: ID курсов для добавления
+    - **remove**: ID курсов для удаления
+    
+    В ответе: добавленные и удаленные ID, а также несуществующие курсы (missing),
+    уже входившие в программу (already_present) и отсутствовавшие в ней (not_in_program).
+    """
+    result = crud.update_program_courses(db, program_id=program_id, add=changes.add, remove=changes.remove)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return result
+
 @app.post("/programs/{program_id}/courses/{course_id}",
           status_code=status.HTTP_200_OK,
           summary="Добавить курс в программу",
@@ -255,21 +703,90 @@ def remove_course_from_program(
         )
     return {"message": "Курс успешно удален из программы"}
 
+@app.get("/programs/{program_id}/suggested-courses",
+         response_model=List[schemas.SimilarCourse],
+         summary="Получить курсы, рекомендуемые для программы",
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
+def get_suggested_courses(
+    program_id: int,
+    k: int = Query(10, ge=1, le=SIMILAR_MAX_K),
+    db: Session = Depends(get_db)
+):
+    """
+    Возвращает k курсов, не входящих в программу и наиболее похожих на какой-либо
+    из ее курсов, по убыванию близости. Для программы без курсов список пуст.
+    
+    - **program_id**: ID программы
+    - **k**: Количество курсов
+    """
+    courses = crud.get_suggested_courses(db, program_id=program_id, k=k)
+    if courses is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return courses
+
+@app.get("/programs/{program_id}/overlaps",
+         response_model=List[schemas.ProgramOverlap],
+         summary="Получить программы, пересекающиеся с программой",
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
+def get_program_overlaps(
+    program_id: int,
+    k: int = Query(10, ge=1, le=OVERLAP_MAX_K),
+    by: schemas.OverlapMetric = schemas.OverlapMetric.JACCARD,
+    db: Session = Depends(get_db)
+):
+    """
+    Возвращает k программ, имеющих общие курсы с указанной, по убыванию коэффициента
+    Жаккара (jaccard) или доли вложенности (containment - доля курсов меньшей из двух
+    программ, входящих в другую).
+    
+    - **program_id**: ID программы
+    - **k**: Количество программ
+    - **by**: Метрика сортировки (jaccard/containment)
+    """
+    found = crud.get_program_overlaps(db, program_id=program_id, k=k, by=by.value)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Программа не найдена")
+    return found
+
 @app.get("/programs/{program_id}/available-courses",
          response_model=List[schemas.Course],
          summary="Получить курсы, не входящие в программу",
-         tags=["Программы"])
-def get_available_courses(program_id: int, db: Session = Depends(get_db)):
+         tags=["Программы"],
+         dependencies=[Depends(check_etag)])
+def get_available_courses(
+    program_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Возвращает список курсов, которые еще не входят в указанную программу.
+    Возвращает список курсов, которые еще не входят в указанную программу, по возрастанию ID.
     
     - **program_id**: ID программы
+    - **skip**: Сколько записей пропустить (игнорируется при указании cursor)
+    - **limit**: Максимальное количество возвращаемых записей
+    - **cursor**: Курсор из заголовка X-Next-Cursor предыдущей страницы
     """
-    db_program = crud.get_program(db, program_id=program_id)
-    if db_program is None:
+    if not crud.program_exists(db, program_id):
         raise HTTPException(status_code=404, detail="Программа не найдена")
-    return crud.get_courses_not_in_program(db, program_id=program_id)
+    after = resolve_cursor(cursor, "id")
+    rows = crud.get_course_rows_not_in_program(db, program_id=program_id, skip=skip, limit=limit, after=after)
+    set_next_cursor(response, rows, limit, "id")
+    return rows_response(response, course_items(rows, None))
 
 @app.get("/health", include_in_schema=False)
 def health_check():
-    return {"status": "ok", "message": "Сервер работает нормально"}
\ No newline at end of file
+    return {"status": "ok", "message": "Сервер работает нормально"}
+
+@app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+# Асинхронный режим: основные эндпоинты обслуживаются через AsyncSession
+if ASYNC_DB:
+    from .routes_async import use_async_routes
+    use_async_routes(app)
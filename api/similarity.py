@@ -0,0 +1,274 @@
+"""Похожие курсы: векторный индекс в памяти процесса.
+
+Вектор курса - хешированный TF-IDF по словам и парам соседних слов названия (с двойным весом)
+и описания, размерности SIMILAR_TEXT_DIMENSIONS, со знаком от хеша (feature hashing),
+плюс числовые признаки: часы (логарифм, нормированный по каталогу), сложность и онлайн.
+Векторы нормированы, поэтому косинусная близость - скалярное произведение; все курсы
+хранятся одной матрицей float32, запрос - умножение блоков матрицы на пачку векторов-запросов.
+
+Индекс строится в фоне при старте сервера (или при первом запросе). crud обновляет его после commit: create/update_course
+перезаписывают строку курса, delete_course обнуляет ее; после массового импорта индекс
+строится заново. IDF фиксируется при построении и пересчитывается с нуля, когда изменено
+больше SIMILAR_REBUILD_FRACTION курсов. Индекс помнит ревизию каталога (api/cache.py), по которой
+построен: commit этого процесса продвигает ее вместе с изменениями индекса, а ревизия, измененная
+другим воркером или скриптом, перестраивает индекс при следующем запросе.
+"""
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from functools import lru_cache
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from . import models
+from .cache import catalog_revision
+from .config import SIMILAR_TEXT_DIMENSIONS, SIMILAR_REBUILD_FRACTION
+
+TITLE_WEIGHT = 2
+NUMERIC_WEIGHT = 0.35     # вес числовых признаков относительно текстовой части (норма 1)
+SEARCH_BLOCK_ROWS = 8192  # строк матрицы в одном умножении
+DIFFICULTY_FEATURE = {
+    models.DifficultyLevel.BEGINNER.value: -1.0,
+    models.DifficultyLevel.INTERMEDIATE.value: 0.0,
+    models.DifficultyLevel.ADVANCED.value: 1.0,
+}
+COURSE_COLUMNS = ["id", "title", "description", "total_hours", "difficulty", "has_online"]
+
+# Служебные слова не различают курсы, но занимают позиции вектора и сталкиваются по хешу со значимыми
+STOP_WORDS = frozenset(
+    "для по на из от до за при про без над под через что как это или его их все так же не ни "
+    "то бы ли уже они она оно мы вы the and for of to in on with an by or is are".split()
+)
+
+_word = re.compile(r"\w{2,}")
+
+def tokens(text: str | None) -> list[str]:
+    """Значимые слова текста и пары соседних слов"""
+    words = [word for word in _word.findall((text or "").lower()) if word not in STOP_WORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+def terms(title: str | None, description: str | None) -> Counter:
+    """Частоты терминов курса; термины названия учитываются TITLE_WEIGHT раз"""
+    counts = Counter()
+    for term in tokens(title):
+        counts[term] += TITLE_WEIGHT
+    counts.update(tokens(description))
+    return counts
+
+class _Vocabulary(dict):
+    """Термин -> номер; новый термин получает следующий номер"""
+
+    def __missing__(self, term: str) -> int:
+        number = self[term] = len(self)
+        return number
+
+@lru_cache(maxsize=1 << 16)
+def _bucket(term: str) -> tuple[int, float]:
+    """Позиция термина в векторе и знак (оба - из одного crc32)"""
+    code = zlib.crc32(term.encode("utf-8"))
+    return code % SIMILAR_TEXT_DIMENSIONS, 1.0 if code >> 31 else -1.0
+
+class CourseVectorIndex:
+    """Матрица векторов курсов и поиск ближайших по косинусу"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._built = False
+        self._stale = False
+        self._revision = ("", 0)                    # ревизия каталога, которой соответствует индекс
+        self._ids = np.zeros(0, dtype=np.int64)    # ID курса строки, 0 - свободная строка
+        self._matrix = np.zeros((0, SIMILAR_TEXT_DIMENSIONS + 3), dtype=np.float32)
+        self._rows: dict[int, int] = {}
+        self._free: list[int] = []
+        self._idf: dict[str, float] = {}
+        self._default_idf = 1.0
+        self._hours_mean = 0.0
+        self._hours_std = 1.0
+        self._changes = 0
+
+    # Векторы
+
+    def _finish(self, text: np.ndarray, courses: list[dict]) -> np.ndarray:
+        """Нормировать текстовую часть, добавить числовые признаки и нормировать вектор"""
+        text_norm = np.linalg.norm(text, axis=1, keepdims=True)
+        text = np.divide(text, text_norm, out=np.zeros_like(text), where=text_norm > 0)
+        hours = np.log1p(np.array([course["total_hours"] or 0 for course in courses], dtype=np.float64))
+        numeric = np.column_stack([
+            np.clip((hours - self._hours_mean) / self._hours_std / 2, -1.5, 1.5),
+            [DIFFICULTY_FEATURE.get(getattr(course["difficulty"], "value", course["difficulty"]), 0.0)
+             for course in courses],
+            [1.0 if course["has_online"] else -1.0 for course in courses],
+        ]) * NUMERIC_WEIGHT / math.sqrt(3)
+        vectors = np.hstack([text, numeric])
+        norm = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return np.divide(vectors, norm, out=np.zeros_like(vectors), where=norm > 0).astype(np.float32)
+
+    def _vector(self, course: dict) -> np.ndarray:
+        """Вектор одного курса с IDF, зафиксированным при построении"""
+        text = np.zeros((1, SIMILAR_TEXT_DIMENSIONS))
+        for term, count in terms(course["title"], course["description"]).items():
+            position, sign = _bucket(term)
+            text[0, position] += sign * (1 + math.log(count)) * self._idf.get(term, self._default_idf)
+        return self._finish(text, [course])[0]
+
+    def build(self, db: Session):
+        """Построить индекс по всем курсам базы.
+        Термины получают номера, частоты в курсах и документные частоты считаются
+        по массивам номеров, матрица собирается блоками по SEARCH_BLOCK_ROWS курсов"""
+        # Ревизия читается до курсов: изменение между ними даст лишнее перестроение, а не пропуск
+        revision = catalog_revision(db)
+        course = models.DBCourse
+        rows = db.execute(select(*[getattr(course, name) for name in COURSE_COLUMNS])).all()
+        courses = [dict(zip(COURSE_COLUMNS, row)) for row in rows]
+        count = len(courses)
+
+        vocabulary = _Vocabulary()
+        lengths, term_ids, weights = [], [], []
+        for item in courses:
+            title = list(map(vocabulary.__getitem__, tokens(item["title"])))
+            description = list(map(vocabulary.__getitem__, tokens(item["description"])))
+            term_ids += title + description
+            weights += [TITLE_WEIGHT] * len(title) + [1] * len(description)
+            lengths.append(len(title) + len(description))
+        size = max(len(vocabulary), 1)
+        documents = np.repeat(np.arange(count, dtype=np.int64), lengths)
+        keys, inverse = np.unique(documents * size + np.array(term_ids, dtype=np.int64), return_inverse=True)
+        frequency = np.bincount(inverse, weights=weights)          # частота термина в курсе
+        documents, term_ids = keys // size, keys % size
+        idf = np.log((1 + count) / (1 + np.bincount(term_ids, minlength=size))) + 1
+        buckets = [_bucket.__wrapped__(term) for term in vocabulary]
+        positions = np.array([position for position, _ in buckets], dtype=np.int64)
+        signs = np.array([sign for _, sign in buckets])
+        cells = positions[term_ids]
+        values = signs[term_ids] * (1 + np.log(frequency)) * idf[term_ids]
+        hours = np.log1p(np.array([item["total_hours"] or 0 for item in courses], dtype=np.float64))
+
+        with self._lock:
+            self._idf = dict(zip(vocabulary, idf.tolist()))
+            self._default_idf = math.log(1 + count) + 1
+            self._hours_mean = float(hours.mean()) if count else 0.0
+            self._hours_std = (float(hours.std()) if count else 0.0) or 1.0
+            self._matrix = np.zeros((count, SIMILAR_TEXT_DIMENSIONS + 3), dtype=np.float32)
+            bounds = np.searchsorted(documents, np.arange(0, count + SEARCH_BLOCK_ROWS, SEARCH_BLOCK_ROWS))
+            for block, start in enumerate(range(0, count, SEARCH_BLOCK_ROWS)):
+                stop = min(start + SEARCH_BLOCK_ROWS, count)
+                part = slice(bounds[block], bounds[block + 1])
+                text = np.bincount(
+                    (documents[part] - start) * SIMILAR_TEXT_DIMENSIONS + cells[part],
+                    weights=values[part], minlength=(stop - start) * SIMILAR_TEXT_DIMENSIONS
+                ).reshape(stop - start, SIMILAR_TEXT_DIMENSIONS)
+                self._matrix[start:stop] = self._finish(text, courses[start:stop])
+            self._ids = np.array([item["id"] for item in courses], dtype=np.int64)
+            self._rows = {course_id: row for row, course_id in enumerate(self._ids.tolist())}
+            self._free = []
+            self._changes = 0
+            self._revision = revision
+            self._built = True
+            self._stale = False
+
+    def ensure(self, db: Session):
+        """Построить индекс, если он еще не построен, устарел или каталог изменен другим процессом"""
+        revision = catalog_revision(db)
+        # Построение под блокировкой: изменения, зафиксированные во время чтения курсов,
+        # применяются после него и не теряются
+        with self._lock:
+            if not self._built or self._stale or revision != self._revision:
+                self.build(db)
+
+    # Изменения (вызываются из crud после commit)
+
+    def advance(self, revision: int):
+        """Учесть commit этого процесса, поднявший ревизию каталога до revision.
+        Если между ним и построением был чужой commit, индекс перестроится при следующем запросе"""
+        with self._lock:
+            epoch, current = self._revision
+            if current == revision - 1:
+                self._revision = (epoch, revision)
+
+    def upsert(self, course):
+        """Записать вектор созданного или измененного курса (ORM-объект или словарь)"""
+        if not isinstance(course, dict):
+            course = {name: getattr(course, name) for name in COURSE_COLUMNS}
+        with self._lock:
+            if not self._built:
+                return
+            row = self._rows.get(course["id"])
+            if row is None:
+                row = self._free.pop() if self._free else self._append_row()
+                self._rows[course["id"]] = row
+                self._ids[row] = course["id"]
+            self._matrix[row] = self._vector(course)
+            self._note_change()
+
+    def remove(self, course_id: int):
+        """Убрать курс из индекса"""
+        with self._lock:
+            row = self._rows.pop(course_id, None)
+            if row is None:
+                return
+            self._ids[row] = 0
+            self._matrix[row] = 0
+            self._free.append(row)
+            self._note_change()
+
+    def invalidate(self):
+        """Построить индекс заново при следующем запросе (после массовых изменений)"""
+        with self._lock:
+            self._stale = True
+
+    def _append_row(self) -> int:
+        row = len(self._rows) + len(self._free)
+        if row == len(self._ids):
+            capacity = max(16, len(self._ids) * 2)
+            matrix = np.zeros((capacity, self._matrix.shape[1]), dtype=np.float32)
+            matrix[:row] = self._matrix
+            ids = np.zeros(capacity, dtype=np.int64)
+            ids[:row] = self._ids
+            self._matrix, self._ids = matrix, ids
+        return row
+
+    def _note_change(self):
+        self._changes += 1
+        if self._changes > SIMILAR_REBUILD_FRACTION * max(len(self._rows), 1):
+            self._stale = True
+
+    # Поиск
+
+    def similar(self, db: Session, course_ids: list[int], k: int,
+                exclude: set[int] = frozenset()) -> list[tuple[int, float]]:
+        """k курсов, ближайших к любому из course_ids (по наибольшей близости к ним),
+        кроме самих course_ids и exclude: [(ID, близость)] по убыванию близости"""
+        self.ensure(db)
+        with self._lock:
+            rows = [self._rows[course_id] for course_id in course_ids if course_id in self._rows]
+            if not rows or k <= 0:
+                return []
+            queries = self._matrix[rows].T
+            size = len(self._rows) + len(self._free)
+            best = np.full(size, -np.inf, dtype=np.float32)
+            for start in range(0, size, SEARCH_BLOCK_ROWS):
+                stop = min(start + SEARCH_BLOCK_ROWS, size)
+                best[start:stop] = (self._matrix[start:stop] @ queries).max(axis=1)
+            ids = self._ids[:size].copy()
+        skipped = np.isin(ids, list(set(course_ids) | set(exclude))) | (ids == 0)
+        best[skipped] = -np.inf
+        k = min(k, int((~skipped).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-best, k - 1)[:k]
+        top = top[np.argsort(-best[top], kind="stable")]
+        return [(int(ids[row]), round(float(best[row]), 4)) for row in top]
+
+    def size(self) -> int:
+        return len(self._rows)
+
+index = CourseVectorIndex()
+
+def warm_up(session_factory):
+    """Построить индекс в фоновом потоке при старте сервера, чтобы первый запрос его не ждал"""
+    def run():
+        with session_factory() as db:
+            index.ensure(db)
+    threading.Thread(target=run, name="similarity-index", daemon=True).start()
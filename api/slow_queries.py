@@ -0,0 +1,162 @@
+"""Журнал медленных SQL-запросов.
+
+Запросы дольше порога (SLOW_QUERY_MS) с вероятностью SLOW_QUERY_SAMPLE_RATE
+пишутся в JSON-строках во вращаемый файл: текст, параметры, время, маршрут
+HTTP-запроса, вызвавшая функция crud и, по желанию, EXPLAIN QUERY PLAN.
+Запись в файл идет в отдельном потоке (QueueHandler -> QueueListener).
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from sqlalchemy import event
+from .config import (
+    SLOW_QUERY_MS, SLOW_QUERY_SAMPLE_RATE, SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_LOG, SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS
+)
+from .instrumentation import current_scope
+
+logger = logging.getLogger("api.slow_queries")
+
+# Модули, функции которых указываются как источник запроса
+SOURCE_MODULES = ("api.crud", "api.search", "api.stats")
+MAX_PARAM_CHARS = 200
+MAX_PARAM_ROWS = 5
+
+class JsonFormatter(logging.Formatter):
+    """Одна JSON-строка на запись; полезная нагрузка - словарь в record.msg"""
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {"ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")}
+        payload.update(record.msg)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+def _param(value):
+    if isinstance(value, (int, float, bool)) or value is None:
+        return value
+    text = str(value)
+    return text if len(text) <= MAX_PARAM_CHARS else text[:MAX_PARAM_CHARS] + "..."
+
+def _params(parameters, executemany: bool):
+    if executemany:
+        return {"rows": len(parameters), "first": [_params(row, False) for row in parameters[:MAX_PARAM_ROWS]]}
+    if isinstance(parameters, dict):
+        return {key: _param(value) for key, value in parameters.items()}
+    return [_param(value) for value in parameters or ()]
+
+def _source() -> str | None:
+    """Ближайшая по стеку функция из SOURCE_MODULES"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module in SOURCE_MODULES:
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+def _explain(conn, statement: str, parameters) -> list[str] | None:
+    """EXPLAIN QUERY PLAN через отдельный DBAPI-курсор (минуя события движка)"""
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    try:
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    except Exception as error:
+        return [f"EXPLAIN не выполнен: {error}"]
+
+class _RecordQueueHandler(QueueHandler):
+    """Передает запись в очередь как есть: форматирование (JSON) выполняется в потоке записи"""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class SlowQueryLog:
+    """Слушатели событий движка, отбирающие медленные запросы"""
+    def __init__(self, threshold_ms: float, sample_rate: float = 1.0, explain: bool = False):
+        self.threshold = threshold_ms / 1000
+        self.sample_rate = sample_rate
+        self.explain = explain
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._slow_started = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - getattr(context, "_slow_started", time.perf_counter())
+        if elapsed < self.threshold or random.random() >= self.sample_rate:
+            return
+        scope = current_scope.get()
+        route = scope.get("route") if scope else None
+        entry = {
+            "duration_ms": round(elapsed * 1000, 3),
+            "statement": statement,
+            "parameters": _params(parameters, executemany),
+            "route": getattr(route, "path", None),
+            "method": scope["method"] if scope else None,
+            "source": _source(),
+        }
+        if self.explain and not executemany:
+            entry["plan"] = _explain(conn, statement, parameters)
+        logger.warning(entry)
+
+    def attach(self, target):
+        """Подключить к движку (для AsyncEngine передается его sync_engine)"""
+        if not event.contains(target, "after_cursor_execute", self.after_cursor_execute):
+            event.listen(target, "before_cursor_execute", self.before_cursor_execute)
+            event.listen(target, "after_cursor_execute", self.after_cursor_execute)
+
+    def detach(self, target):
+        """Отключить от движка"""
+        if event.contains(target, "after_cursor_execute", self.after_cursor_execute):
+            event.remove(target, "before_cursor_execute", self.before_cursor_execute)
+            event.remove(target, "after_cursor_execute", self.after_cursor_execute)
+
+_listener: QueueListener | None = None
+_queue_handler: QueueHandler | None = None
+
+def configure_slow_query_log(path: str, max_bytes: int, backup_count: int):
+    """Направить журнал в вращаемый файл через очередь и фоновый поток"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return
+    file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    records = queue.SimpleQueue()
+    _queue_handler = _RecordQueueHandler(records)
+    logger.addHandler(_queue_handler)
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+    _listener = QueueListener(records, file_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def enable_slow_query_log(*targets) -> SlowQueryLog | None:
+    """Включить журнал с настройками из config для указанных движков"""
+    if SLOW_QUERY_MS <= 0:
+        return None
+    configure_slow_query_log(SLOW_QUERY_LOG, SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS)
+    slow_log = SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_SAMPLE_RATE, SLOW_QUERY_EXPLAIN)
+    for target in targets:
+        slow_log.attach(target)
+    return slow_log
+
+def close_slow_query_log(slow_log: SlowQueryLog | None, *targets):
+    """Отключить журнал от движков, дописать очередь в файл и остановить поток записи"""
+    global _listener, _queue_handler
+    if slow_log is not None:
+        for target in targets:
+            slow_log.detach(target)
+    if _listener is None:
+        return
+    logger.removeHandler(_queue_handler)
+    _listener.stop()
+    atexit.unregister(_listener.stop)
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _queue_handler = None
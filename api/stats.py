@@ -0,0 +1,177 @@
+"""Агрегаты программ: число курсов, часы, онлайн-курсы и распределение по сложности.
+
+Хранятся в колонках programs и обновляются приращениями в тех же транзакциях,
+что и изменения состава программ или курсов (см. crud). Проверка согласованности
+с пересчетом с нуля:
+
+    python -m api.stats check [--fix]
+"""
+import sys
+from sqlalchemy import bindparam, case, func, inspect, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from . import models
+
+DIFFICULTY_COLUMNS = {
+    models.DifficultyLevel.BEGINNER: "beginner_count",
+    models.DifficultyLevel.INTERMEDIATE: "intermediate_count",
+    models.DifficultyLevel.ADVANCED: "advanced_count",
+}
+
+STAT_COLUMNS = [
+    "course_count", "total_hours", "lecture_hours", "practice_hours",
+    "online_course_count", *DIFFICULTY_COLUMNS.values()
+]
+
+def _aggregates():
+    """Выражения агрегатов по курсам в порядке STAT_COLUMNS"""
+    course = models.DBCourse
+    return [
+        func.count(course.id),
+        func.coalesce(func.sum(course.total_hours), 0),
+        func.coalesce(func.sum(course.lecture_hours), 0),
+        func.coalesce(func.sum(course.practice_hours), 0),
+        func.coalesce(func.sum(case((course.has_online, 1), else_=0)), 0),
+        *[
+            func.coalesce(func.sum(case((course.difficulty == level, 1), else_=0)), 0)
+            for level in DIFFICULTY_COLUMNS
+        ],
+    ]
+
+def course_vector(course: dict) -> dict:
+    """Вклад одного курса в агрегаты программы"""
+    vector = {
+        "course_count": 1,
+        "total_hours": course["total_hours"] or 0,
+        "lecture_hours": course["lecture_hours"] or 0,
+        "practice_hours": course["practice_hours"] or 0,
+        "online_course_count": int(bool(course["has_online"])),
+    }
+    for level, column in DIFFICULTY_COLUMNS.items():
+        vector[column] = int(course["difficulty"] == level)
+    return vector
+
+def _increment(delta: dict) -> dict:
+    table = models.DBProgram.__table__
+    return {column: table.c[column] + value for column, value in delta.items() if value}
+
+def add_courses_to_stats(db: Session, program_id: int, course_ids: list[int], sign: int = 1):
+    """Учесть добавление (sign=1) или удаление (sign=-1) курсов программы"""
+    if not course_ids:
+        return
+    totals = dict.fromkeys(STAT_COLUMNS, 0)
+    for start in range(0, len(course_ids), 500):
+        chunk = course_ids[start:start + 500]
+        row = db.execute(select(*_aggregates()).where(models.DBCourse.id.in_(chunk))).one()
+        for column, value in zip(STAT_COLUMNS, row):
+            totals[column] += sign * value
+    values = _increment(totals)
+    if values:
+        db.execute(update(models.DBProgram).where(models.DBProgram.id == program_id).values(values))
+
+def apply_course_change(db: Session, course_id: int, old: dict | None, new: dict | None):
+    """Перенести изменение курса (old -> new; None - курса нет) во все программы, где он есть"""
+    old_vector = course_vector(old) if old is not None else dict.fromkeys(STAT_COLUMNS, 0)
+    new_vector = course_vector(new) if new is not None else dict.fromkeys(STAT_COLUMNS, 0)
+    values = _increment({column: new_vector[column] - old_vector[column] for column in STAT_COLUMNS})
+    if not values:
+        return
+    link = models.program_courses
+    db.execute(
+        update(models.DBProgram)
+        .where(models.DBProgram.id.in_(select(link.c.program_id).where(link.c.course_id == course_id)))
+        .values(values)
+    )
+
+def _actual_stats_query():
+    """Агрегаты всех программ, посчитанные с нуля по program_courses"""
+    link = models.program_courses
+    return (
+        select(models.DBProgram.id, *_aggregates())
+        .select_from(models.DBProgram)
+        .outerjoin(link, link.c.program_id == models.DBProgram.id)
+        .outerjoin(models.DBCourse, models.DBCourse.id == link.c.course_id)
+        .group_by(models.DBProgram.id)
+    )
+
+def check_program_stats(db: Session) -> list[dict]:
+    """Сравнить сохраненные агрегаты с пересчитанными; вернуть расхождения"""
+    table = models.DBProgram.__table__
+    stored = {
+        row[0]: row[1:]
+        for row in db.execute(select(table.c.id, *[table.c[column] for column in STAT_COLUMNS]))
+    }
+    mismatches = []
+    for row in db.execute(_actual_stats_query()):
+        program_id, actual = row[0], row[1:]
+        for column, stored_value, actual_value in zip(STAT_COLUMNS, stored[program_id], actual):
+            if stored_value != actual_value:
+                mismatches.append({
+                    "program_id": program_id, "column": column,
+                    "stored": stored_value, "actual": actual_value,
+                })
+    return mismatches
+
+def recompute_program_stats(db: Session | Connection):
+    """Пересчитать агрегаты всех программ с нуля (без commit)"""
+    rows = [
+        {"program_id": row[0], **dict(zip(STAT_COLUMNS, row[1:]))}
+        for row in db.execute(_actual_stats_query())
+    ]
+    if rows:
+        table = models.DBProgram.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("program_id")),
+            rows,
+        )
+
+def add_stats_columns(conn: Connection):
+    """Добавить недостающие колонки агрегатов в таблицу programs и заполнить их (в транзакции conn)"""
+    existing = {column["name"] for column in inspect(conn).get_columns("programs")}
+    missing = [column for column in STAT_COLUMNS if column not in existing]
+    if not missing:
+        return
+    for column in missing:
+        conn.exec_driver_sql(f"ALTER TABLE programs ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+    recompute_program_stats(conn)
+
+def program_stats(program: models.DBProgram) -> dict:
+    """Агрегаты программы в виде schemas.ProgramStats"""
+    return stats_from_columns({column: getattr(program, column) for column in STAT_COLUMNS})
+
+def stats_from_columns(values: dict) -> dict:
+    """Агрегаты в виде schemas.ProgramStats из значений колонок STAT_COLUMNS"""
+    course_count = values["course_count"] or 0
+    return {
+        "course_count": course_count,
+        "total_hours": values["total_hours"],
+        "lecture_hours": values["lecture_hours"],
+        "practice_hours": values["practice_hours"],
+        "online_course_count": values["online_course_count"],
+        "online_share": values["online_course_count"] / course_count if course_count else 0.0,
+        "difficulty": {level.value: values[column] for level, column in DIFFICULTY_COLUMNS.items()},
+    }
+
+if __name__ == "__main__":
+    from .cache import bump_revision
+    from .database import engine
+
+    args = sys.argv[1:]
+    if not args or args[0] != "check" or args[1:] not in ([], ["--fix"]):
+        sys.exit("Использование: python -m api.stats check [--fix]")
+    engine.echo = False
+    with Session(engine) as db:
+        mismatches = check_program_stats(db)
+        for mismatch in mismatches:
+            print(
+                f"Программа {mismatch['program_id']}: {mismatch['column']} = {mismatch['stored']}, "
+                f"пересчет дает {mismatch['actual']}"
+            )
+        if mismatches and "--fix" in args:
+            recompute_program_stats(db)
+            bump_revision(db)
+            db.commit()
+            print("Агрегаты пересчитаны")
+        elif not mismatches:
+            print("Агрегаты программ согласованы")
+    sys.exit(1 if mismatches and "--fix" not in args else 0)
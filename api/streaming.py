@@ -0,0 +1,146 @@
+import codecs
+import csv
+import io
+import json
+from enum import Enum
+from typing import AsyncIterator, Iterable, Iterator
+
+# Потоковый разбор тела запроса: NDJSON (одна запись на строку) или JSON-массив.
+# В памяти держится только текущая запись, а не все тело целиком.
+
+MAX_RECORD_CHARS = 1_000_000
+
+class StreamFormatError(ValueError):
+    """Тело запроса нельзя разобрать дальше (поврежден JSON-массив)"""
+
+def _skip_whitespace(buffer: str, pos: int) -> int:
+    while pos < len(buffer) and buffer[pos] in " \t\r\n":
+        pos += 1
+    return pos
+
+async def _iter_text(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+async def iter_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, object, str | None]]:
+    """Разбирает поток байтов на записи.
+    Отдает кортежи (номер записи, значение, ошибка разбора или None).
+    Формат определяется по первому символу: '[' - JSON-массив, иначе NDJSON."""
+    text = _iter_text(chunks)
+    buffer = ""
+    async for piece in text:
+        buffer += piece
+        if buffer.strip():
+            break
+    if buffer.lstrip().startswith("["):
+        records = _iter_array(buffer, text)
+    else:
+        records = _iter_lines(buffer, text)
+    async for record in records:
+        yield record
+
+async def _iter_lines(buffer: str, text: AsyncIterator[str]):
+    row = 0
+    done = False
+    while True:
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            row += 1
+            try:
+                yield row, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield row, None, f"Некорректный JSON: {e.msg}"
+        if done:
+            break
+        if len(buffer) > MAX_RECORD_CHARS:
+            raise StreamFormatError(f"Запись {row + 1} длиннее {MAX_RECORD_CHARS} символов")
+        try:
+            buffer += await text.__anext__()
+        except StopAsyncIteration:
+            buffer += "\n"
+            done = True
+
+async def _iter_array(buffer: str, text: AsyncIterator[str]):
+    decoder = json.JSONDecoder()
+    pos = _skip_whitespace(buffer, 0) + 1
+    row = 0
+    expect_value = True
+    eof = False
+    while True:
+        pos = _skip_whitespace(buffer, pos)
+        if pos < len(buffer):
+            if not expect_value:
+                if buffer[pos] == "]":
+                    return
+                if buffer[pos] != ",":
+                    raise StreamFormatError(f"Ожидалась ',' или ']' после записи {row}")
+                pos += 1
+                expect_value = True
+                continue
+            if buffer[pos] == "]" and row == 0:
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                # Запись могла прийти не целиком - дочитываем поток
+                if eof:
+                    raise StreamFormatError(f"Некорректный JSON в записи {row + 1}: {e.msg}")
+                if len(buffer) - pos > MAX_RECORD_CHARS:
+                    raise StreamFormatError(f"Запись {row + 1} длиннее {MAX_RECORD_CHARS} символов")
+            else:
+                # Число в конце буфера может продолжиться в следующем фрагменте
+                if end < len(buffer) or eof:
+                    row += 1
+                    yield row, value, None
+                    buffer, pos = buffer[end:], 0
+                    expect_value = False
+                    continue
+        elif eof:
+            raise StreamFormatError("JSON-массив не закрыт")
+        try:
+            buffer += await text.__anext__()
+        except StopAsyncIteration:
+            eof = True
+
+# Потоковая запись: NDJSON или CSV, по пачке строк на фрагмент ответа
+
+def _plain(value):
+    return value.value if isinstance(value, Enum) else value
+
+def iter_ndjson(rows: Iterable[dict], batch_size: int) -> Iterator[str]:
+    """Сериализует записи в NDJSON, отдавая по batch_size строк за раз"""
+    batch = []
+    for row in rows:
+        batch.append(json.dumps({key: _plain(value) for key, value in row.items()}, ensure_ascii=False))
+        if len(batch) >= batch_size:
+            yield "\n".join(batch) + "\n"
+            batch.clear()
+    if batch:
+        yield "\n".join(batch) + "\n"
+
+def iter_csv(rows: Iterable[dict], columns: list[str], batch_size: int) -> Iterator[str]:
+    """Сериализует записи в CSV с заголовком; списки записываются через ';'"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([
+            ";".join(str(item) for item in value) if isinstance(value, list) else _plain(value)
+            for value in (row[column] for column in columns)
+        ])
+        count += 1
+        if count >= batch_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue()
@@ -0,0 +1,83 @@
+"""Микробенчмарки функций api/crud.py на синтетическом каталоге (bench/generate.py).
+
+Запуск: python -m bench.crud_micro [--courses 20000] [--programs 500] [--density 0.01]
+                                   [--repeat 200] [--output crud.json]
+Каждый вызов выполняется в новой сессии; результат - p50/p95/p99 в миллисекундах.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy.orm import Session
+
+from api import crud, schemas, search
+from bench.generate import create_catalog
+from bench.vocabulary import WORDS
+from bench.report import latency_summary, write_report
+
+COURSE = schemas.CourseCreate(
+    title="Новый курс", description="Описание", total_hours=72, lecture_hours=36,
+    practice_hours=36, difficulty=schemas.DifficultyLevel.INTERMEDIATE, has_online=True
+)
+
+def cases(courses: int, programs: int, rng: random.Random) -> dict:
+    """Имя -> функция (db) с одним вызовом crud; записи выбираются случайно"""
+    course_id = lambda: rng.randint(1, courses)
+    program_id = lambda: rng.randint(1, programs)
+    return {
+        "get_course": lambda db: crud.get_course(db, course_id()),
+        "get_courses_page": lambda db: crud.get_courses(db, skip=rng.randint(0, courses - 100), limit=100),
+        "get_courses_filtered": lambda db: crud.get_courses(
+            db, limit=100, difficulty=schemas.DifficultyLevel.ADVANCED, has_online=True, min_hours=60
+        ),
+        "get_courses_by_title": lambda db: crud.get_courses(db, limit=100, order_by="title"),
+        "get_program": lambda db: crud.get_program(db, program_id(), load="joined").courses,
+        "get_programs_page": lambda db: crud.get_programs(db, limit=100),
+        "get_program_stats": lambda db: crud.get_program_stats(db, program_id()),
+        "get_programs_with_course": lambda db: crud.get_programs_with_course(db, course_id()),
+        "get_courses_not_in_program": lambda db: crud.get_courses_not_in_program(db, program_id(), limit=100),
+        "search_courses": lambda db: search.search_courses(db, rng.choice(WORDS[:500]), limit=20),
+        "create_course": lambda db: crud.create_course(db, COURSE),
+        "update_course": lambda db: crud.update_course(db, course_id(), COURSE),
+        "update_program_courses": lambda db: crud.update_program_courses(
+            db, program_id(), add=[course_id() for _ in range(5)], remove=[course_id() for _ in range(5)]
+        ),
+    }
+
+def run(engine, name: str, case, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            case(db)
+            samples.append((time.perf_counter() - started) * 1000)
+    return latency_summary(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20000)
+    parser.add_argument("--programs", type=int, default=500)
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--only", nargs="*", help="Запустить только указанные функции")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, counts = create_catalog(
+            os.path.join(tmp, "bench.db"), args.courses, args.programs, args.density, args.seed
+        )
+        rng = random.Random(args.seed)
+        results = {
+            name: run(engine, name, case, args.repeat)
+            for name, case in cases(args.courses, args.programs, rng).items()
+            if not args.only or name in args.only
+        }
+        engine.dispose()
+
+    write_report("crud_micro", {**vars(args), **counts}, results, args.output)
+
+if __name__ == "__main__":
+    main()
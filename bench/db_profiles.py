@@ -0,0 +1,90 @@
+"""Сравнение пропускной способности чтения/записи для профилей БД из api/config.py.
+
+Запуск: python -m bench.db_profiles [--seconds 5] [--readers 4] [--courses 10000]
+Каждый профиль проверяется на отдельной временной базе; SQL-лог отключается.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from api import crud, models, schemas
+from api.config import DB_PROFILES, load_db_settings
+from api.database import Base, create_db_engine
+
+COURSE = schemas.CourseCreate(
+    title="Курс", description="Описание", total_hours=72, lecture_hours=36,
+    practice_hours=36, difficulty=schemas.DifficultyLevel.INTERMEDIATE, has_online=True
+)
+
+def seed(engine, count: int):
+    with engine.begin() as conn:
+        conn.execute(insert(models.DBCourse), [COURSE.dict() for _ in range(count)])
+
+def run_workers(seconds: float, workers: list) -> list[int]:
+    """Запустить функции-нагрузки в потоках на seconds секунд, вернуть число операций каждой"""
+    stop = threading.Event()
+    counts = [0] * len(workers)
+
+    def loop(index, work):
+        while not stop.is_set():
+            work()
+            counts[index] += 1
+
+    threads = [threading.Thread(target=loop, args=(i, work)) for i, work in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return counts
+
+def bench_profile(profile: str, seconds: float, readers: int, courses: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = load_db_settings(profile)
+        settings.update(url=f"sqlite:///{os.path.join(tmp, 'bench.db')}", echo=False)
+        engine = create_db_engine(settings)
+        Base.metadata.create_all(bind=engine)
+        seed(engine, courses)
+        Session = sessionmaker(bind=engine)
+
+        def write():
+            with Session() as db:
+                crud.create_course(db, COURSE)
+
+        def read():
+            with Session() as db:
+                crud.get_course(db, random.randint(1, courses))
+
+        writes_only = run_workers(seconds, [write])[0]
+        reads_only = sum(run_workers(seconds, [read] * readers))
+        mixed = run_workers(seconds, [write] + [read] * readers)
+        engine.dispose()
+
+    return {
+        "profile": profile,
+        "writes_per_sec": round(writes_only / seconds, 1),
+        "reads_per_sec": round(reads_only / seconds, 1),
+        "mixed_writes_per_sec": round(mixed[0] / seconds, 1),
+        "mixed_reads_per_sec": round(sum(mixed[1:]) / seconds, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", nargs="+", default=list(DB_PROFILES))
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--courses", type=int, default=10000)
+    args = parser.parse_args()
+
+    results = [bench_profile(p, args.seconds, args.readers, args.courses) for p in args.profiles]
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
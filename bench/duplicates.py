@@ -0,0 +1,135 @@
+"""Поиск дубликатов курсов (api/duplicates.py): корзины LSH против сравнения со всеми курсами.
+
+Запуск: python -m bench.duplicates [--courses 50000] [--copies 200] [--output duplicates.json]
+В каталог добавляются копии случайных курсов с измененным названием (как при повторном
+создании курса другой кафедрой) через crud.create_course. Измеряются: пересчет сигнатур
+всего каталога, поиск похожих перед вставкой по корзинам LSH и перебором всех сигнатур,
+создание курса с проверкой, отчет GET /courses/duplicates. Полнота - доля копий, для которых
+create_course вернул исходный курс в possible_duplicates, всех и тех, у которых точный
+коэффициент Жаккара шинглов с исходным курсом не ниже порога.
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from api import crud, duplicates, models, schemas
+from api.config import DUPLICATE_THRESHOLD
+from bench.generate import create_catalog
+from bench.report import latency_summary, write_report
+from bench.vocabulary import random_text
+
+def timed(engine, repeat: int, call) -> dict:
+    samples = []
+    for i in range(repeat):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            call(db, i)
+            samples.append((time.perf_counter() - started) * 1000)
+    return latency_summary(samples)
+
+def similar_by_scan(db: Session, signature: np.ndarray, threshold: float) -> list[int]:
+    """Без корзин: все сигнатуры каталога сравниваются с данной"""
+    table = models.course_minhash
+    rows = db.execute(select(table.c.course_id, table.c.signature)).all()
+    matrix = np.frombuffer(b"".join(data for _, data in rows), dtype=np.uint32).reshape(len(rows), -1)
+    scores = duplicates.similarity(signature, matrix)
+    return [rows[i][0] for i in np.flatnonzero(scores >= threshold)]
+
+def shingle_set(title: str, description: str | None) -> set[str]:
+    text = duplicates.normalize(title, description)
+    return {text[i:i + duplicates.SHINGLE_SIZE] for i in range(max(1, len(text) - duplicates.SHINGLE_SIZE + 1))}
+
+def renamed(course: models.DBCourse, rng: random.Random) -> schemas.CourseCreate:
+    """Копия курса с измененным названием"""
+    words = course.title.split()
+    words[rng.randrange(len(words))] = random_text(1, rng)
+    return schemas.CourseCreate(
+        title=" ".join(words), description=course.description, total_hours=course.total_hours,
+        lecture_hours=course.lecture_hours, practice_hours=course.practice_hours,
+        difficulty=course.difficulty.value, has_online=course.has_online,
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=50000)
+    parser.add_argument("--copies", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--scan-repeat", type=int, default=10)
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    logging.getLogger(crud.__name__).setLevel(logging.ERROR)   # предупреждения о каждой копии не нужны
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, counts = create_catalog(os.path.join(tmp, "bench.db"), args.courses, 1, 0.0, args.seed)
+        with Session(engine) as db:
+            started = time.perf_counter()
+            duplicates.rebuild_signatures(db)
+            db.commit()
+            rebuild_s = time.perf_counter() - started
+            bucket_rows = db.execute(select(func.count()).select_from(models.course_lsh_buckets)).scalar()
+            originals = [db.get(models.DBCourse, rng.randint(1, args.courses)) for _ in range(args.copies)]
+            copies = [renamed(course, rng) for course in originals]
+            # Точный коэффициент Жаккара шинглов копии и исходного курса
+            exact = [
+                len(a & b) / len(a | b)
+                for a, b in (
+                    (shingle_set(course.title, course.description), shingle_set(copy.title, copy.description))
+                    for course, copy in zip(originals, copies)
+                )
+            ]
+            originals = [course.id for course in originals]
+            probes = [
+                duplicates.signature(course.title, course.description)
+                for course in (db.get(models.DBCourse, rng.randint(1, args.courses)) for _ in range(args.repeat))
+            ]
+
+        found = []
+        create_samples = []
+        for original, copy in zip(originals, copies):
+            with Session(engine) as db:
+                started = time.perf_counter()
+                created = crud.create_course(db, copy)
+                create_samples.append((time.perf_counter() - started) * 1000)
+                found.append(original in {item["id"] for item in created.possible_duplicates})
+
+        results = {
+            "create_course": latency_summary(create_samples),
+            "check_lsh": timed(
+                engine, args.repeat, lambda db, i: duplicates.find_similar(db, probes[i], args.threshold)
+            ),
+            "check_scan": timed(
+                engine, args.scan_repeat, lambda db, i: similar_by_scan(db, probes[i], args.threshold)
+            ),
+            "report": timed(
+                engine, 5, lambda db, i: crud.get_duplicate_courses(db, args.threshold, limit=1000)
+            ),
+        }
+        with Session(engine) as db:
+            pairs = len(crud.get_duplicate_courses(db, args.threshold, limit=10**9))
+        engine.dispose()
+
+    config = {
+        **vars(args), **counts,
+        "rebuild_s": round(rebuild_s, 2),
+        "bucket_rows": bucket_rows,
+        "copy_recall": round(sum(found) / max(len(copies), 1), 3),
+        "copies_above_threshold": sum(value >= args.threshold for value in exact),
+        "copy_recall_above_threshold": round(
+            sum(hit for hit, value in zip(found, exact) if value >= args.threshold)
+            / max(sum(value >= args.threshold for value in exact), 1), 3
+        ),
+        "duplicate_pairs": pairs,
+    }
+    write_report("duplicates", config, results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Генератор синтетического каталога: курсы, программы и их состав.
+
+Запуск: python -m bench.generate PATH [--courses 10000] [--programs 500] [--density 0.01] [--seed 1]
+Создает базу SQLite по пути PATH (схема, индексы, поисковый индекс, агрегаты программ, сигнатуры дубликатов).
+--density - средняя доля каталога в одной программе.
+"""
+import argparse
+import json
+import random
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from api import duplicates, models, stats
+from api.config import load_db_settings
+from api.database import create_db_engine
+from api.migrations import migrate
+from bench.vocabulary import random_text
+
+LEVELS = list(models.DifficultyLevel)
+
+def course_rows(rng: random.Random, count: int) -> list[dict]:
+    rows = []
+    for _ in range(count):
+        lecture = rng.randrange(8, 80, 2)
+        practice = rng.randrange(0, 120, 2)
+        rows.append(dict(
+            title=random_text(rng.randint(2, 5), rng).capitalize(),
+            description=random_text(rng.randint(10, 60), rng),
+            total_hours=lecture + practice,
+            lecture_hours=lecture,
+            practice_hours=practice,
+            difficulty=rng.choices(LEVELS, weights=[5, 3, 2])[0],
+            has_online=rng.random() < 0.4,
+        ))
+    return rows
+
+def generate(engine, courses: int, programs: int, density: float, seed: int = 1, batch: int = 10000) -> dict:
+    """Заполнить пустую базу синтетическим каталогом; вернуть число созданных записей"""
+    rng = random.Random(seed)
+    migrate(engine)
+
+    for start in range(0, courses, batch):
+        with engine.begin() as conn:
+            conn.execute(insert(models.DBCourse), course_rows(rng, min(batch, courses - start)))
+    with engine.begin() as conn:
+        conn.execute(insert(models.DBProgram), [
+            dict(
+                name=f"Программа {i + 1}: {random_text(3, rng)}",
+                description=random_text(rng.randint(10, 30), rng),
+                total_duration_weeks=rng.randint(4, 52),
+            )
+            for i in range(programs)
+        ])
+
+    links = 0
+    mean_size = density * courses
+    for program_id in range(1, programs + 1):
+        size = min(courses, max(0, round(rng.gauss(mean_size, mean_size / 3))))
+        rows = [dict(program_id=program_id, course_id=c) for c in rng.sample(range(1, courses + 1), size)]
+        if rows:
+            with engine.begin() as conn:
+                conn.execute(insert(models.program_courses), rows)
+        links += len(rows)
+
+    with Session(engine) as db:
+        stats.recompute_program_stats(db)
+        duplicates.rebuild_signatures(db)
+        db.commit()
+    return {"courses": courses, "programs": programs, "memberships": links}
+
+def create_catalog(path: str, courses: int, programs: int, density: float, seed: int = 1, profile: str = "production"):
+    """Создать базу PATH с синтетическим каталогом; вернуть (движок, счетчики)"""
+    settings = load_db_settings(profile)
+    settings.update(url=f"sqlite:///{path}", echo=False)
+    engine = create_db_engine(settings)
+    return engine, generate(engine, courses, programs, density, seed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--courses", type=int, default=10000)
+    parser.add_argument("--programs", type=int, default=500)
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    engine, counts = create_catalog(args.path, args.courses, args.programs, args.density, args.seed)
+    engine.dispose()
+    print(json.dumps(counts, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Нагрузочный прогон HTTP API в процессе (httpx + ASGITransport) со смесью запросов клиента cli/main.py.
+
+Запуск: python -m bench.load [--courses 20000] [--programs 500] [--density 0.01]
+                             [--concurrency 16] [--requests 5000] [--output load.json]
+Каталог генерируется во временной базе (bench/generate.py), приложение api.server
+импортируется уже с ней. В отчете - p50/p95/p99 по каждому виду запросов и общая пропускная способность.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from bench.report import latency_summary, write_report
+from bench.vocabulary import WORDS
+
+# Вид запроса -> (вес в смеси, функция rng -> (метод, путь, параметры, тело)).
+# Веса соответствуют типичной работе с меню cli/main.py: в основном чтение
+MIX = {
+    "list_courses": (20, lambda rng, n: ("GET", "/courses/", {"limit": 100}, None)),
+    "get_course": (20, lambda rng, n: ("GET", f"/courses/{rng.randint(1, n['courses'])}", None, None)),
+    "course_programs": (8, lambda rng, n: ("GET", f"/courses/{rng.randint(1, n['courses'])}/programs", None, None)),
+    "list_programs": (10, lambda rng, n: ("GET", "/programs/", {"limit": 100}, None)),
+    "get_program": (15, lambda rng, n: ("GET", f"/programs/{rng.randint(1, n['programs'])}", None, None)),
+    "available_courses": (8, lambda rng, n: (
+        "GET", f"/programs/{rng.randint(1, n['programs'])}/available-courses", {"limit": 100}, None
+    )),
+    "search_courses": (5, lambda rng, n: ("GET", "/courses/search", {"q": rng.choice(WORDS[:500])}, None)),
+    "create_course": (4, lambda rng, n: ("POST", "/courses/", None, {
+        "title": "Нагрузочный курс", "description": "Описание", "total_hours": 72,
+        "lecture_hours": 36, "practice_hours": 36, "difficulty": "средний", "has_online": True,
+    })),
+    "update_course": (3, lambda rng, n: ("PUT", f"/courses/{rng.randint(1, n['courses'])}", None, {
+        "title": "Измененный курс", "description": None, "total_hours": 40,
+        "lecture_hours": 20, "practice_hours": 20, "difficulty": "начальный", "has_online": False,
+    })),
+    "add_course_to_program": (4, lambda rng, n: (
+        "POST", f"/programs/{rng.randint(1, n['programs'])}/courses/{rng.randint(1, n['courses'])}", None, None
+    )),
+    "remove_course_from_program": (3, lambda rng, n: (
+        "DELETE", f"/programs/{rng.randint(1, n['programs'])}/courses/{rng.randint(1, n['courses'])}", None, None
+    )),
+}
+
+async def drive(app, counts: dict, concurrency: int, total: int, seed: int) -> dict:
+    import httpx
+
+    names = list(MIX)
+    weights = [MIX[name][0] for name in names]
+    samples = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    remaining = total
+
+    async def worker(index: int, client):
+        nonlocal remaining
+        rng = random.Random(seed * 1000 + index)
+        while remaining > 0:
+            remaining -= 1
+            name = rng.choices(names, weights)[0]
+            method, path, params, body = MIX[name][1](rng, counts)
+            started = time.perf_counter()
+            response = await client.request(method, path, params=params, json=body)
+            samples[name].append((time.perf_counter() - started) * 1000)
+            # 404 для добавления/удаления членства - штатный ответ на случайную пару
+            if response.status_code >= 500:
+                errors[name] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    all_samples = [sample for values in samples.values() for sample in values]
+    return {
+        "total": {
+            **latency_summary(all_samples),
+            "errors": sum(errors.values()),
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(all_samples) / elapsed, 1),
+        },
+        "endpoints": {
+            name: {**latency_summary(samples[name]), "errors": errors[name]}
+            for name in names if samples[name]
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20000)
+    parser.add_argument("--programs", type=int, default=500)
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--warmup", type=int, default=200, help="Запросов до начала замеров")
+    parser.add_argument("--profile", default="production", help="Профиль БД из api/config.py")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        # Настройки БД читаются при импорте пакета api, поэтому он импортируется только здесь
+        os.environ.update(EDU_DB_PROFILE=args.profile, EDU_DB_URL=f"sqlite:///{path}", EDU_DB_ECHO="0")
+        from bench.generate import create_catalog
+
+        engine, counts = create_catalog(path, args.courses, args.programs, args.density, args.seed, args.profile)
+        engine.dispose()
+
+        from api.server import app
+        from api.database import engine as app_engine
+
+        if args.warmup:
+            asyncio.run(drive(app, counts, args.concurrency, args.warmup, args.seed + 1))
+        results = asyncio.run(drive(app, counts, args.concurrency, args.requests, args.seed))
+        app_engine.dispose()
+
+    config = {**vars(args), **counts, "async_db": os.getenv("EDU_ASYNC_DB", "0")}
+    write_report("load", config, results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Доступные курсы и удаление курса на больших программах:
+анти-join / DELETE по program_courses против прежней загрузки коллекций в Python.
+
+Запуск: python -m bench.membership [--courses 20000] [--program-size 10000] [--programs 20]
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from api import crud, models
+from api.config import load_db_settings
+from api.database import Base, create_db_engine
+
+# Прежние реализации для сравнения
+
+def legacy_get_courses_not_in_program(db: Session, program_id: int) -> list:
+    program = crud.get_program(db, program_id)
+    current_course_ids = [c.id for c in program.courses]
+    return db.query(models.DBCourse).filter(models.DBCourse.id.notin_(current_course_ids)).all()
+
+def legacy_delete_course(db: Session, course_id: int):
+    db_course = crud.get_course(db, course_id)
+    programs = db.query(models.DBProgram).filter(models.DBProgram.courses.any(id=course_id)).all()
+    for program in programs:
+        program.courses.remove(db_course)
+    db.delete(db_course)
+    db.commit()
+
+def seed(engine, courses: int, programs: int, program_size: int):
+    course_row = dict(
+        title="Курс", description="Описание", total_hours=72, lecture_hours=36,
+        practice_hours=36, difficulty=models.DifficultyLevel.INTERMEDIATE, has_online=True
+    )
+    with engine.begin() as conn:
+        conn.execute(insert(models.DBCourse), [course_row] * courses)
+        conn.execute(insert(models.DBProgram), [
+            dict(name=f"Программа {i}", description="", total_duration_weeks=12) for i in range(programs)
+        ])
+        # Все программы содержат первые program_size курсов
+        conn.execute(insert(models.program_courses), [
+            dict(program_id=p, course_id=c)
+            for p in range(1, programs + 1) for c in range(1, program_size + 1)
+        ])
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for i in range(repeat):
+        fn(i)
+    return round((time.perf_counter() - started) / repeat * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20000)
+    parser.add_argument("--program-size", type=int, default=10000)
+    parser.add_argument("--programs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = load_db_settings("production")
+        settings.update(url=f"sqlite:///{os.path.join(tmp, 'bench.db')}", echo=False)
+        engine = create_db_engine(settings)
+        Base.metadata.create_all(bind=engine)
+        seed(engine, args.courses, args.programs, args.program_size)
+
+        def fresh(fn):
+            def run(i):
+                with Session(engine) as db:
+                    fn(db, i)
+            return run
+
+        results = {
+            "courses": args.courses,
+            "program_size": args.program_size,
+            "programs_containing_course": args.programs,
+            "available_page_ms": timed(fresh(lambda db, i: crud.get_courses_not_in_program(db, 1, limit=100)), args.repeat),
+            "available_all_ms": timed(fresh(lambda db, i: crud.get_courses_not_in_program(db, 1, limit=-1)), args.repeat),
+            "legacy_available_all_ms": timed(fresh(lambda db, i: legacy_get_courses_not_in_program(db, 1)), args.repeat),
+            # Удаляются разные курсы, входящие во все программы
+            "delete_course_ms": timed(fresh(lambda db, i: crud.delete_course(db, i + 1)), args.repeat),
+            "legacy_delete_course_ms": timed(fresh(lambda db, i: legacy_delete_course(db, args.repeat + i + 1)), args.repeat),
+        }
+        engine.dispose()
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
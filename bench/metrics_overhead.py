@@ -0,0 +1,105 @@
+"""Накладные расходы метрик (api/instrumentation.py): MetricsMiddleware и события движка.
+
+Запуск: python -m bench.metrics_overhead [--requests 5000] [--statements 50000]
+Сравниваются одинаковые приложения FastAPI с одним эндпоинтом, выполняющим
+SQL-запрос, - с метриками и без. Это худший случай: реальные эндпоинты дольше,
+и относительная доля накладных расходов у них меньше.
+"""
+import argparse
+import asyncio
+import time
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from api.instrumentation import MetricsMiddleware, MetricsRegistry, instrument_engine
+from bench.report import latency_summary, write_report
+
+def make_engine(instrumented: bool):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    if instrumented:
+        instrument_engine(engine)
+    return engine
+
+def bench_statements(engine, statements: int) -> float:
+    """Микросекунд на один SELECT 1 внутри измеряемого запроса"""
+    from api.instrumentation import count_queries
+
+    with engine.connect() as conn, count_queries():
+        started = time.perf_counter()
+        for _ in range(statements):
+            conn.execute(text("SELECT 1"))
+        return (time.perf_counter() - started) / statements * 1e6
+
+def make_app(instrumented: bool) -> FastAPI:
+    engine = make_engine(instrumented)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            return {"id": item_id, "value": conn.execute(text("SELECT :v"), {"v": item_id}).scalar()}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware, registry=MetricsRegistry())
+    return app
+
+async def bench_requests(app, requests: int, concurrency: int) -> list[float]:
+    import httpx
+
+    samples = []
+    remaining = requests
+
+    async def worker(client):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await client.get(f"/items/{remaining}")
+            samples.append((time.perf_counter() - started) * 1000)
+            response.raise_for_status()
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--statements", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=3, help="Чередующихся прогонов каждого варианта")
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    statement_us = {False: [], True: []}
+    request_ms = {False: [], True: []}
+    apps = {False: make_app(False), True: make_app(True)}
+    engines = {False: make_engine(False), True: make_engine(True)}
+    for _ in range(args.rounds):
+        for instrumented in (False, True):
+            statement_us[instrumented].append(bench_statements(engines[instrumented], args.statements))
+            request_ms[instrumented].extend(
+                asyncio.run(bench_requests(apps[instrumented], args.requests, args.concurrency))
+            )
+
+    plain = latency_summary(request_ms[False])
+    metered = latency_summary(request_ms[True])
+    plain_statement, metered_statement = min(statement_us[False]), min(statement_us[True])
+    results = {
+        "statement_us": {
+            "plain": round(plain_statement, 2),
+            "instrumented": round(metered_statement, 2),
+            "overhead_us": round(metered_statement - plain_statement, 2),
+        },
+        "request": {
+            "plain": plain,
+            "instrumented": metered,
+            "p50_overhead_ms": round(metered["p50_ms"] - plain["p50_ms"], 3),
+            "p50_overhead_pct": round((metered["p50_ms"] / plain["p50_ms"] - 1) * 100, 1),
+        },
+    }
+    write_report("metrics_overhead", vars(args), results, args.output)
+
+if __name__ == "__main__":
+    main()
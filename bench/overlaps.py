@@ -0,0 +1,110 @@
+"""Пересечения программ (api/overlaps.py): битовый индекс против пересечения множеств.
+
+Запуск: python -m bench.overlaps [--courses 50000] [--programs 10000] [--density 0.001]
+                                 [--repeat 200] [--output overlaps.json]
+Измеряются: построение индекса с нуля, k программ с наибольшим пересечением для одной
+программы (GET /programs/{id}/overlaps) по индексу и прежним способом - загрузкой состава
+всех программ через связь courses и пересечением множеств Python, обновление строки
+индекса при изменении состава и отчет по всем парам программ (GET /programs/overlaps).
+Результаты индекса сверяются с пересечением множеств.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from api import models
+from api.overlaps import ProgramMembershipIndex
+from bench.generate import create_catalog
+from bench.report import latency_summary, write_report
+
+def timed(engine, repeat: int, call) -> dict:
+    samples = []
+    for i in range(repeat):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            call(db, i)
+            samples.append((time.perf_counter() - started) * 1000)
+    return latency_summary(samples)
+
+def overlaps_by_sets(db: Session, program_id: int, k: int) -> list[tuple[int, int]]:
+    """Прежний способ: состав всех программ через связь courses, пересечение множеств"""
+    programs = db.scalars(select(models.DBProgram).options(selectinload(models.DBProgram.courses))).all()
+    members = {program.id: {course.id for course in program.courses} for program in programs}
+    query = members.get(program_id, set())
+    found = []
+    for other, courses in members.items():
+        shared = len(query & courses)
+        if other != program_id and shared:
+            found.append((other, shared, shared / len(query | courses)))
+    found.sort(key=lambda item: (-item[2], -item[1], item[0]))
+    return [(other, shared) for other, shared, _ in found[:k]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=50000)
+    parser.add_argument("--programs", type=int, default=10000)
+    parser.add_argument("--density", type=float, default=0.001)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-jaccard", type=float, default=0.5)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--baseline-repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = ProgramMembershipIndex()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, counts = create_catalog(
+            os.path.join(tmp, "bench.db"), args.courses, args.programs, args.density, args.seed
+        )
+        with Session(engine) as db:
+            started = time.perf_counter()
+            index.build(db)
+            build_s = time.perf_counter() - started
+        index_mb = index._words.nbytes / 2**20
+        sample = [rng.randint(1, args.programs) for _ in range(args.repeat)]
+
+        with Session(engine) as db:
+            checked = sample[:args.baseline_repeat]
+            matches = all(
+                [(item["program_id"], item["shared_courses"]) for item in index.overlaps(db, program_id, args.k)]
+                == overlaps_by_sets(db, program_id, args.k)
+                for program_id in checked
+            )
+            started = time.perf_counter()
+            pairs_with_shared = len(index.pairs(db, limit=10**9))
+            all_pairs_s = time.perf_counter() - started
+
+        updates = [(rng.randint(1, args.programs), rng.randint(1, args.courses)) for _ in range(args.repeat)]
+        results = {
+            "overlaps_index": timed(engine, args.repeat, lambda db, i: index.overlaps(db, sample[i], args.k)),
+            "overlaps_sets": timed(
+                engine, args.baseline_repeat, lambda db, i: overlaps_by_sets(db, sample[i], args.k)
+            ),
+            "apply_add_remove": timed(engine, args.repeat, lambda db, i: (
+                index.apply(updates[i][0], [updates[i][1]], []), index.apply(updates[i][0], [], [updates[i][1]])
+            )),
+            "report": timed(
+                engine, max(1, args.repeat // 20),
+                lambda db, i: index.pairs(db, min_jaccard=args.min_jaccard, limit=1000)
+            ),
+        }
+        engine.dispose()
+
+    config = {
+        **vars(args), **counts,
+        "build_s": round(build_s, 2),
+        "index_mb": round(index_mb, 1),
+        "pairs_with_shared_courses": pairs_with_shared,
+        "all_pairs_s": round(all_pairs_s, 2),
+        "matches_sets": matches,
+    }
+    write_report("overlaps", config, results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Граф пререквизитов: замыкание (api/prerequisites.py) против рекурсивного обхода.
+
+Запуск: python -m bench.prerequisites [--courses 50000] [--edges 100000] [--track 50]
+                                      [--repeat 200] [--output prerequisites.json]
+Курсы разбиты на направления по --track курсов; ребра случайны внутри направления
+и идут от курса с меньшим номером к большему (граф ациклический). Замыкание строится
+с нуля, затем измеряются: поиск всех пререквизитов и зависящих курсов по замыканию
+и рекурсивным CTE по ребрам, добавление и удаление ребра с обновлением замыкания,
+проверка полноты программ.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from api import crud, models, prerequisites
+from bench.generate import create_catalog
+from bench.report import latency_summary, write_report
+
+edges = models.course_prerequisites
+
+def random_edges(rng: random.Random, courses: int, count: int, track: int) -> set[tuple[int, int]]:
+    """Ребра (курс, пререквизит) внутри направлений; пререквизит - курс направления с меньшим ID"""
+    result = set()
+    while len(result) < count:
+        start = rng.randrange(0, courses - track + 1, track) + 1
+        prerequisite, course = sorted(rng.sample(range(start, start + track), 2))
+        result.add((course, prerequisite))
+    return result
+
+def walk(db: Session, course_id: int, up: bool) -> set[int]:
+    """Рекурсивный обход ребер: все пререквизиты (up) или все зависящие курсы"""
+    source, target = (edges.c.course_id, edges.c.prerequisite_id) if up else (edges.c.prerequisite_id, edges.c.course_id)
+    found = select(target.label("id")).where(source == course_id).cte("found", recursive=True)
+    found = found.union(select(target).join(found, source == found.c.id))
+    return set(db.scalars(select(found.c.id)))
+
+def timed(engine, repeat: int, call) -> dict:
+    samples = []
+    for i in range(repeat):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            call(db, i)
+            samples.append((time.perf_counter() - started) * 1000)
+    return latency_summary(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=50000)
+    parser.add_argument("--edges", type=int, default=100000)
+    parser.add_argument("--track", type=int, default=50, help="Курсов в направлении")
+    parser.add_argument("--programs", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.001)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, counts = create_catalog(
+            os.path.join(tmp, "bench.db"), args.courses, args.programs, args.density, args.seed
+        )
+        graph = random_edges(rng, args.courses, args.edges, args.track)
+        with engine.begin() as conn:
+            conn.execute(insert(edges), [dict(course_id=c, prerequisite_id=p) for c, p in graph])
+        started = time.perf_counter()
+        with Session(engine) as db:
+            prerequisites.rebuild_closure(db)
+            db.commit()
+            closure_rows = db.scalar(select(func.count()).select_from(models.course_prerequisite_closure))
+        rebuild_s = time.perf_counter() - started
+
+        sample = [rng.randint(1, args.courses) for _ in range(args.repeat)]
+        new_edges = sorted(random_edges(rng, args.courses, args.edges + args.repeat, args.track) - graph)
+        new_edges = rng.sample(new_edges, min(args.repeat, len(new_edges)))
+
+        def add(db, i):
+            course_id, prerequisite_id = new_edges[i % len(new_edges)]
+            try:
+                crud.add_course_prerequisite(db, course_id, prerequisite_id)
+            except prerequisites.PrerequisiteCycleError:
+                db.rollback()
+
+        results = {
+            "prerequisites_closure": timed(engine, args.repeat, lambda db, i: prerequisites.ancestor_ids(db, sample[i])),
+            "prerequisites_recursive": timed(engine, args.repeat, lambda db, i: walk(db, sample[i], up=True)),
+            "unlocks_closure": timed(engine, args.repeat, lambda db, i: prerequisites.descendant_ids(db, sample[i])),
+            "unlocks_recursive": timed(engine, args.repeat, lambda db, i: walk(db, sample[i], up=False)),
+            "add_edge": timed(engine, len(new_edges), add),
+            "remove_edge": timed(
+                engine, len(new_edges), lambda db, i: crud.remove_course_prerequisite(db, *new_edges[i])
+            ),
+            "program_check": timed(
+                engine, args.repeat,
+                lambda db, i: crud.check_program_prerequisites(db, rng.randint(1, args.programs))
+            ),
+        }
+        with Session(engine) as db:
+            diff = prerequisites.check_closure(db)
+        engine.dispose()
+
+    config = {
+        **vars(args), **counts,
+        "closure_rows": closure_rows,
+        "rebuild_s": round(rebuild_s, 2),
+        "closure_consistent": not diff["extra"] and not diff["missing"],
+    }
+    write_report("prerequisites", config, results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Время подбора курсов программы (POST /programs/generate, api/program_builder.py).
+
+Запуск: python -m bench.program_builder [--courses 50000] [--repeat 20] [--output builder.json]
+Для нескольких типичных запросов измеряется crud.generate_program без сохранения:
+чтение атрибутов курсов в массивы NumPy и точное решение задачи о рюкзаке.
+Цель - меньше секунды на каталоге в 50 тыс. курсов.
+"""
+import argparse
+import os
+import tempfile
+import time
+from sqlalchemy.orm import Session
+
+from api import crud, program_builder, schemas
+from bench.generate import create_catalog
+from bench.report import latency_summary, write_report
+
+REQUESTS = {
+    "semester": dict(total_duration_weeks=18, max_hours_per_week=24),
+    "year_mix": dict(
+        total_duration_weeks=40, max_hours_per_week=36,
+        difficulty_mix={"начальный": 0.4, "средний": 0.4, "продвинутый": 0.2},
+    ),
+    "online_half": dict(total_duration_weeks=36, max_total_hours=1200, min_online_share=0.5),
+    "online_only": dict(total_duration_weeks=24, max_total_hours=800, min_online_share=1.0),
+    "large_budget": dict(
+        total_duration_weeks=52, max_total_hours=program_builder.MAX_HOURS_BUDGET,
+        difficulty_mix={"начальный": 0.3, "средний": 0.4, "продвинутый": 0.3}, min_online_share=0.3,
+    ),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, counts = create_catalog(os.path.join(tmp, "bench.db"), args.courses, 0, 0, args.seed)
+        for name, fields in REQUESTS.items():
+            request = schemas.ProgramGenerateRequest(name=name, **fields)
+            samples = []
+            for _ in range(args.repeat):
+                with Session(engine) as db:
+                    started = time.perf_counter()
+                    result = crud.generate_program(db, request)
+                    samples.append((time.perf_counter() - started) * 1000)
+            results[name] = {
+                **latency_summary(samples),
+                "hours_budget": result["hours_budget"],
+                "total_hours": result["total_hours"],
+                "online_hours": result["online_hours"],
+                "courses": len(result["program"].course_ids),
+            }
+        engine.dispose()
+
+    write_report("program_builder", {**vars(args), **counts}, results, args.output)
+
+if __name__ == "__main__":
+    main()
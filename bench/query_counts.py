@@ -0,0 +1,102 @@
+"""Проверка числа SQL-запросов на запрос API: оно не должно расти вместе с каталогом (N+1).
+
+Запуск: python -m bench.query_counts [--n 20]
+Каталог во временной базе заполняется дважды - N, затем 10·N курсов и программ (курс 1 входит
+во все программы). Для GET /programs/, /programs/{id} и /courses/{id}/programs сравнивается
+заголовок X-Query-Count (api/instrumentation.py) на обоих размерах. Отдельно со стратегией
+загрузки "select" (RELATIONSHIP_LOADING в api/config.py) проверяется, что для
+/courses/{id}/programs число запросов растет, - то есть проверка действительно ловит N+1.
+Код возврата 1, если число запросов зависит от размера каталога или рост не обнаружен.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+from sqlalchemy import insert
+
+ENDPOINTS = {
+    "list_programs": ("/programs/", {"limit": 100}),
+    "get_program": ("/programs/1", None),
+    "course_programs": ("/courses/1/programs", None),
+}
+# Эндпоинты, у которых ленивая загрузка дает запрос на каждую программу ответа
+N_PLUS_ONE_ENDPOINTS = ["course_programs"]
+PROGRAM_SIZE = 5
+
+def seed(engine, count: int, rng: random.Random):
+    """Добавить count курсов и count программ; в каждой программе курс 1 и PROGRAM_SIZE случайных"""
+    from sqlalchemy.orm import Session
+    from api import models, stats
+    from bench.generate import course_rows
+
+    with engine.begin() as conn:
+        course_ids = conn.execute(
+            insert(models.DBCourse).returning(models.DBCourse.id), course_rows(rng, count)
+        ).scalars().all()
+        program_ids = conn.execute(insert(models.DBProgram).returning(models.DBProgram.id), [
+            dict(name=f"Программа {rng.random():.6f}", description="", total_duration_weeks=rng.randint(4, 52))
+            for _ in range(count)
+        ]).scalars().all()
+        last_course = max(course_ids)
+        conn.execute(insert(models.program_courses), [
+            dict(program_id=program_id, course_id=course_id)
+            for program_id in program_ids
+            for course_id in {1, *rng.sample(range(1, last_course + 1), PROGRAM_SIZE)}
+        ])
+    with Session(engine) as db:
+        stats.recompute_program_stats(db)
+        db.commit()
+
+def measure(client) -> dict:
+    counts = {}
+    for name, (path, params) in ENDPOINTS.items():
+        response = client.get(path, params=params)
+        if response.status_code != 200:
+            raise RuntimeError(f"{path}: {response.status_code} {response.text}")
+        counts[name] = int(response.headers["X-Query-Count"])
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=20, help="Курсов и программ в малом каталоге")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        # Настройки БД читаются при импорте пакета api, поэтому он импортируется только здесь
+        os.environ.update(EDU_DB_URL=f"sqlite:///{os.path.join(tmp, 'counts.db')}", EDU_DB_ECHO="0", EDU_METRICS="1")
+        from fastapi.testclient import TestClient
+        from api.config import RELATIONSHIP_LOADING
+        from api.database import engine
+        from api.server import app
+
+        configured = dict(RELATIONSHIP_LOADING)
+        lazy = {name: "select" for name in RELATIONSHIP_LOADING}
+        results = {}
+        with TestClient(app) as client:
+            for size, added in (("n", args.n), ("10n", 9 * args.n)):
+                seed(engine, added, rng)
+                for mode, loading in (("configured", configured), ("select", lazy)):
+                    RELATIONSHIP_LOADING.update(loading)
+                    results[mode, size] = measure(client)
+            RELATIONSHIP_LOADING.update(configured)
+        engine.dispose()
+
+    failures = []
+    print(f"{'endpoint':<18}{'N':>6}{'10N':>6}{'select N':>10}{'select 10N':>12}")
+    for name in ENDPOINTS:
+        small, large = results["configured", "n"][name], results["configured", "10n"][name]
+        lazy_small, lazy_large = results["select", "n"][name], results["select", "10n"][name]
+        print(f"{name:<18}{small:>6}{large:>6}{lazy_small:>10}{lazy_large:>12}")
+        if small != large:
+            failures.append(f"{name}: {small} запросов при N, {large} при 10N")
+        if name in N_PLUS_ONE_ENDPOINTS and lazy_large <= lazy_small:
+            failures.append(f"{name}: со стратегией select число запросов не растет - проверка не ловит N+1")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
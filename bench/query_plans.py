@@ -0,0 +1,100 @@
+"""Проверка планов запросов списков: каждая комбинация фильтров и сортировки
+должна использовать индекс, а не полный просмотр таблицы.
+
+Запуск: python -m bench.query_plans [--analyze]
+Код возврата 1, если хотя бы один план содержит SCAN таблицы (в том числе SCAN ... USING INDEX).
+"""
+import argparse
+import itertools
+import re
+import sys
+import tempfile
+import os
+from sqlalchemy.orm import Session
+
+from api import crud, schemas
+from api.config import load_db_settings
+from api.database import Base, create_db_engine
+
+COURSE_FILTERS = {
+    "difficulty": schemas.DifficultyLevel.INTERMEDIATE,
+    "has_online": True,
+    "min_hours": 10,
+    "max_hours": 100,
+    "title_prefix": "Ма",
+}
+
+PROGRAM_FILTERS = {
+    "min_weeks": 4,
+    "max_weeks": 20,
+}
+
+# Индексным считается только SEARCH ... USING (COVERING) INDEX; SCAN таблицы, в том числе
+# SCAN ... USING INDEX (полный обход индекса), - полный просмотр
+FULL_SCAN = re.compile(r"\bSCAN (courses|programs)\b")
+TEMP_SORT = re.compile(r"\bUSE TEMP B-TREE FOR\b")
+
+def combinations(filters: dict):
+    names = list(filters)
+    for size in range(len(names) + 1):
+        for subset in itertools.combinations(names, size):
+            yield {name: filters[name] for name in subset}
+
+def explain(db: Session, query) -> list[str]:
+    compiled = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").all()
+    return [row[-1] for row in rows]
+
+def check(db: Session, build, filters: dict, order_keys) -> list[str]:
+    failures = []
+    for combo in combinations(filters):
+        for order_by in order_keys:
+            for after in (None, "cursor"):
+                query = build(db, combo, order_by, after)
+                plan = explain(db, query)
+                # Первая страница без фильтров - обход индекса ключа сортировки (или таблицы по id),
+                # который останавливается на LIMIT; допустим, только если индекс дает весь порядок
+                if not combo and after is None and not any(TEMP_SORT.search(step) for step in plan):
+                    continue
+                if any(FULL_SCAN.search(step) for step in plan):
+                    failures.append(f"{combo} order_by={order_by} after={after}: {' | '.join(plan)}")
+    return failures
+
+def build_courses(db, combo, order_by, after):
+    position = None
+    if after:
+        value = {"title": "Ма", "total_hours": 10, "difficulty": schemas.DifficultyLevel.BEGINNER,
+                 "has_online": False, "id": 1}[order_by]
+        position = (value, 1)
+    return crud.courses_query(db, order_by=order_by, after=position, **combo)
+
+def build_programs(db, combo, order_by, after):
+    position = None
+    if after:
+        position = ({"name": "А", "total_duration_weeks": 4, "id": 1}[order_by], 1)
+    return crud.programs_query(db, order_by=order_by, after=position, **combo)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyze", action="store_true", help="собрать статистику ANALYZE перед проверкой")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = load_db_settings()
+        settings.update(url=f"sqlite:///{os.path.join(tmp, 'plans.db')}", echo=False)
+        engine = create_db_engine(settings)
+        Base.metadata.create_all(bind=engine)
+        with Session(engine) as db:
+            if args.analyze:
+                db.connection().exec_driver_sql("ANALYZE")
+            failures = check(db, build_courses, COURSE_FILTERS, crud.COURSE_ORDER_COLUMNS)
+            failures += check(db, build_programs, PROGRAM_FILTERS, crud.PROGRAM_ORDER_COLUMNS)
+        engine.dispose()
+
+    for failure in failures:
+        print(f"FULL SCAN: {failure}")
+    print(f"Планов без индекса: {len(failures)}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
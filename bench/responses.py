@@ -0,0 +1,90 @@
+"""Проверка быстрого пути списков (api/responses.py): ответы совпадают со схемами response_model.
+
+Запуск: python -m bench.responses [--courses 2000] [--programs 100]
+Сервер поднимается с EDU_VALIDATE_RESPONSES=1 на синтетическом каталоге, и каждый ответ
+GET /courses/, /programs/ и /programs/{id}/available-courses проверяется по schemas.Course
+и schemas.Program (частичный ответ - по своим полям, поля вне схемы - ошибка) для всех
+сортировок, expand, include_stats и нескольких наборов fields. Затем в базу добавляется курс
+с NULL в обязательном поле, и без EDU_VALIDATE_RESPONSES ожидается ответ 500, как с response_model.
+Код возврата 1, если хотя бы одна проверка не прошла.
+"""
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+from sqlalchemy import insert
+
+COURSE_FIELDS = [None, "title", "difficulty,has_online", "description,total_hours"]
+PROGRAM_FIELDS = [None, "name", "description,total_duration_weeks"]
+
+def requests(schemas) -> list[tuple[str, dict]]:
+    """Путь и параметры каждого проверяемого запроса"""
+    courses = [
+        ("/courses/", {"order_by": order.value, **({"fields": fields} if fields else {})})
+        for order, fields in itertools.product(schemas.CourseOrder, COURSE_FIELDS)
+    ]
+    programs = [
+        ("/programs/", {
+            "order_by": order.value, "expand": expand.value, "include_stats": include_stats,
+            **({"fields": fields} if fields else {}),
+        })
+        for order, expand, include_stats, fields in itertools.product(
+            schemas.ProgramOrder, schemas.ProgramExpand, (False, True), PROGRAM_FIELDS
+        )
+    ]
+    return courses + programs + [("/programs/1/available-courses", {})]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--programs", type=int, default=100)
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # Настройки читаются при импорте пакета api, поэтому он импортируется только здесь
+        os.environ.update(
+            EDU_DB_URL=f"sqlite:///{os.path.join(tmp, 'responses.db')}", EDU_DB_ECHO="0", EDU_VALIDATE_RESPONSES="1"
+        )
+        from fastapi.testclient import TestClient
+        from api import models, responses, schemas
+        from api.database import engine
+        from api.server import app
+        from bench.generate import generate
+
+        generate(engine, args.courses, args.programs, args.density, args.seed)
+        checked = 0
+        with TestClient(app, raise_server_exceptions=False) as client:
+            for path, params in requests(schemas):
+                response = client.get(path, params={"limit": 100, **params})
+                checked += 1
+                if response.status_code != 200:
+                    failures.append(f"{path} {params}: {response.status_code}")
+
+            # NULL в обязательном поле: быстрый путь не должен отдать его в ответе
+            responses.VALIDATE_RESPONSES = False
+            with engine.begin() as conn:
+                conn.execute(insert(models.DBCourse).values(
+                    title="Курс без сложности", total_hours=10, lecture_hours=10, practice_hours=0,
+                    difficulty=None, has_online=None,
+                ))
+            for path, params in [
+                ("/courses/", {"title_prefix": "Курс без"}),
+                ("/courses/", {"title_prefix": "Курс без", "fields": "has_online"}),
+            ]:
+                response = client.get(path, params=params)
+                checked += 1
+                if response.status_code != 500:
+                    failures.append(f"{path} {params} с NULL: {response.status_code}, ожидался 500")
+        engine.dispose()
+
+    print(f"Проверено ответов: {checked}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Сравнение поиска через FTS5 (api/search.py) с LIKE '%...%' на большом каталоге.
+
+Запуск: python -m bench.search [--courses 100000] [--queries 50]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import insert, or_, select
+from sqlalchemy.orm import Session
+
+from api import models, search
+from api.config import load_db_settings
+from api.database import Base, create_db_engine
+from bench.vocabulary import WORDS, random_text
+
+def seed(engine, count: int, batch: int = 10000):
+    for start in range(0, count, batch):
+        rows = [
+            dict(
+                title=random_text(4), description=random_text(40), total_hours=72,
+                lecture_hours=36, practice_hours=36,
+                difficulty=models.DifficultyLevel.INTERMEDIATE, has_online=True
+            )
+            for _ in range(min(batch, count - start))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(models.DBCourse), rows)
+
+def search_like(db: Session, query: str, limit: int) -> list:
+    pattern = f"%{query}%"
+    return db.execute(
+        select(models.DBCourse.id)
+        .where(or_(models.DBCourse.title.like(pattern), models.DBCourse.description.like(pattern)))
+        .limit(limit)
+    ).all()
+
+def timed(fn, queries: list[str]) -> float:
+    started = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - started) / len(queries) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = load_db_settings("production")
+        settings.update(url=f"sqlite:///{os.path.join(tmp, 'bench.db')}", echo=False)
+        engine = create_db_engine(settings)
+        Base.metadata.create_all(bind=engine)
+        search.ensure_search_index(engine)
+
+        started = time.perf_counter()
+        seed(engine, args.courses)
+        seed_seconds = time.perf_counter() - started
+
+        # Запросы - слова средней частоты, как типичные поисковые термины
+        queries = [random.choice(WORDS[50:2000]) for _ in range(args.queries)]
+        with Session(engine) as db:
+            results = {
+                "courses": args.courses,
+                "seed_seconds_with_fts_triggers": round(seed_seconds, 2),
+                "fts_ms_per_query": round(timed(lambda q: search.search_courses(db, q, limit=args.limit), queries), 3),
+                "like_ms_per_query": round(timed(lambda q: search_like(db, q, args.limit), queries), 3),
+                # LIKE без LIMIT - аналог подсчета всех совпадений, который FTS делает по индексу
+                "like_full_scan_ms_per_query": round(timed(lambda q: search_like(db, q, -1), queries[:5]), 3),
+            }
+        engine.dispose()
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Стоимость строки ответа списков: ORM + проверка Pydantic против строк SQL (api/responses.py).
+
+Запуск: python -m bench.serialization [--courses 20000] [--programs 500] [--page 1000]
+                                      [--repeat 50] [--output serialization.json]
+Для страниц /courses/ и /programs/ сравниваются два пути:
+  orm_validate - ORM-объекты, проверка по List[schemas.*] с from_attributes и json.dumps
+                 (так FastAPI обрабатывает response_model);
+  rows         - crud.get_*_rows и FastJSONResponse (orjson, если установлен).
+Результат - медиана микросекунд на строку отдельно для чтения из БД и сериализации.
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from api import crud, schemas
+from api.responses import FastJSONResponse, orjson
+from bench.generate import create_catalog
+from bench.report import write_report
+
+def validated_json(adapter: TypeAdapter, objects: list) -> bytes:
+    """Путь response_model: проверка ORM-объектов, дамп в JSON-совместимые типы и json.dumps"""
+    content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def paths(page: int) -> dict:
+    """Список -> путь -> (чтение(db), сериализация(результат))"""
+    courses = TypeAdapter(List[schemas.Course])
+    programs = TypeAdapter(List[schemas.Program])
+    render = FastJSONResponse(None).render
+    return {
+        "courses": {
+            "orm_validate": (
+                lambda db: crud.get_courses(db, limit=page),
+                lambda objects: validated_json(courses, objects),
+            ),
+            "rows": (
+                lambda db: crud.get_course_rows(db, crud.COURSE_FIELDS, limit=page),
+                render,
+            ),
+        },
+        "programs": {
+            "orm_validate": (
+                lambda db: crud.get_programs(db, limit=page, load="selectin"),
+                lambda objects: validated_json(programs, objects),
+            ),
+            "rows": (
+                lambda db: crud.get_program_rows(db, crud.PROGRAM_FIELDS, limit=page),
+                render,
+            ),
+        },
+    }
+
+def run(engine, fetch, serialize, repeat: int) -> dict:
+    fetch_us, serialize_us = [], []
+    rows = 0
+    for _ in range(repeat):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            result = fetch(db)
+            fetched = time.perf_counter()
+            body = serialize(result)
+            finished = time.perf_counter()
+        rows = len(result)
+        fetch_us.append((fetched - started) * 1e6 / rows)
+        serialize_us.append((finished - fetched) * 1e6 / rows)
+    fetch_median, serialize_median = statistics.median(fetch_us), statistics.median(serialize_us)
+    return {
+        "rows": rows,
+        "bytes_per_row": round(len(body) / rows, 1),
+        "fetch_us_per_row": round(fetch_median, 2),
+        "serialize_us_per_row": round(serialize_median, 2),
+        "total_us_per_row": round(fetch_median + serialize_median, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=20000)
+    parser.add_argument("--programs", type=int, default=500)
+    parser.add_argument("--density", type=float, default=0.01)
+    parser.add_argument("--page", type=int, default=1000, help="Строк в странице списка")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, counts = create_catalog(
+            os.path.join(tmp, "bench.db"), args.courses, args.programs, args.density, args.seed
+        )
+        for name, variants in paths(args.page).items():
+            results[name] = {
+                variant: run(engine, fetch, serialize, args.repeat)
+                for variant, (fetch, serialize) in variants.items()
+            }
+            results[name]["speedup"] = round(
+                results[name]["orm_validate"]["total_us_per_row"] / results[name]["rows"]["total_us_per_row"], 2
+            )
+        engine.dispose()
+
+    config = {**vars(args), **counts, "json_encoder": "orjson" if orjson is not None else "json"}
+    write_report("serialization", config, results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Векторный индекс похожих курсов (api/similarity.py): построение, поиск и обновления.
+
+Запуск: python -m bench.similarity [--courses 50000] [--programs 200] [--repeat 200]
+                                   [--output similarity.json]
+Измеряются: построение индекса с нуля, поиск k похожих для одного курса
+(GET /courses/{id}/similar), пачкой по курсам программы (GET /programs/{id}/suggested-courses)
+и обновление строки индекса после изменения курса. Отдельно - доля запросов, в которых
+копия курса с измененным названием находится среди k похожих.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from sqlalchemy.orm import Session
+
+from api import crud, models
+from api.similarity import CourseVectorIndex, COURSE_COLUMNS
+from bench.generate import create_catalog
+from bench.report import latency_summary, write_report
+from bench.vocabulary import random_text
+
+def timed(engine, repeat: int, call) -> dict:
+    samples = []
+    for i in range(repeat):
+        with Session(engine) as db:
+            started = time.perf_counter()
+            call(db, i)
+            samples.append((time.perf_counter() - started) * 1000)
+    return latency_summary(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--courses", type=int, default=50000)
+    parser.add_argument("--programs", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.001)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Файл JSON-отчета (по умолчанию - stdout)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    index = CourseVectorIndex()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine, counts = create_catalog(
+            os.path.join(tmp, "bench.db"), args.courses, args.programs, args.density, args.seed
+        )
+        with Session(engine) as db:
+            started = time.perf_counter()
+            index.build(db)
+            build_s = time.perf_counter() - started
+            matrix_mb = index._matrix.nbytes / 2**20
+            sample = [db.get(models.DBCourse, rng.randint(1, args.courses)) for _ in range(args.repeat)]
+            sample = [{name: getattr(course, name) for name in COURSE_COLUMNS} for course in sample]
+            members = {
+                program_id: sorted(crud._member_course_ids(db, program_id))
+                for program_id in range(1, args.programs + 1)
+            }
+
+        # Копии курсов с другим названием: новые строки индекса с ID за пределами каталога
+        recall_hits = 0
+        for i, course in enumerate(sample):
+            copy = dict(course, id=args.courses + 1 + i, title=f"{course['title']} {random_text(1, rng)}")
+            index.upsert(copy)
+        results = {
+            "similar_one": timed(engine, args.repeat, lambda db, i: index.similar(db, [sample[i]["id"]], args.k)),
+            "suggested_program": timed(
+                engine, args.repeat,
+                lambda db, i: index.similar(db, members[i % args.programs + 1], args.k)
+            ),
+            "upsert": timed(engine, args.repeat, lambda db, i: index.upsert(sample[i])),
+        }
+        with Session(engine) as db:
+            for i, course in enumerate(sample):
+                found = {course_id for course_id, _ in index.similar(db, [course["id"]], args.k)}
+                recall_hits += args.courses + 1 + i in found
+        engine.dispose()
+
+    config = {
+        **vars(args), **counts,
+        "build_s": round(build_s, 2),
+        "matrix_mb": round(matrix_mb, 1),
+        "copy_recall_at_k": round(recall_hits / len(sample), 3),
+        "mean_program_size": round(sum(map(len, members.values())) / max(len(members), 1), 1),
+    }
+    write_report("similarity", config, results, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Синтетический словарь для генерации названий и описаний курсов (без зависимостей от api)"""
+import random
+
+# Синтетический словарь с распределением Ципфа: частые и редкие слова, как в реальных описаниях
+SYLLABLES = ["ка", "ло", "ри", "ме", "то", "ан", "да", "ны", "ве", "ми", "ст", "ор", "ин", "ус", "ля", "пе"]
+WORDS = sorted({
+    "".join(random.Random(i).choices(SYLLABLES, k=random.Random(-i).randint(2, 4))) for i in range(8000)
+})
+WEIGHTS = [1 / rank for rank in range(1, len(WORDS) + 1)]
+
+def random_text(words: int, rng: random.Random = random) -> str:
+    return " ".join(rng.choices(WORDS, WEIGHTS, k=words))
@@ -0,0 +1,108 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP-клиент CLI: одна сессия с пулом keep-alive соединений, тайм-аутами и повторами
+
+BASE_URL = os.getenv("EDU_API_URL", "http://localhost:8000")
+PAGE_SIZE = 100
+POOL_SIZE = 8
+ETAG_CACHE_SIZE = 64   # сохраненных ответов GET; ключ включает курсор, поэтому кэш ограничен
+TIMEOUT = (3.05, 30)   # (подключение, чтение), секунды
+
+# Повторы только для идемпотентных методов: POST и PATCH не повторяются,
+# чтобы не создать запись дважды
+RETRY = Retry(
+    total=3,
+    backoff_factor=0.3,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}),
+    raise_on_status=False,
+)
+
+session = requests.Session()
+
+def configure_pool(size: int):
+    """Размер пула соединений сессии - не меньше числа потоков, одновременно выполняющих запросы"""
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=RETRY)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+configure_pool(POOL_SIZE)
+
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="cli-http")
+
+def request(method, path, **kwargs):
+    """Запрос к API по пути относительно BASE_URL"""
+    kwargs.setdefault("timeout", TIMEOUT)
+    return session.request(method, f"{BASE_URL}{path}", **kwargs)
+
+def get(path, **kwargs):
+    return request("GET", path, **kwargs)
+
+def post(path, **kwargs):
+    return request("POST", path, **kwargs)
+
+def put(path, **kwargs):
+    return request("PUT", path, **kwargs)
+
+def patch(path, **kwargs):
+    return request("PATCH", path, **kwargs)
+
+def delete(path, **kwargs):
+    return request("DELETE", path, **kwargs)
+
+def run_concurrently(*calls):
+    """Выполнить независимые вызовы параллельно; результаты - в порядке вызовов.
+    Исключение любого вызова пробрасывается."""
+    futures = [_executor.submit(call) for call in calls]
+    return [future.result() for future in futures]
+
+# Последние ответы GET-запросов с ETag: пока каталог не менялся,
+# сервер отвечает 304 без тела, и используется сохраненный ответ.
+# LRU на ETAG_CACHE_SIZE ответов: обход длинного списка по страницам не держит в памяти все страницы
+_etag_cache = OrderedDict()
+_etag_lock = threading.Lock()
+
+def cached_get(path, params=None):
+    """GET с заголовком If-None-Match; при ответе 304 возвращает сохраненный ответ"""
+    key = (path, tuple(sorted((params or {}).items())))
+    with _etag_lock:
+        cached = _etag_cache.get(key)
+    headers = {"If-None-Match": cached.headers["ETag"]} if cached is not None else {}
+    response = get(path, params=params, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        response = cached
+    elif response.status_code != 200 or "ETag" not in response.headers:
+        return response
+    with _etag_lock:
+        _etag_cache[key] = response
+        _etag_cache.move_to_end(key)
+        while len(_etag_cache) > ETAG_CACHE_SIZE:
+            _etag_cache.popitem(last=False)
+    return response
+
+def iter_pages(path, params=None):
+    """Постранично обходит список по курсору из заголовка X-Next-Cursor.
+    Отдает ответы сервера; на ошибочном ответе обход прекращается."""
+    filters = dict(params or {})
+    params = {**filters, "limit": PAGE_SIZE}
+    while True:
+        response = cached_get(path, params=params)
+        yield response
+        cursor = response.headers.get("X-Next-Cursor")
+        if response.status_code != 200 or not cursor:
+            break
+        params = {**filters, "limit": PAGE_SIZE, "cursor": cursor}
+
+def fetch_all(path):
+    """Собирает все страницы списка. Возвращает (элементы, последний ответ сервера)"""
+    items = []
+    for response in iter_pages(path):
+        if response.status_code == 200:
+            items.extend(response.json())
+    return items, response
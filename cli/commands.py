@@ -0,0 +1,369 @@
+import csv
+import io
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import click
+import requests
+
+try:
+    from . import client
+except ImportError:  # запуск как скрипт: python cli/main.py
+    import client
+
+# Неинтерактивные подкоманды CLI для автоматизации:
+#   courses list/get/create/import, programs list/get/create/generate/import, membership apply.
+# Без подкоманды открывается интерактивное меню cli/main.py.
+
+COURSE_COLUMNS = [
+    "id", "title", "description", "total_hours",
+    "lecture_hours", "practice_hours", "difficulty", "has_online"
+]
+PROGRAM_COLUMNS = ["id", "name", "description", "total_duration_weeks", "course_ids"]
+DIFFICULTIES = ["начальный", "средний", "продвинутый"]
+MAX_REPORTED_FAILURES = 20
+
+# Вывод
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return ";".join(str(item) for item in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "" if value is None else value
+
+def _program_row(program: dict) -> dict:
+    """Программа для вывода: состав - списком ID курсов"""
+    row = {key: value for key, value in program.items() if key != "courses"}
+    if "course_ids" not in row:
+        row["course_ids"] = [course["id"] for course in program.get("courses", [])]
+    return row
+
+def emit(items: list[dict], columns: list[str], fmt: str):
+    """Вывести записи в stdout в формате json или csv"""
+    if fmt == "json":
+        click.echo(json.dumps(items, ensure_ascii=False, indent=2))
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    for item in items:
+        writer.writerow({column: _csv_value(item.get(column)) for column in columns})
+    click.echo(buffer.getvalue(), nl=False)
+
+def fail(response: requests.Response):
+    raise click.ClickException(f"{response.status_code}: {response.text}")
+
+# Чтение файлов для массовых операций
+
+INT_FIELDS = {"id", "total_hours", "lecture_hours", "practice_hours", "total_duration_weeks", "program_id"}
+LIST_FIELDS = {"course_ids", "add", "remove"}
+
+def _from_csv(row: dict) -> dict:
+    record = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        value = value.strip() if value is not None else ""
+        if key in LIST_FIELDS:
+            record[key] = [int(item) for item in value.split(";") if item.strip()]
+        elif value == "":
+            if key not in INT_FIELDS:
+                record[key] = None
+        elif key in INT_FIELDS:
+            record[key] = int(value)
+        elif key == "has_online":
+            record[key] = value.lower() in ("1", "true", "yes", "да")
+        else:
+            record[key] = value
+    return record
+
+def read_records(file) -> list[dict]:
+    """Записи из файла: JSON-массив, NDJSON или CSV (по расширению .csv)"""
+    text = file.read()
+    if file.name.endswith(".csv"):
+        return [_from_csv(row) for row in csv.DictReader(io.StringIO(text))]
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return json.loads(stripped)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+# Пул для массовых операций
+
+def http_error(record: dict, response: requests.Response) -> str | None:
+    """Ошибка записи по статусу ответа"""
+    if response.status_code >= 400:
+        return f"{response.status_code}: {response.text}"
+    return None
+
+def run_bulk(records: list[dict], send, workers: int, label: str, check=http_error):
+    """Отправить записи через пул из workers потоков (в полете не больше 2 * workers запросов).
+    send(record) -> Response; check(record, response) -> текст ошибки или None.
+    Показывает прогресс в stderr и итог; код выхода 1 при ошибках."""
+    client.configure_pool(workers)
+    failures = []
+
+    def attempt(index, record):
+        try:
+            response = send(record)
+        except requests.exceptions.RequestException as error:
+            return index, str(error)
+        return index, check(record, response)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor, \
+            click.progressbar(length=len(records), label=label, file=sys.stderr) as progress:
+        pending = set()
+        for index, record in enumerate(records):
+            if len(pending) >= workers * 2:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    failures.extend(_failure(future))
+                progress.update(len(finished))
+            pending.add(executor.submit(attempt, index, record))
+        for future in wait(pending).done:
+            failures.extend(_failure(future))
+        progress.update(len(pending))
+    done = len(records) - len(failures)
+
+    click.echo(f"Успешно: {done}, ошибок: {len(failures)}", err=True)
+    for index, message in sorted(failures)[:MAX_REPORTED_FAILURES]:
+        click.echo(f"  запись {index + 1}: {message}", err=True)
+    if len(failures) > MAX_REPORTED_FAILURES:
+        click.echo(f"  ... и еще {len(failures) - MAX_REPORTED_FAILURES}", err=True)
+    if failures:
+        sys.exit(1)
+
+def _failure(future) -> list:
+    index, message = future.result()
+    return [(index, message)] if message is not None else []
+
+format_option = click.option(
+    "--format", "fmt", type=click.Choice(["json", "csv"]), default="json", show_default=True,
+    help="Формат вывода"
+)
+workers_option = click.option(
+    "--workers", type=click.IntRange(1, 64), default=8, show_default=True,
+    help="Число параллельных запросов"
+)
+
+# Команды
+
+class ApiGroup(click.Group):
+    """Группа команд: ошибка соединения с сервером выводится сообщением, а не трассировкой"""
+
+    def invoke(self, ctx):
+        try:
+            return super().invoke(ctx)
+        except requests.exceptions.RequestException as error:
+            raise click.ClickException(f"Не удалось выполнить запрос к серверу {client.BASE_URL}: {error}")
+
+@click.group(cls=ApiGroup, invoke_without_command=True)
+@click.option("--url", envvar="EDU_API_URL", default=client.BASE_URL, show_default=True, help="Адрес сервера")
+@click.pass_context
+def cli(ctx, url):
+    """Клиент системы управления образовательными программами.
+    Без подкоманды открывается интерактивное меню."""
+    client.BASE_URL = url.rstrip("/")
+    if ctx.invoked_subcommand is None:
+        try:
+            from .main import run_interactive
+        except ImportError:
+            from main import run_interactive
+        run_interactive()
+
+@cli.group()
+def courses():
+    """Курсы"""
+
+@courses.command("list")
+@click.option("--difficulty", type=click.Choice(DIFFICULTIES))
+@click.option("--online/--offline", "has_online", default=None, help="Только онлайн- или только очные курсы")
+@click.option("--min-hours", type=int)
+@click.option("--max-hours", type=int)
+@click.option("--title-prefix")
+@click.option("--order-by", type=click.Choice(["id", "title", "total_hours", "difficulty", "has_online"]), default="id")
+@format_option
+def courses_list(fmt, order_by, **filters):
+    """Список курсов (все страницы)"""
+    params = {key: value for key, value in filters.items() if value is not None}
+    params["order_by"] = order_by
+    items = []
+    for response in client.iter_pages("/courses/", params):
+        if response.status_code != 200:
+            fail(response)
+        items.extend(response.json())
+    emit(items, COURSE_COLUMNS, fmt)
+
+@courses.command("get")
+@click.argument("course_id", type=int)
+@format_option
+def courses_get(course_id, fmt):
+    """Курс по ID"""
+    response = client.cached_get(f"/courses/{course_id}")
+    if response.status_code != 200:
+        fail(response)
+    emit([response.json()], COURSE_COLUMNS, fmt)
+
+@courses.command("create")
+@click.option("--title", required=True)
+@click.option("--description", default="")
+@click.option("--lecture-hours", type=int, default=0)
+@click.option("--practice-hours", type=int, default=0)
+@click.option("--total-hours", type=int, help="По умолчанию - сумма лекционных и практических")
+@click.option("--difficulty", type=click.Choice(DIFFICULTIES), default="средний")
+@click.option("--online/--offline", "has_online", default=False)
+@format_option
+def courses_create(fmt, total_hours, **fields):
+    """Создать курс"""
+    fields["total_hours"] = total_hours if total_hours is not None else fields["lecture_hours"] + fields["practice_hours"]
+    response = client.post("/courses/", json=fields)
+    if response.status_code != 201:
+        fail(response)
+    emit([response.json()], COURSE_COLUMNS, fmt)
+
+@courses.command("import")
+@click.argument("file", type=click.File(encoding="utf-8"))
+@workers_option
+def courses_import(file, workers):
+    """Загрузить курсы из JSON/NDJSON/CSV: записи с id обновляются, без id - создаются"""
+    def send(record):
+        record = dict(record)
+        course_id = record.pop("id", None)
+        if course_id is None:
+            return client.post("/courses/", json=record)
+        return client.put(f"/courses/{course_id}", json=record)
+
+    run_bulk(read_records(file), send, workers, "Курсы")
+
+@cli.group()
+def programs():
+    """Образовательные программы"""
+
+@programs.command("list")
+@click.option("--min-weeks", type=int)
+@click.option("--max-weeks", type=int)
+@click.option("--order-by", type=click.Choice(["id", "name", "total_duration_weeks"]), default="id")
+@format_option
+def programs_list(fmt, order_by, **filters):
+    """Список программ (все страницы) со списками ID курсов"""
+    params = {key: value for key, value in filters.items() if value is not None}
+    params["order_by"] = order_by
+    params["expand"] = "course_ids"
+    items = []
+    for response in client.iter_pages("/programs/", params):
+        if response.status_code != 200:
+            fail(response)
+        items.extend(_program_row(program) for program in response.json())
+    emit(items, PROGRAM_COLUMNS, fmt)
+
+@programs.command("get")
+@click.argument("program_id", type=int)
+@format_option
+def programs_get(program_id, fmt):
+    """Программа по ID"""
+    response = client.cached_get(f"/programs/{program_id}")
+    if response.status_code != 200:
+        fail(response)
+    emit([_program_row(response.json())], PROGRAM_COLUMNS, fmt)
+
+@programs.command("create")
+@click.option("--name", required=True)
+@click.option("--description", default="")
+@click.option("--weeks", "total_duration_weeks", type=int, default=12)
+@click.option("--course-ids", default="", help="ID курсов через запятую")
+@format_option
+def programs_create(fmt, course_ids, **fields):
+    """Создать программу"""
+    fields["course_ids"] = [int(cid) for cid in course_ids.split(",") if cid.strip()]
+    response = client.post("/programs/", json=fields)
+    if response.status_code != 201:
+        fail(response)
+    emit([_program_row(response.json())], PROGRAM_COLUMNS, fmt)
+
+@programs.command("generate")
+@click.option("--name", required=True)
+@click.option("--description", default="")
+@click.option("--weeks", "total_duration_weeks", type=int, default=12)
+@click.option("--max-hours", "max_total_hours", type=int, help="Наибольшая сумма часов курсов")
+@click.option("--hours-per-week", "max_hours_per_week", type=int, help="Наибольшая нагрузка в неделю")
+@click.option("--mix", help="Доли часов по уровням, например начальный=0.5,средний=0.3,продвинутый=0.2")
+@click.option("--min-online", "min_online_share", type=click.FloatRange(0, 1), default=0.0)
+@click.option("--save", is_flag=True, help="Сохранить программу")
+@format_option
+def programs_generate(fmt, mix, save, **fields):
+    """Подобрать курсы программы под бюджет часов"""
+    if mix:
+        try:
+            fields["difficulty_mix"] = {
+                level.strip(): float(share) for level, share in (part.split("=") for part in mix.split(","))
+            }
+        except ValueError:
+            raise click.BadParameter("ожидается уровень=доля через запятую", param_hint="--mix")
+    response = client.post("/programs/generate", params={"save": save}, json=fields)
+    if response.status_code not in (200, 201):
+        fail(response)
+    result = response.json()
+    click.echo(
+        f"Часов: {result['total_hours']} из {result['hours_budget']}, онлайн: {result['online_hours']}", err=True
+    )
+    emit([_program_row({"id": result["program_id"], **result["program"]})], PROGRAM_COLUMNS, fmt)
+
+@programs.command("import")
+@click.argument("file", type=click.File(encoding="utf-8"))
+@workers_option
+def programs_import(file, workers):
+    """Загрузить программы из JSON/NDJSON/CSV: записи с id обновляются, без id - создаются"""
+    def send(record):
+        record = dict(record)
+        program_id = record.pop("id", None)
+        if program_id is None:
+            return client.post("/programs/", json=record)
+        return client.put(f"/programs/{program_id}", json=record)
+
+    run_bulk(read_records(file), send, workers, "Программы")
+
+@cli.group()
+def membership():
+    """Состав программ"""
+
+@membership.command("apply")
+@click.argument("file", type=click.File(encoding="utf-8"))
+@workers_option
+def membership_apply(file, workers):
+    """Применить изменения состава программ.
+    Записи: {program_id, add: [...], remove: [...]} или CSV-строки program_id,course_id,action (add/remove).
+    Изменения одной программы объединяются в один запрос PATCH /programs/{id}/courses."""
+    changes = {}
+    for record in read_records(file):
+        change = changes.setdefault(record["program_id"], {"add": [], "remove": []})
+        if "action" in record:
+            if record["action"] not in ("add", "remove"):
+                raise click.ClickException(f"Неизвестное действие: {record['action']}")
+            change[record["action"]].append(int(record["course_id"]))
+        else:
+            change["add"].extend(record.get("add", []))
+            change["remove"].extend(record.get("remove", []))
+
+    records = [{"program_id": program_id, **change} for program_id, change in changes.items()]
+    run_bulk(
+        records,
+        lambda record: client.patch(
+            f"/programs/{record['program_id']}/courses",
+            json={"add": record["add"], "remove": record["remove"]}
+        ),
+        workers, "Программы", check=_membership_error
+    )
+
+def _membership_error(record: dict, response: requests.Response) -> str | None:
+    """Ошибка изменения состава: кроме статуса ответа - курсы, которых нет в каталоге
+    или в программе (PATCH применяет остальные изменения и отвечает 200)"""
+    error = http_error(record, response)
+    if error is not None:
+        return error
+    result = response.json()
+    problems = []
+    if result["missing"]:
+        problems.append(f"курсы не найдены: {', '.join(map(str, result['missing']))}")
+    if result["not_in_program"]:
+        problems.append(f"курсы не входят в программу: {', '.join(map(str, result['not_in_program']))}")
+    return f"программа {record['program_id']}: {'; '.join(problems)}" if problems else None
@@ -3,7 +3,12 @@ import click
 from typing import List
 from enum import Enum
 
-BASE_URL = "http://localhost:8000"
+try:
+    from . import client
+    from .client import cached_get, iter_pages, fetch_all
+except ImportError:  # запуск как скрипт: python cli/main.py
+    import client
+    from client import cached_get, iter_pages, fetch_all
 
 class DifficultyLevel(Enum):
     BEGINNER = "начальный"
@@ -29,24 +34,24 @@ def show_success(message):
 def list_courses_short():
     """Показывает краткий список курсов"""
     try:
-        response = requests.get(f"{BASE_URL}/courses")
-        if response.status_code == 200:
-            for course in response.json():
-                click.echo(f"{course['id']}: {course['title']} ({course['total_hours']} часов)")
-        else:
-            show_error(response.text)
+        for response in iter_pages("/courses/", {"fields": "title,total_hours"}):
+            if response.status_code == 200:
+                for course in response.json():
+                    click.echo(f"{course['id']}: {course['title']} ({course['total_hours']} часов)")
+            else:
+                show_error(response.text)
     except requests.exceptions.RequestException:
         show_error("Не удалось подключиться к серверу")
 
 def list_programs_short():
     """Показывает краткий список программ"""
     try:
-        response = requests.get(f"{BASE_URL}/programs")
-        if response.status_code == 200:
-            for program in response.json():
-                click.echo(f"{program['id']}: {program['name']}")
-        else:
-            show_error(response.text)
+        for response in iter_pages("/programs/", {"fields": "name", "expand": "none"}):
+            if response.status_code == 200:
+                for program in response.json():
+                    click.echo(f"{program['id']}: {program['name']}")
+            else:
+                show_error(response.text)
     except requests.exceptions.RequestException:
         show_error("Не удалось подключиться к серверу")
 
@@ -59,7 +64,10 @@ def view_course_details():
     course_id = click.prompt("\nВведите ID курса", type=int)
     
     try:
-        response = requests.get(f"{BASE_URL}/courses/{course_id}")
+        response, programs_response = client.run_concurrently(
+            lambda: cached_get(f"/courses/{course_id}"),
+            lambda: cached_get(f"/courses/{course_id}/programs"),
+        )
         if response.status_code == 200:
             course = response.json()
             
@@ -71,7 +79,6 @@ def view_course_details():
             click.echo(f"Уровень сложности: {course['difficulty']}")
             click.echo(f"Доступен онлайн: {'Да' if course['has_online'] else 'Нет'}")
             
-            programs_response = requests.get(f"{BASE_URL}/courses/{course_id}/programs")
             if programs_response.status_code == 200 and programs_response.json():
                 click.echo("\nВходит в программы:")
                 for program in programs_response.json():
@@ -92,7 +99,7 @@ def view_program_details():
     program_id = click.prompt("\nВведите ID программы", type=int)
     
     try:
-        response = requests.get(f"{BASE_URL}/programs/{program_id}")
+        response = cached_get(f"/programs/{program_id}")
         if response.status_code == 200:
             program = response.json()
             
@@ -144,9 +151,14 @@ def add_course():
             "has_online": has_online
         }
         
-        response = requests.post(f"{BASE_URL}/courses/", json=course_data)
+        response = client.post("/courses/", json=course_data)
         
         if response.status_code == 201:
+            possible = response.json().get("possible_duplicates", [])
+            if possible:
+                click.echo("\n⚠️  Похожие курсы уже есть в каталоге:")
+                for course in possible:
+                    click.echo(f"{course['id']}: {course['title']} (сходство {course['similarity']:.2f})")
             show_success("Курс успешно создан!")
         else:
             show_error(response.text)
@@ -164,7 +176,7 @@ def update_course():
     course_id = click.prompt("\nВведите ID курса для обновления", type=int)
     
     try:
-        response = requests.get(f"{BASE_URL}/courses/{course_id}")
+        response = cached_get(f"/courses/{course_id}")
         if response.status_code != 200:
             show_error(response.text)
             return
@@ -198,7 +210,7 @@ def update_course():
             "has_online": has_online
         }
         
-        update_response = requests.put(f"{BASE_URL}/courses/{course_id}", json=course_data)
+        update_response = client.put(f"/courses/{course_id}", json=course_data)
         
         if update_response.status_code == 200:
             show_success("Курс успешно обновлен!")
@@ -218,7 +230,7 @@ def delete_course():
     course_id = click.prompt("\nВведите ID курса для удаления", type=int)
     
     try:
-        programs_response = requests.get(f"{BASE_URL}/courses/{course_id}/programs")
+        programs_response = cached_get(f"/courses/{course_id}/programs")
         if programs_response.status_code == 200 and programs_response.json():
             click.echo("\nЭтот курс входит в следующие программы:")
             for program in programs_response.json():
@@ -228,7 +240,7 @@ def delete_course():
                 return
         
         if click.confirm("Вы уверены, что хотите удалить этот курс?"):
-            response = requests.delete(f"{BASE_URL}/courses/{course_id}")
+            response = client.delete(f"/courses/{course_id}")
             
             if response.status_code == 204:
                 show_success("Курс успешно удален!")
@@ -248,20 +260,25 @@ def add_program():
         description = click.prompt("Описание программы", default="")
         duration = click.prompt("Продолжительность (недель)", type=int, default=12)
         
-        list_courses_short()
-        course_ids = click.prompt(
-            "\nВведите ID курсов через запятую (оставьте пустым, если без курсов)", 
-            default=""
-        )
-        
-        program_data = {
-            "name": name,
-            "description": description,
-            "total_duration_weeks": duration,
-            "course_ids": [int(cid.strip()) for cid in course_ids.split(",") if cid.strip()]
-        }
+        if click.confirm("Подобрать курсы автоматически?", default=False):
+            program_data = generate_program(name, description, duration)
+            if program_data is None:
+                return
+        else:
+            list_courses_short()
+            course_ids = click.prompt(
+                "\nВведите ID курсов через запятую (оставьте пустым, если без курсов)", 
+                default=""
+            )
+            
+            program_data = {
+                "name": name,
+                "description": description,
+                "total_duration_weeks": duration,
+                "course_ids": [int(cid.strip()) for cid in course_ids.split(",") if cid.strip()]
+            }
         
-        response = requests.post(f"{BASE_URL}/programs/", json=program_data)
+        response = client.post("/programs/", json=program_data)
         
         if response.status_code == 201:
             show_success("Программа успешно создана!")
@@ -272,6 +289,44 @@ def add_program():
     except Exception as e:
         show_error(str(e))
 
+def generate_program(name, description, duration):
+    """Подбор курсов программы сервером (POST /programs/generate); None - пользователь отказался"""
+    hours_per_week = click.prompt("Нагрузка (часов в неделю)", type=int, default=20)
+    mix = click.prompt(
+        "Доли часов по уровням в % через запятую (начальный,средний,продвинутый; пусто - без ограничений)",
+        default=""
+    )
+    online_percent = click.prompt("Не меньше % часов онлайн", type=click.IntRange(0, 100), default=0)
+    
+    request_data = {
+        "name": name,
+        "description": description,
+        "total_duration_weeks": duration,
+        "max_hours_per_week": hours_per_week,
+        "min_online_share": online_percent / 100,
+    }
+    if mix.strip():
+        shares = [int(part.strip() or 0) / 100 for part in mix.split(",")]
+        request_data["difficulty_mix"] = {
+            level.value: share for level, share in zip(DifficultyLevel, shares)
+        }
+    
+    response = client.post("/programs/generate", json=request_data)
+    if response.status_code != 200:
+        show_error(response.text)
+        return None
+    result = response.json()
+    
+    click.echo(f"\nПодобрано курсов: {len(result['program']['course_ids'])}, "
+               f"часов: {result['total_hours']} из {result['hours_budget']}, "
+               f"онлайн: {result['online_hours']}")
+    for level, hours in result["hours_by_difficulty"].items():
+        click.echo(f"  {level}: {hours} ч.")
+    click.echo(f"ID курсов: {', '.join(map(str, result['program']['course_ids']))}")
+    if not click.confirm("Создать программу с этими курсами?", default=True):
+        return None
+    return result["program"]
+
 def update_program():
     """Обновление данных программы"""
     click.clear()
@@ -281,7 +336,10 @@ def update_program():
     program_id = click.prompt("\nВведите ID программы для обновления", type=int)
     
     try:
-        response = requests.get(f"{BASE_URL}/programs/{program_id}")
+        response, (available, available_response) = client.run_concurrently(
+            lambda: cached_get(f"/programs/{program_id}"),
+            lambda: fetch_all(f"/programs/{program_id}/available-courses"),
+        )
         if response.status_code != 200:
             show_error(response.text)
             return
@@ -299,10 +357,9 @@ def update_program():
         else:
             click.echo("  В программе пока нет курсов")
         
-        available_response = requests.get(f"{BASE_URL}/programs/{program_id}/available-courses")
-        if available_response.status_code == 200 and available_response.json():
+        if available_response.status_code == 200 and available:
             click.echo("\nДоступные курсы для добавления:")
-            for course in available_response.json():
+            for course in available:
                 click.echo(f"  - {course['title']} (ID: {course['id']})")
         
         course_ids = click.prompt(
@@ -317,7 +374,7 @@ def update_program():
             "course_ids": [int(cid.strip()) for cid in course_ids.split(",") if cid.strip()]
         }
         
-        update_response = requests.put(f"{BASE_URL}/programs/{program_id}", json=program_data)
+        update_response = client.put(f"/programs/{program_id}", json=program_data)
         
         if update_response.status_code == 200:
             show_success("Программа успешно обновлена!")
@@ -338,7 +395,7 @@ def delete_program():
     
     try:
         if click.confirm("Вы уверены, что хотите удалить эту программу?"):
-            response = requests.delete(f"{BASE_URL}/programs/{program_id}")
+            response = client.delete(f"/programs/{program_id}")
             
             if response.status_code == 204:
                 show_success("Программа успешно удалена!")
@@ -356,28 +413,39 @@ def add_course_to_program():
     program_id = click.prompt("\nВведите ID программы", type=int)
     
     try:
-        response = requests.get(f"{BASE_URL}/programs/{program_id}/available-courses")
-        if response.status_code == 200:
-            if not response.json():
+        # Рекомендации по курсам программы; полный список доступных - по запросу или если их нет
+        suggested = cached_get(f"/programs/{program_id}/suggested-courses", params={"k": 10})
+        if suggested.status_code == 200 and suggested.json():
+            click.echo("\nРекомендуемые курсы (похожи на курсы программы):")
+            for course in suggested.json():
+                click.echo(f"{course['id']}: {course['title']} ({course['similarity']:.2f})")
+            course_id = click.prompt("\nВведите ID курса для добавления (0 - показать все доступные)", type=int)
+        else:
+            course_id = 0
+        
+        if course_id == 0:
+            available, response = fetch_all(f"/programs/{program_id}/available-courses")
+            if response.status_code != 200:
+                show_error(response.text)
+                return
+            if not available:
                 show_error("Нет доступных курсов для добавления")
                 return
             
             click.echo("\nДоступные курсы:")
-            for course in response.json():
+            for course in available:
                 click.echo(f"{course['id']}: {course['title']}")
             
             course_id = click.prompt("\nВведите ID курса для добавления", type=int)
-            
-            add_response = requests.post(
-                f"{BASE_URL}/programs/{program_id}/courses/{course_id}"
-            )
-            
-            if add_response.status_code == 200:
-                show_success("Курс успешно добавлен в программу!")
-            else:
-                show_error(add_response.text)
+        
+        add_response = client.post(
+            f"/programs/{program_id}/courses/{course_id}"
+        )
+        
+        if add_response.status_code == 200:
+            show_success("Курс успешно добавлен в программу!")
         else:
-            show_error(response.text)
+            show_error(add_response.text)
     except requests.exceptions.RequestException:
         show_error("Не удалось подключиться к серверу")
 
@@ -390,7 +458,7 @@ def remove_course_from_program():
     program_id = click.prompt("\nВведите ID программы", type=int)
     
     try:
-        response = requests.get(f"{BASE_URL}/programs/{program_id}")
+        response = cached_get(f"/programs/{program_id}")
         if response.status_code == 200:
             program = response.json()
             
@@ -404,8 +472,8 @@ def remove_course_from_program():
             
             course_id = click.prompt("\nВведите ID курса для удаления", type=int)
             
-            remove_response = requests.delete(
-                f"{BASE_URL}/programs/{program_id}/courses/{course_id}"
+            remove_response = client.delete(
+                f"/programs/{program_id}/courses/{course_id}"
             )
             
             if remove_response.status_code == 200:
@@ -510,9 +578,10 @@ def main_menu():
         else:
             show_error("Неверный выбор")
 
-if __name__ == "__main__":
+def run_interactive():
+    """Проверить доступность сервера и открыть интерактивное меню"""
     try:
-        response = requests.get(f"{BASE_URL}/health")
+        response = client.get("/health")
         if response.status_code == 200:
             main_menu()
         else:
@@ -520,4 +589,12 @@ if __name__ == "__main__":
             click.pause("Нажмите Enter чтобы выйти...")
     except requests.exceptions.RequestException:
         click.echo("Не удалось подключиться к серверу. Убедитесь, что сервер запущен.")
-        click.pause("Нажмите Enter чтобы выйти...")
\ No newline at end of file
+        click.pause("Нажмите Enter чтобы выйти...")
+
+if __name__ == "__main__":
+    # Без подкоманды открывается интерактивное меню (см. cli/commands.py)
+    try:
+        from .commands import cli
+    except ImportError:
+        from commands import cli
+    cli()